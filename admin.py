@@ -1,9 +1,6 @@
-import os
-import shutil
-
 import char_cmds
-import config
 import discord
+import metrics
 from discord.ext import commands
 
 
@@ -56,10 +53,37 @@ class adminCommands(commands.Cog):
     )
     @commands.is_owner()
     async def shutdown(self, ctx):
-        """Stop the application (gracefully)."""
-        await ctx.respond("goodbye")
+        """Stop the application (gracefully).
+
+        Any characters with unsaved changes in `char_cmds.char_cache`
+        are written out before the bot closes.
+        """
+        written = await char_cmds.store.flush()
+        await ctx.respond(f"goodbye (saved {written} characters)")
         await ctx.bot.close()
 
+    @commands.slash_command(
+        description="Show character cache statistics.",
+        help="Show character cache statistics. Owner only.",
+        brief="Show cache stats. Owner only.",
+        hidden=True,
+        name='cache'
+    )
+    @commands.is_owner()
+    async def _cache(self, ctx):
+        """
+        Report the hit/miss/eviction counters for `char_cmds.char_cache`.
+
+        Parameters
+        ----------
+        ctx:     The discord context object for the command
+        """
+        out_str = "```Character Cache\n"\
+                  "---------------\n"
+        for k, v in char_cmds.char_cache.stats().items():
+            out_str += f"{k}: {v}\n"
+        await ctx.respond(out_str + "```")
+
     @commands.slash_command(
         description="Delete ALL data for the game.",
         help="Purge data for testing.",
@@ -70,23 +94,24 @@ class adminCommands(commands.Cog):
     @commands.is_owner()
     async def _flush(self, ctx):
         """
-        Purge the game data directory for testing purposes.
+        Purge the game data for testing purposes.
 
-        This will delete ALL data files without any check or confirmation.
+        This will delete ALL data held by the storage backend
+        (`char_cmds.backend`) without any check or confirmation.
         Use at your own risk.
 
         Parameters
         ----------
         ctx:     The discord context object for the command
         """
-        path = f"./{config.data['data_dir']}/"
         try:
-            # os.remove(path)
-            shutil.rmtree(path)
+            await char_cmds.store.run(char_cmds.backend.purge)
+            char_cmds.char_cache.clear()
+            char_cmds.board.clear()
             await ctx.respond("```Dleted all data files for game.```")
         except FileNotFoundError as e:
             await ctx.respond("could not delete files check disk")
-            raise FileNotFoundError(f"could not find {path} -- {e}")
+            raise FileNotFoundError(f"could not delete game data -- {e}")
 
     @commands.slash_command(
         description="Initialize the data directory for the game.",
@@ -98,30 +123,105 @@ class adminCommands(commands.Cog):
     @commands.is_owner()
     async def _reset(self, ctx):
         """
-        Recreate the game data dirs for testing.
+        Recreate the game data for testing.
 
-        This will attempt to create the top-level and sub-directories
-        specified in config.data for the game. Raises FileExistsError
-        if any of the files exists already.
+        Asks the storage backend (`char_cmds.backend`) to create the
+        directories or tables it needs. Raises FileExistsError if they
+        could not be created.
 
         Parameters
         ----------
         ctx:     The discord context object for the command
         """
         try:
-            data_dir = f"./{config.data['data_dir']}"
-            if not os.path.isdir(data_dir):
-                os.makedirs(data_dir)
-            char_files_dir = f"{data_dir}/{config.data['char_dir']}"
-            if not os.path.isdir(char_files_dir):
-                os.makedirs(char_files_dir)
-            active_files_dir = f"{data_dir}/{config.data['active_dir']}"
-            if not os.path.isdir(active_files_dir):
-                os.makedirs(active_files_dir)
+            await char_cmds.store.run(char_cmds.backend.init)
             await ctx.respond("```Initialized game data.```")
         except FileExistsError as e:
             raise FileExistsError(f"```Failed to initialize game data files. {e}```")
 
+    @commands.slash_command(
+        description="Move character data into the sharded directory layout.",
+        help="Migrate flat data directories to the sharded layout. Owner only.",
+        brief="Migrate data layout. Owner only.",
+        hidden=True,
+        name='migrate'
+    )
+    @commands.is_owner()
+    async def _migrate(self, ctx, batch: int = 500):
+        """
+        Move users from the flat data layout into their shards.
+
+        Runs on the storage threads `batch` users at a time so other
+        commands keep being served while it works. Users not moved yet are
+        still read from and written to the flat layout, see
+        `storage.PickleStorage`.
+
+        Parameters
+        ----------
+        ctx:     The discord context object for the command
+        batch:   How many users to move per storage call
+        """
+        backend = char_cmds.backend
+        if not hasattr(backend, 'migrate'):
+            await ctx.respond("```Nothing to migrate for this storage backend.```")
+            return
+        await ctx.defer()
+        total = 0
+        while True:
+            moved = await char_cmds.store.run(backend.migrate, batch)
+            if not moved:
+                break
+            total += moved
+        await ctx.respond(f"```Migrated {total} users.```")
+
+    @commands.slash_command(
+        description="Show event loop lag.",
+        help="Show how far behind the event loop is running. Owner only.",
+        brief="Show loop lag. Owner only.",
+        hidden=True,
+        name='lag'
+    )
+    @commands.is_owner()
+    async def _lag(self, ctx):
+        """
+        Report the event loop lag measured by `metrics.loop_lag`.
+
+        Parameters
+        ----------
+        ctx:     The discord context object for the command
+        """
+        out_str = "```Event Loop Lag\n"\
+                  "--------------\n"
+        for k, v in metrics.loop_lag.stats().items():
+            out_str += f"{k}: {v}\n"
+        out_str += f"storage workers: {char_cmds.store.workers}\n"
+        await ctx.respond(out_str + "```")
+
+    @commands.slash_command(
+        description="Show group commit statistics.",
+        help="Show group commit batch sizes. Owner only.",
+        brief="Show commit stats. Owner only.",
+        hidden=True,
+        name='commits'
+    )
+    @commands.is_owner()
+    async def _commits(self, ctx):
+        """
+        Report the batch size metrics for `char_cmds.committer`.
+
+        Parameters
+        ----------
+        ctx:     The discord context object for the command
+        """
+        if char_cmds.committer is None:
+            await ctx.respond("```Group commit is disabled.```")
+            return
+        out_str = "```Group Commit\n"\
+                  "------------\n"
+        for k, v in char_cmds.committer.stats().items():
+            out_str += f"{k}: {v}\n"
+        await ctx.respond(out_str + "```")
+
     @commands.slash_command()
     @commands.is_owner()
     async def set_coins(self, ctx,
@@ -142,9 +242,10 @@ class adminCommands(commands.Cog):
         except Exception:
             user_id = ctx.author.id
         try:
-            me = char_cmds.load_char(user_id, name)
-            me.inventory.set_gold(value)
-            char_cmds.save_char(user_id, me)
+            async with char_cmds.char_locks.hold(user_id, name):
+                me = await char_cmds.store.load(user_id, name)
+                me.inventory.set_gold(value)
+                await char_cmds.store.save(user_id, me)
         except Exception:
             await ctx.respond("```failed```")
             return
@@ -158,9 +259,10 @@ class adminCommands(commands.Cog):
                                            description="Mention a user",
                                            required=False)):
         """
-        Set a user's coin count.
+        Set a user's exp.
 
-        Explicitly set the amount of exp a user has.
+        Explicitly set the amount of exp a user has. Their level is
+        recomputed from it.
         """
         user_id = ""
         try:
@@ -170,10 +272,12 @@ class adminCommands(commands.Cog):
         except Exception:
             user_id = ctx.author.id
         try:
-            me = char_cmds.load_char(user_id, name)
-            me.experience = int(value)
-            char_cmds.save_char(user_id, me)
+            async with char_cmds.char_locks.hold(user_id, name):
+                me = await char_cmds.store.load(user_id, name)
+                me.experience = int(value)
+                await char_cmds.store.save(user_id, me)
         except Exception as e:
             await ctx.respond(f"```failed {e}```")
             return
-        await ctx.respond(f"```Set exp value for {me.name} to {value}.```")
+        await ctx.respond(f"```Set exp value for {me.name} to {value} "
+                          f"(level {me.level}).```")
@@ -0,0 +1,207 @@
+"""
+Resolve many battles at once with numpy, for balancing.
+
+Every player in one :class:`Fighters` is matched against every enemy in
+another and all N x M fights are resolved together, using the same rules
+as :func:`event.resolve()` (player hits first, damage below 0 counts as 0,
+no damage either way is a stalemate). Attack and defense built with
+:func:`Fighters.from_stats()` use the same formulas as
+`character.Character.attack` and `character.Character.defense`.
+
+Example
+-------
+    players = Fighters.from_stats(main=np.arange(5, 50), hp=190)
+    enemies = Fighters([20, 30, 40], [5, 10, 15], [100, 150, 250])
+    out = resolve(players, enemies)
+    win_rate(out)                   # per player/enemy pair
+    win_rate(out, tiers, None)      # per player group (eg gear tier)
+    round_counts(out)               # how long the fights last
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from character import ATTACK_BASE, ATTACK_SCALE, DEFENSE_BASE, DEFENSE_SCALE
+
+PLAYER = 1
+ENEMY = -1
+STALEMATE = 0
+
+Outcomes = namedtuple('Outcomes',
+                      ['winner', 'player_hp', 'enemy_hp', 'rounds'])
+"""
+Results of :func:`resolve()`, each an N x M array indexed
+[player, enemy]. winner is `PLAYER`, `ENEMY` or `STALEMATE`, the rest are
+as in :class:`event.Outcome` (rounds is 0 for a stalemate).
+"""
+
+
+class Fighters:
+    """
+    One side of a batch of fights, stored as a struct of arrays.
+
+    Attributes
+    ----------
+    attack:     :class:`numpy.ndarray`
+        Attack of each fighter.
+    defense:    :class:`numpy.ndarray`
+        Defense of each fighter.
+    hp:         :class:`numpy.ndarray`
+        Current hp of each fighter.
+
+    Methods
+    -------
+    from_stats(main, weapon_bonus, hp):
+        Fighters with attack and defense derived like a character's.
+    from_characters(chars):
+        Fighters copied from :class:`character.Character` objects.
+    """
+    __slots__ = ('attack', 'defense', 'hp')
+
+    def __init__(self, attack, defense, hp):
+        """
+        Parameters
+        ----------
+        attack, defense, hp:    array like
+            One value per fighter, or a scalar shared by all of them. Every
+            array given must be the same length.
+        """
+        self.attack, self.defense, self.hp = (
+            a.ravel() for a in np.broadcast_arrays(
+                np.asarray(attack, dtype=np.float64),
+                np.asarray(defense, dtype=np.float64),
+                np.asarray(hp, dtype=np.float64)))
+
+    @classmethod
+    def from_stats(cls, main, weapon_bonus=1.0, hp=190) -> 'Fighters':
+        """
+        Fighters with the attack and defense a character would have.
+
+        Parameters
+        ----------
+        main:           array like
+            Main stat of each fighter, including gear (see
+            `character.Character._derive_combat()`).
+        weapon_bonus:   array like
+            Preferred weapon multiplier (1.0 without one).
+        hp:             array like
+            Current hp.
+        """
+        main = np.asarray(main, dtype=np.float64)
+        attack = np.trunc(ATTACK_BASE + main * ATTACK_SCALE) * weapon_bonus
+        defense = np.trunc(DEFENSE_BASE + main * DEFENSE_SCALE)
+        return cls(attack, defense, hp)
+
+    @classmethod
+    def from_characters(cls, chars) -> 'Fighters':
+        """Fighters with the (cached) attack, defense and hp of chars."""
+        chars = list(chars)
+        return cls([c.attack for c in chars], [c.defense for c in chars],
+                   [c.health.cur_hp for c in chars])
+
+    def __len__(self):
+        return len(self.hp)
+
+
+def _hits_to_kill(hp: np.ndarray, damage: np.ndarray) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        hits = np.where(damage > 0, np.ceil(hp / damage), np.inf)
+    return np.where(hp <= 0, 0, hits)
+
+
+def resolve(players: Fighters, enemies: Fighters) -> Outcomes:
+    """
+    Resolve every player against every enemy.
+
+    Memory use is a few N x M float arrays, split large sweeps into chunks
+    of players.
+
+    Returns
+    -------
+    :class:`Outcomes`
+    """
+    p_hp = players.hp[:, None]
+    e_hp = enemies.hp[None, :]
+    p_dmg = np.maximum(players.attack[:, None] - enemies.defense[None, :], 0)
+    e_dmg = np.maximum(enemies.attack[None, :] - players.defense[:, None], 0)
+    p_hits = _hits_to_kill(e_hp, p_dmg)
+    e_hits = _hits_to_kill(p_hp, e_dmg)
+
+    stalemate = (np.isinf(p_hits) & np.isinf(e_hits)) | \
+        ((p_hp <= 0) & (e_hp <= 0))
+    player_wins = ~stalemate & (p_hits <= e_hits)
+    rounds = np.where(stalemate, 0, np.where(player_wins, p_hits, e_hits))
+    # the player strikes first, so the enemy only hit back rounds - 1 times
+    # when the player wins
+    enemy_hits = np.where(player_wins, np.maximum(rounds - 1, 0), rounds)
+    winner = np.where(stalemate, STALEMATE,
+                      np.where(player_wins, PLAYER, ENEMY)).astype(np.int8)
+    return Outcomes(winner,
+                    p_hp - enemy_hits * e_dmg,
+                    e_hp - rounds * p_dmg,
+                    rounds.astype(np.int64))
+
+
+def _group_sum(values: np.ndarray, groups, axis: int) -> np.ndarray:
+    """Sum values along axis within each group (None: no grouping)."""
+    if groups is None:
+        return values
+    groups = np.asarray(groups)
+    n = groups.max() + 1 if len(groups) else 0
+    moved = np.moveaxis(values, axis, 0)
+    out = np.zeros((n,) + moved.shape[1:], dtype=np.float64)
+    np.add.at(out, groups, moved)
+    return np.moveaxis(out, 0, axis)
+
+
+def win_rate(out: Outcomes, player_groups=None,
+             enemy_groups=None) -> np.ndarray:
+    """
+    Fraction of fights won by the players.
+
+    Parameters
+    ----------
+    out:            :class:`Outcomes`
+        Results from :func:`resolve()`.
+    player_groups:  array like
+        Optional group number (0, 1, ...) of each player, eg their class or
+        gear tier. Rows of the result are then groups instead of players.
+    enemy_groups:   array like
+        Likewise for the enemies and the columns.
+
+    Returns
+    -------
+    A matrix of win rates, one row per player (group) and one column per
+    enemy (group). Stalemates count as fights not won.
+    """
+    wins = (out.winner == PLAYER).astype(np.float64)
+    fights = np.ones_like(wins)
+    for axis, groups in ((0, player_groups), (1, enemy_groups)):
+        wins = _group_sum(wins, groups, axis)
+        fights = _group_sum(fights, groups, axis)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return wins / fights
+
+
+def round_counts(out: Outcomes, mask=None) -> np.ndarray:
+    """
+    How many decided fights lasted each number of rounds.
+
+    Parameters
+    ----------
+    out:    :class:`Outcomes`
+        Results from :func:`resolve()`.
+    mask:   array like
+        Optional boolean N x M (or broadcastable) selection of the fights
+        to count, eg `out.winner == PLAYER`.
+
+    Returns
+    -------
+    An array where element n is the number of fights that ended in round n.
+    Stalemates are not counted.
+    """
+    keep = out.winner != STALEMATE
+    if mask is not None:
+        keep &= np.asarray(mask, dtype=bool)
+    return np.bincount(out.rounds[keep])
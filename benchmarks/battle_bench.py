@@ -0,0 +1,44 @@
+"""
+Measure resolving a battle.
+
+Compares `event.resolve` (rounds to kill worked out directly) against
+playing the fight out one round at a time like `event.Battle.combat` used
+to, for fights of increasing length.
+
+Run from the repository root:
+    python benchmarks/battle_bench.py [fights]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import event  # noqa: E402
+
+
+def step(p_attack, p_defense, p_hp, e_attack, e_defense, e_hp):
+    """The old round by round loop (with damage clamped so it ends)."""
+    rounds = 0
+    while True:
+        rounds += 1
+        e_hp -= max(p_attack - e_defense, 0)
+        if e_hp <= 0:
+            return 'player', p_hp, e_hp, rounds
+        p_hp -= max(e_attack - p_defense, 0)
+        if p_hp <= 0:
+            return 'enemy', p_hp, e_hp, rounds
+
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"{'rounds':<10}{'loop us':>10}{'resolve us':>12}{'speedup':>10}")
+    for hp in (100, 1000, 10000):
+        fight = (16.5, 8, hp, 12, 6.5, hp)
+        rounds = event.resolve(*fight).rounds
+        assert tuple(event.resolve(*fight)) == step(*fight)
+        t_loop = timeit.timeit(lambda: step(*fight), number=number) / number
+        t_res = timeit.timeit(lambda: event.resolve(*fight),
+                              number=number) / number
+        print(f"{rounds:<10}{t_loop*1e6:>10.2f}{t_res*1e6:>12.2f}"
+              f"{t_loop/t_res:>9.1f}x")
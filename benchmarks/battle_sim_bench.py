@@ -0,0 +1,68 @@
+"""
+Measure resolving a sweep of matchups with `battle_sim`.
+
+Builds every class x gear bonus x weapon combination as players, fights
+them against a range of enemy templates with `battle_sim.resolve` and with
+`event.resolve` one pair at a time, and prints the speed of each plus the
+win rate of each class.
+
+Run from the repository root (needs numpy):
+    python benchmarks/battle_sim_bench.py [enemies]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import battle_sim  # noqa: E402
+import character  # noqa: E402
+import event  # noqa: E402
+
+CLASSES = (character.Warrior, character.Rogue, character.Wizard,
+           character.Trader, character.Paladin, character.Villager)
+
+
+def players() -> tuple:
+    """Every class with 0-99 main stat from gear, with and without their
+    preferred weapon. Returns the fighters and each one's class number."""
+    cls, gear, weapon = np.meshgrid(np.arange(len(CLASSES)), np.arange(100),
+                                    (1.0, 1.1), indexing='ij')
+    cls, gear, weapon = cls.ravel(), gear.ravel(), weapon.ravel()
+    main = np.array([k().main_stat for k in CLASSES])[cls] + gear
+    hp = np.array([character.Character("x", class_choice=k()).health.cur_hp
+                   for k in CLASSES])[cls]
+    return battle_sim.Fighters.from_stats(main, weapon, hp), cls
+
+
+if __name__ == '__main__':
+    m = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    p, groups = players()
+    rng = np.random.default_rng(0)
+    e = battle_sim.Fighters(rng.integers(10, 60, m), rng.integers(0, 30, m),
+                            rng.integers(50, 500, m))
+
+    start = time.perf_counter()
+    out = battle_sim.resolve(p, e)
+    t_batch = time.perf_counter() - start
+
+    sample = range(0, len(p), max(len(p) // 20, 1))
+    pa, pd, ph = p.attack.tolist(), p.defense.tolist(), p.hp.tolist()
+    ea, ed, eh = e.attack.tolist(), e.defense.tolist(), e.hp.tolist()
+    start = time.perf_counter()
+    for i in sample:
+        for j in range(m):
+            event.resolve(pa[i], pd[i], ph[i], ea[j], ed[j], eh[j])
+    t_loop = (time.perf_counter() - start) / (len(sample) * m)
+
+    fights = len(p) * m
+    print(f"{fights} fights: batch {t_batch/fights*1e9:.1f} ns/fight, "
+          f"event.resolve {t_loop*1e9:.1f} ns/fight "
+          f"({t_loop*fights/t_batch:.0f}x)")
+    rates = battle_sim.win_rate(out, groups).mean(axis=1)
+    for k, r in zip(CLASSES, rates):
+        print(f"{k.__name__:<10}{r:>7.1%}")
+    counts = battle_sim.round_counts(out)
+    print(f"median rounds {np.searchsorted(counts.cumsum(), counts.sum()/2)}")
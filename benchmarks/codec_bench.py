@@ -0,0 +1,56 @@
+"""
+Compare `codec` against pickle on synthetic characters.
+
+Builds characters with large fish inventories and reports the encoded
+size and the encode/decode time for each format.
+
+Run from the repository root:
+    python benchmarks/codec_bench.py [inventory size ...]
+"""
+import os
+import pickle
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import character  # noqa: E402
+import codec  # noqa: E402
+import fish  # noqa: E402
+
+
+def make_char(n_items: int, seed: int = 1) -> character.Character:
+    """Build a villager holding n_items fish drawn from every pool."""
+    rng = random.Random(seed)
+    species = []
+    for p in fish.fishing_pools:
+        species.extend(p.avail_fish)
+    c = character.Character("bench", class_choice=character.Villager())
+    for _ in range(n_items):
+        c.inventory.add_item(rng.choice(species))
+    c.inventory.set_gold(rng.randint(0, 10**6))
+    return c
+
+
+def bench(n_items: int, number: int = 20):
+    c = make_char(n_items)
+    formats = {
+        'pickle': (pickle.dumps, pickle.loads),
+        'codec': (codec.encode, codec.decode),
+    }
+    print(f"inventory size {n_items}")
+    print(f"{'format':<8}{'bytes':>10}{'encode ms':>12}{'decode ms':>12}")
+    for name, (enc, dec) in formats.items():
+        data = enc(c)
+        assert dec(data) == c
+        t_enc = timeit.timeit(lambda: enc(c), number=number) / number
+        t_dec = timeit.timeit(lambda: dec(data), number=number) / number
+        print(f"{name:<8}{len(data):>10}{t_enc*1000:>12.3f}{t_dec*1000:>12.3f}")
+    print()
+
+
+if __name__ == '__main__':
+    sizes = [int(a) for a in sys.argv[1:]] or [100, 10000]
+    for n in sizes:
+        bench(n)
@@ -0,0 +1,98 @@
+"""
+Measure reading a character's attack and defense.
+
+Compares the cached `Character.attack`/`Character.defense` against the
+way they were read before (every read walked the gear, see
+:func:`old_attack()`), for a naked character and one wearing a full set
+of gear.
+
+Run from the repository root:
+    python benchmarks/combat_bench.py [reads]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import character  # noqa: E402
+import item  # noqa: E402
+
+
+def make_gear() -> character.Gear:
+    """Build a Gear with every slot filled."""
+    mat = item.Material("iron", 2, slots=[item.Slot(i) for i in item.Slot.slots])
+    stats = dict(strength=2, agility=1, intellect=1, charisma=1,
+                 constitution=1, luck=1)
+
+    def piece(n, slot, name):
+        return item.Equipment(name=name, item_id=n, slot=item.Slot(slot),
+                              material=mat, **stats)
+    g = character.Gear()
+    g.head = piece(1, 'head', 'iron helm')
+    g.chest = piece(2, 'chest', 'iron chest')
+    g.arms = piece(3, 'arms', 'iron bracers')
+    g.legs = piece(4, 'legs', 'iron greaves')
+    g.hands = piece(5, 'hands', 'iron gloves')
+    g.rings = [piece(6, 'finger', 'iron ring'), piece(7, 'finger', 'iron band')]
+    g.trinket = piece(8, 'trinket', 'iron idol')
+    g.weapon = piece(9, 'weapon', 'iron sword')
+    g.oh = piece(10, 'offhand', 'iron shield')
+    return g
+
+
+def gear_stats(c: character.Character) -> list:
+    """Copy of the old `bt_Class.get_gear_stats()` walk over every slot."""
+    ret = []
+    for i in c.gear:
+        if i is None:
+            continue
+        ret.append(getattr(i, c._bt_class.main_stat_name))
+    return ret
+
+
+def old_attack(c: character.Character) -> float:
+    """Copy of `Character.attack` before it was cached."""
+    base = 10
+    main_stat = c._bt_class.main_stat
+    attack = 0
+    if c.gear.weapon is not None:
+        bonus = c._bt_class.attack_bonus(c.gear)
+    else:
+        bonus = 1.0
+    for g in gear_stats(c):
+        attack += g
+    return int((base + (main_stat + attack) * .5)) * bonus
+
+
+def old_defense(c: character.Character) -> int:
+    """Copy of `Character.defense` before it was cached."""
+    base = 8
+    main_stat = c._bt_class.main_stat
+    defense = 0
+    for g in gear_stats(c):
+        defense += g
+    return int(base + (main_stat + defense) * .15)
+
+
+def bench(c: character.Character, label: str, number: int):
+    def cached():
+        return c.attack, c.defense
+
+    def uncached():
+        return old_attack(c), old_defense(c)
+
+    assert cached() == uncached()
+    t_cached = timeit.timeit(cached, number=number) / number
+    t_uncached = timeit.timeit(uncached, number=number) / number
+    print(f"{label:<10}{t_uncached*1e6:>14.2f}{t_cached*1e6:>12.2f}"
+          f"{t_uncached/t_cached:>10.1f}x")
+
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print(f"{'gear':<10}{'uncached us':>14}{'cached us':>12}{'speedup':>11}")
+    bench(character.Character("naked", class_choice=character.Warrior()),
+          'none', number)
+    bench(character.Character("armored", class_choice=character.Warrior(),
+                              gear_block=make_gear()), 'full', number)
@@ -0,0 +1,46 @@
+"""
+Measure a fishing trip.
+
+Compares `FishingPool.go_fishing` plus collapsing the list with a Counter
+(what /fishing catch used to do) against `FishingPool.catch_counts`, for
+one trip and for many trips at once (auto-fishing).
+
+Run from the repository root:
+    python benchmarks/fishing_bench.py [trips]
+"""
+import os
+import sys
+import timeit
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import fish  # noqa: E402
+
+
+if __name__ == '__main__':
+    trips = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    pool = max(fish.fishing_pools, key=lambda p: len(p.avail_fish))
+    luck = 30
+    number = 2000
+
+    def one_old():
+        return Counter(pool.go_fishing(luck))
+
+    t_old = timeit.timeit(one_old, number=number) / number
+    t_new = timeit.timeit(lambda: pool.catch_counts(luck),
+                          number=number) / number
+    print(f"one trip   go_fishing {t_old*1e6:.1f} us, "
+          f"catch_counts {t_new*1e6:.1f} us")
+
+    def many_old():
+        c = Counter()
+        for _ in range(trips):
+            c.update(pool.go_fishing(luck))
+        return c
+
+    t_old = timeit.timeit(many_old, number=5) / 5
+    t_new = timeit.timeit(lambda: pool.catch_counts(luck, attempts=trips),
+                          number=5) / 5
+    print(f"{trips} trips go_fishing {t_old*1e3:.2f} ms, "
+          f"catch_counts {t_new*1e3:.2f} ms ({t_old/t_new:.0f}x)")
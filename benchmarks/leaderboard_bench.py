@@ -0,0 +1,58 @@
+"""
+Measure the leaderboard index.
+
+Compares re-sorting every manifest entry for each /leaderboard (the
+cheapest way to rank without an index) with reading the top N and a
+player's rank from `leaderboard.Leaderboard`, and times the update a save
+makes.
+
+Run from the repository root:
+    python benchmarks/leaderboard_bench.py [characters]
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import leaderboard  # noqa: E402
+
+
+def entry(n: int) -> dict:
+    level = random.randint(0, 80)
+    return {'name': f"char{n}", 'class': 'warrior', 'level': level,
+            'exp': level * 1000 + random.randint(0, 999),
+            'gold': random.randint(0, 10**6), 'fish': random.randint(0, 5000)}
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    manifests = [(str(n), [entry(n)]) for n in range(size)]
+    board = leaderboard.Leaderboard()
+    t = timeit.timeit(lambda: board.load(manifests), number=1)
+    print(f"build {size} characters {t:.2f} s")
+
+    flat = [(u, e) for u, es in manifests for e in es]
+    me = flat[size // 2]
+    number = 20
+
+    def by_sort():
+        ranked = sorted(flat, key=lambda x: leaderboard.sort_key('gold', *x))
+        return ranked[:10], ranked.index(me)
+
+    def by_index():
+        return (board.top('gold', 10),
+                board.rank('gold', me[0], me[1]['name']))
+
+    t_old = timeit.timeit(by_sort, number=number) / number
+    t_new = timeit.timeit(by_index, number=1000) / 1000
+    print(f"top 10 + rank  sort {t_old*1e3:.1f} ms, "
+          f"index {t_new*1e6:.1f} us ({t_old/t_new:.0f}x)")
+
+    def save():
+        u = str(random.randrange(size))
+        board.update(u, entry(int(u)))
+
+    t = timeit.timeit(save, number=10000) / 10000
+    print(f"update on save {t*1e6:.1f} us")
@@ -0,0 +1,314 @@
+import threading
+from collections import OrderedDict
+
+
+class CharacterCache:
+    """
+    Bounded LRU cache of :class:`character.Character` objects.
+
+    Characters are keyed by (user_id, character name). Saving a character
+    only marks its entry as dirty, the data is written out to disk when the
+    entry is evicted or when :func:`flush()` is called (eg on shutdown). The
+    cache also remembers each user's active character name so
+    `char_cmds.get_active()` does not need to open the active pointer file
+    on every command.
+
+    A dirty entry holds a snapshot of the character taken when it was put,
+    while the caller still holds the character's lock, and that snapshot is
+    what gets written back. Write backs run outside the cache's own lock so
+    other lookups never wait on disk I/O. A write back that fails leaves
+    the entry dirty to be retried by the next eviction or flush.
+
+    Attributes
+    ----------
+    max_size:   :type:`int`
+        The maximum number of characters held in memory.
+    hits:       :type:`int`
+        Number of lookups answered from memory.
+    misses:     :type:`int`
+        Number of lookups that had to go to disk.
+    evictions:  :type:`int`
+        Number of entries pushed out of the cache.
+    writes:     :type:`int`
+        Number of dirty characters written back to disk.
+    failures:   :type:`int`
+        Number of write backs that failed and were put back.
+
+    Methods
+    -------
+    get(user_id, name):
+        Return the cached character or None.
+    put(user_id, char, dirty):
+        Insert or refresh a character in the cache.
+    discard(user_id, name):
+        Drop a character from the cache without writing it.
+    flush():
+        Write every dirty character back to disk.
+    clear():
+        Drop every entry without writing it back.
+    """
+
+    def __init__(self, write_back, max_size: int = 512, snapshot=None):
+        """
+        Create a new cache.
+
+        Parameters
+        ----------
+        write_back: :type:`callable`
+            Called as write_back(user_id, snap) to persist a dirty
+            character's snapshot.
+        max_size:   :type:`int`
+            Maximum number of characters to keep in memory.
+        snapshot:   :type:`callable`
+            Called as snapshot(char) when a dirty character is put, eg to
+            encode it. Defaults to writing back the character object itself.
+        """
+        if max_size < 1:
+            raise ValueError("cache needs room for at least one character")
+        self.max_size = max_size
+        self._write_back = write_back
+        self._snapshot = snapshot if snapshot is not None else (lambda c: c)
+        # key -> [char, snapshot], the snapshot is None once written
+        self._entries = OrderedDict()
+        # entries being written back, key -> [char, snapshot]
+        self._writing = {}
+        self._active = OrderedDict()
+        self._lock = threading.RLock()
+        self._written = threading.Condition(self._lock)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.writes = 0
+        self.failures = 0
+
+    @staticmethod
+    def key(user_id, name: str) -> tuple:
+        """Normalize the cache key, user ids show up as both str and int."""
+        return (str(user_id), name)
+
+    def get(self, user_id, name: str):
+        """
+        Return the cached character for (user_id, name).
+
+        Returns None on a miss. A hit moves the entry to the front of the
+        LRU ordering. If the character is being written back this waits
+        for the write to finish, so a miss never reads older data from disk.
+        """
+        k = self.key(user_id, name)
+        with self._lock:
+            self._written.wait_for(lambda: k not in self._writing)
+            entry = self._entries.get(k)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(k)
+            self.hits += 1
+            return entry[0]
+
+    def peek(self, user_id, name: str = None):
+        """
+        Return the cached character for (user_id, name) or None.
+
+        name defaults to the user's cached active character. Does not touch
+        the LRU ordering or the hit/miss counters, for cheap lookups such
+        as autocomplete that should not keep characters alive.
+        """
+        uid = str(user_id)
+        with self._lock:
+            if name is None:
+                name = self._active.get(uid)
+            k = (uid, name)
+            entry = self._entries.get(k) or self._writing.get(k)
+            return None if entry is None else entry[0]
+
+    def put(self, user_id, char, dirty: bool = False):
+        """
+        Insert or refresh a character.
+
+        If the entry is already dirty it stays dirty until it has been
+        written back, even when refreshed with dirty=False. A dirty put
+        takes a new snapshot, so the caller must hold the character's lock.
+        Characters evicted to make room are written back after the cache
+        lock is released.
+
+        Parameters
+        ----------
+        user_id:    :type:`str`
+            The user's Discord ID (eg ctx.author.id)
+        char:       :class:`character.Character`
+            The character to cache.
+        dirty:      :type:`bool`
+            True if the character has changes that are not on disk yet.
+        """
+        k = self.key(user_id, char.name)
+        snap = self._snapshot(char) if dirty else None
+        evicted = []
+        with self._lock:
+            entry = self._entries.get(k)
+            if entry is not None:
+                entry[0] = char
+                if snap is not None:
+                    entry[1] = snap
+                self._entries.move_to_end(k)
+            else:
+                self._entries[k] = [char, snap]
+            # a character with a newer snapshot than the one being written
+            # can not be evicted until that write is done
+            busy = 0
+            while len(self._entries) - busy > self.max_size:
+                old_k = next(iter(self._entries))
+                old = self._entries[old_k]
+                if old[1] is not None and old_k in self._writing:
+                    self._entries.move_to_end(old_k)
+                    busy += 1
+                    continue
+                del self._entries[old_k]
+                self.evictions += 1
+                if old[1] is not None:
+                    self._writing[old_k] = old
+                    evicted.append((old_k, old))
+        for old_k, old in evicted:
+            try:
+                self._write(old_k, old)
+            except Exception:
+                # not this caller's problem, the entry was put back and is
+                # retried by the next eviction or flush
+                pass
+
+    def _write(self, k: tuple, entry: list):
+        """
+        Write back an entry already moved to `_writing`.
+
+        On failure the entry is put back (dirty) unless it has been put
+        again in the meantime, and the error is raised.
+        """
+        ok = False
+        try:
+            self._write_back(k[0], entry[1])
+            ok = True
+        finally:
+            with self._lock:
+                del self._writing[k]
+                if ok:
+                    self.writes += 1
+                else:
+                    self.failures += 1
+                    if k not in self._entries:
+                        self._entries[k] = entry
+                    elif self._entries[k][1] is None:
+                        self._entries[k][1] = entry[1]
+                self._written.notify_all()
+
+    def mark_clean(self, user_id, name: str):
+        """
+        Drop an entry's snapshot, eg before a group commit saves it.
+
+        Waits for a write back of the character already under way, so an
+        older snapshot can not land after the caller's own write.
+        """
+        k = self.key(user_id, name)
+        with self._lock:
+            self._written.wait_for(lambda: k not in self._writing)
+            entry = self._entries.get(k)
+            if entry is not None:
+                entry[1] = None
+
+    def user_chars(self, user_id) -> list:
+        """
+        Return every cached character belonging to user_id.
+
+        Does not touch the LRU ordering or the hit/miss counters.
+        """
+        uid = str(user_id)
+        with self._lock:
+            chars = {k: e[0] for k, e in self._writing.items() if k[0] == uid}
+            chars.update((k, e[0]) for k, e in self._entries.items()
+                         if k[0] == uid)
+            return list(chars.values())
+
+    def discard(self, user_id, name: str):
+        """
+        Drop a character from the cache without writing it back.
+
+        Waits for a write back of the character already under way, so it
+        can not land after the character has been deleted.
+        """
+        k = self.key(user_id, name)
+        with self._lock:
+            self._written.wait_for(lambda: k not in self._writing)
+            self._entries.pop(k, None)
+            if self._active.get(k[0]) == name:
+                del self._active[k[0]]
+
+    def get_active(self, user_id):
+        """Return the cached active character name for user_id or None."""
+        with self._lock:
+            name = self._active.get(str(user_id))
+            if name is not None:
+                self._active.move_to_end(str(user_id))
+            return name
+
+    def set_active(self, user_id, name: str):
+        """Remember the active character name for user_id."""
+        with self._lock:
+            self._active[str(user_id)] = name
+            self._active.move_to_end(str(user_id))
+            while len(self._active) > self.max_size:
+                self._active.popitem(last=False)
+
+    def flush(self) -> int:
+        """
+        Write every dirty character back to disk.
+
+        The entries stay cached. Every dirty entry is tried, an entry whose
+        write fails stays dirty and the first error is raised once the
+        others have been written.
+
+        Returns
+        -------
+        :type:`int`:
+            The number of characters written.
+        """
+        dirty = []
+        with self._lock:
+            self._written.wait_for(lambda: not self._writing)
+            for k, entry in self._entries.items():
+                if entry[1] is not None:
+                    self._writing[k] = [entry[0], entry[1]]
+                    dirty.append((k, self._writing[k]))
+                    entry[1] = None
+        written = 0
+        err = None
+        for k, entry in dirty:
+            try:
+                self._write(k, entry)
+                written += 1
+            except Exception as e:
+                err = err or e
+        if err is not None:
+            raise err
+        return written
+
+    def clear(self):
+        """Drop every entry without writing anything back."""
+        with self._lock:
+            self._entries.clear()
+            self._active.clear()
+
+    def stats(self) -> dict:
+        """Return the cache counters as a dict."""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'dirty': sum(1 for e in self._entries.values()
+                             if e[1] is not None),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'writes': self.writes,
+                'failures': self.failures,
+            }
+
+    def __len__(self):
+        return len(self._entries)
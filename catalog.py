@@ -0,0 +1,127 @@
+import threading
+
+
+class Catalog:
+    """
+    Registry of every item definition, each with an integer ID.
+
+    Items are flyweights: the catalog hands out one shared object per
+    definition (see :func:`intern()`), so ten thousand Salmon in an
+    inventory are ten thousand references to the same `fish.Fish`. Items
+    compare the way their class defines (eg `fish.Fish` by name and value).
+
+    IDs below `DYNAMIC` are stable. They are given explicitly when a
+    definition is registered (fish species, equipment templates), never
+    change between runs and are what saved characters refer to. Items that
+    are only ever interned get an ID from `DYNAMIC` up for the life of the
+    process and are saved by value instead.
+
+    Attributes
+    ----------
+    DYNAMIC:    :type:`int`
+        First ID handed out to definitions that were not registered.
+
+    Methods
+    -------
+    register(obj, item_id):
+        Add a definition under a stable ID, returns the shared object.
+    intern(obj):
+        Return the shared object for obj's definition, adding it if needed.
+    get(item_id):
+        Return the shared object with that ID.
+    id_of(obj):
+        Return the ID of obj's definition (None if unknown).
+    stable_id(obj):
+        Return the ID of obj's definition if it is stable, otherwise None.
+    """
+
+    DYNAMIC = 1 << 24
+
+    def __init__(self):
+        self._items = {}
+        self._ids = {}
+        self._next = self.DYNAMIC
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(obj) -> tuple:
+        return (type(obj), obj)
+
+    def register(self, obj, item_id: int):
+        """
+        Register a definition under a stable ID.
+
+        Registering the same definition under the same ID again is a
+        no-op.
+
+        Raises
+        ------
+        ValueError:
+            If the ID is out of range or already used by something else, or
+            the definition already has a different ID.
+        """
+        if not 0 < item_id < self.DYNAMIC:
+            raise ValueError(f"stable item ids must be in (0, {self.DYNAMIC})")
+        k = self.key(obj)
+        with self._lock:
+            known = self._ids.get(k)
+            if known == item_id:
+                return self._items[item_id]
+            if known is not None:
+                raise ValueError(f"{obj.name} is already item {known}")
+            if item_id in self._items:
+                raise ValueError(f"item id {item_id} is already "
+                                 f"{self._items[item_id].name}")
+            self._items[item_id] = obj
+            self._ids[k] = item_id
+            return obj
+
+    def intern(self, obj):
+        """Return the shared object for obj's definition."""
+        k = self.key(obj)
+        item_id = self._ids.get(k)
+        if item_id is not None:
+            return self._items[item_id]
+        with self._lock:
+            item_id = self._ids.get(k)
+            if item_id is None:
+                item_id = self._next
+                self._next += 1
+                self._items[item_id] = obj
+                self._ids[k] = item_id
+            return self._items[item_id]
+
+    def get(self, item_id: int):
+        """
+        Return the definition with that ID.
+
+        Raises
+        ------
+        KeyError:
+            If no definition has that ID.
+        """
+        return self._items[item_id]
+
+    def id_of(self, obj) -> int:
+        return self._ids.get(self.key(obj))
+
+    def stable_id(self, obj) -> int:
+        item_id = self._ids.get(self.key(obj))
+        if item_id is not None and item_id < self.DYNAMIC:
+            return item_id
+        return None
+
+    def __contains__(self, obj) -> bool:
+        return self.key(obj) in self._ids
+
+    def __len__(self):
+        return len(self._items)
+
+
+items = Catalog()
+"""The process wide catalog."""
+
+
+def lookup(item_id: int):
+    """Return the item with a stable ID. Used to unpickle items by ID."""
+    return items.get(item_id)
@@ -1,9 +1,17 @@
-import os
-import pickle
+import asyncio
+import contextlib
+import functools
+from concurrent.futures import ThreadPoolExecutor
 
+import cache
 import character
 import config
 import discord
+import fish
+import journal
+import leaderboard
+import locks
+import storage
 from discord import SlashCommandGroup
 from discord.ext import commands
 from tabulate import tabulate
@@ -66,6 +74,17 @@ class characterCommands(commands.Cog):
         """
         return ['warrior', 'rogue', 'wizard', 'villager', 'paladin', 'trader']
 
+    async def get_char_names(ctx: discord.AutocompleteContext):
+        """
+        Return the names of the user's characters.
+
+        Only reads the user's manifest (see :func:`get_manifest()`).
+        """
+        try:
+            return [e['name'] for e in await store.manifest(ctx.interaction.user.id)]
+        except FileNotFoundError:
+            return []
+
     @character_command_group.command(
             description="Create a new character.",
             help="Create a new character.",
@@ -106,7 +125,8 @@ class characterCommands(commands.Cog):
             character class.
         """
         try:
-            new_char = create_char(user_id=ctx.author.id, name=name, c_name=c_name, )
+            async with char_locks.hold(ctx.author.id, name):
+                new_char = await store.create(user_id=ctx.author.id, name=name, c_name=c_name)
             await ctx.respond(f"Character created for {ctx.author.mention}!\n```{new_char}```\n")
         except FileNotFoundError:
             await ctx.respond("Failed to create a character. Please try again.")
@@ -125,8 +145,9 @@ class characterCommands(commands.Cog):
         List a user's characters.
 
         Attempt to produce a listing of all character's for a given user.
-        By default assumes you want the user that sent the message's
-        characters. A user id may be supplied to list characters for
+        Only the user's character manifest is read, see
+        :func:`get_manifest()`. By default assumes you want the user that
+        sent the message's characters. A user id may be supplied to list characters for
         another user.
 
         Parameters
@@ -137,15 +158,14 @@ class characterCommands(commands.Cog):
             A `discord.Option` that accepts a :type:`str` as the
             user_id to lookup.
         """
-        try:
-            char_list = get_chars(ctx.author.id)
-        except FileNotFoundError:
+        char_list = await store.manifest(ctx.author.id)
+        if len(char_list) == 0:
             await ctx.respond("You have no characters!")
             return
         data = []
-        headers = ["Name", "Class", "Level"]
+        headers = ["Name", "Class", "Level", "Gold"]
         for c in char_list:
-            data.append([c.name, c._bt_class.name, str(c.level)])
+            data.append([c['name'], c['class'], str(c['level']), str(c['gold'])])
         out_str = tabulate(data, headers, showindex="always",
                            tablefmt="grid", numalign="right",
                            stralign="left")
@@ -160,7 +180,8 @@ class characterCommands(commands.Cog):
     async def delete(self,
                      ctx: discord.ApplicationContext,
                      name: discord.Option(str, description='Which character do you want to delete?',
-                                          required=True)):
+                                          required=True,
+                                          autocomplete=discord.utils.basic_autocomplete(get_char_names))):
         """
         Delete a character.
 
@@ -179,7 +200,8 @@ class characterCommands(commands.Cog):
         c_name: :class:`discord.Option`
         """
         try:
-            deleted_char = del_char(ctx.author.id, name)
+            async with char_locks.hold(ctx.author.id, name):
+                deleted_char = await store.delete(ctx.author.id, name)
             await ctx.respond(f"Deleted character for {ctx.author.mention}"
                               f" named {deleted_char.name}\n"
                               f"{deleted_char}")
@@ -206,11 +228,12 @@ class characterCommands(commands.Cog):
             The discord context object for the command
         """
         try:
-            active_char = get_active(ctx.author.id)
-            await ctx.respond("```"
-                              "Your active character\n"
-                              "---------------------\n"
-                              f"{active_char}```")
+            async with store.active(ctx.author.id) as active_char:
+                out_str = "```"\
+                          "Your active character\n"\
+                          "---------------------\n"\
+                          f"{active_char}```"
+            await ctx.respond(out_str)
         except FileNotFoundError:
             await ctx.respond("```You don't have any characters!"
                               " Use /character create first```")
@@ -226,7 +249,8 @@ class characterCommands(commands.Cog):
     async def set(self, ctx: discord.ApplicationContext,
                   char: discord.Option(str,
                                        description="Enter the name of the character you wish to swap to.",
-                                       required=True)):
+                                       required=True,
+                                       autocomplete=discord.utils.basic_autocomplete(get_char_names))):
         """
         Set the user's active character.
 
@@ -246,10 +270,10 @@ class characterCommands(commands.Cog):
             directory.
         """
         try:
-            active_char = get_active(ctx.author.id)
-            loaded_char = load_char(ctx.author.id, char)
-            set_active(ctx.author.id, loaded_char)
-            new_active = get_active(ctx.author.id)
+            active_char = await store.get_active(ctx.author.id)
+            loaded_char = await store.load(ctx.author.id, char)
+            await store.set_active(ctx.author.id, loaded_char)
+            new_active = await store.get_active(ctx.author.id)
             await ctx.respond(f"Changing active character for {ctx.author.mention}\n"
                               f"```Old\n----\n{active_char}\n\nNew\n----\n{new_active}```")
         except FileNotFoundError as e:
@@ -259,14 +283,14 @@ class characterCommands(commands.Cog):
 
 def create_char(user_id: str, name: str, c_name: str) -> character.Character:
     """
-    Create a new character in the file structure.
+    Create a new character in the storage backend.
 
-    Attempts to create a new character in the data directory specified within
-    the config.py file. By default this is ./rpg-data/character/. Files are
-    written out using the pickle library. The function returns a
-    `character.Character` object upon successful return. If a character was
-    created the new object is returned. If a character with the same name is
-    found that character is instead loaded and its data returned.
+    Attempts to create a new character in the storage backend selected by
+    config.data['storage'] (see `storage.get_backend()`). The function
+    returns a `character.Character` object upon successful return. If a
+    character was created the new object is returned. If a character with
+    the same name is found that character is instead loaded and its data
+    returned.
 
     If the user has no characters the application will assign the new character
     as their active character via `set_active()`.
@@ -283,35 +307,27 @@ def create_char(user_id: str, name: str, c_name: str) -> character.Character:
 
     Raises
     ------
-    FileExistsError:
-        If the character file already exists.
     FileNotFoundError:
-        If the character file could not be saved, or
+        If the character could not be saved, or
         if it could be made active.
     """
-    dir_path, char_file = get_paths(user_id, name)
-    f = None
-    try:
-        if not os.path.isdir(dir_path):
-            os.makedirs(dir_path)
-    except FileExistsError:
-        raise FileExistsError("tried to create active and failed")
-    char_count = len(get_chars(user_id))
+    char_count = backend.count_chars(user_id)
     if char_count >= config.data['max_characters']:
         raise ValueError("Too many characters!")
     try:
-        if os.path.isfile(char_file):
-            with open(char_file, 'rb') as f:
-                loaded_char = pickle.load(f)
-                f.close()
-                return loaded_char
-        else:
-            class_choice = get_class(c_name)
-            ret = character.Character(name=name, class_choice=class_choice)
-            save_char(user_id, ret)
-            if char_count == 0:
-                set_active(user_id, ret)
-            return ret
+        cached = char_cache.get(user_id, name)
+        if cached is not None:
+            return cached
+        if backend.has_char(user_id, name):
+            return load_char(user_id, name)
+        class_choice = get_class(c_name)
+        ret = character.Character(name=name, class_choice=class_choice)
+        # new characters are written through so they show up in listings
+        write_char(user_id, ret)
+        char_cache.put(user_id, ret)
+        if char_count == 0:
+            set_active(user_id, ret)
+        return ret
     except FileNotFoundError as e:
         raise FileNotFoundError(f"file problem on character creation {e}")
     except Exception:
@@ -322,43 +338,87 @@ def get_chars(user_id: str):
     """
     Get a listing of a user's characters.
 
-    Get a listing of all of a user's characters in the file structure.
-    Returns an empty list if the user has no characters. Data directories
-    are specified in `config.data`
+    Get a listing of all of a user's characters from the storage backend.
+    Characters held in `char_cache` are returned from memory instead of
+    being decoded, so unsaved changes are reflected in the listing.
 
     Parameters
     ----------
-    name    :type:`str`
-        The name for the new character
+    user_id: :type:`str`
+        The user's Discord ID (eg ctx.author.id)
 
     Raises
     ------
     FileNotFoundError:
-        If the directory for the user id could not be found.
+        If the user has no characters.
     """
-    dir_path, _ = get_paths(user_id, None)
-    chars = []
-    file = None
-    try:
-        files = os.listdir(dir_path)
-        for file_name in files:
-            file_path = os.path.join(dir_path, file_name)
-            if os.path.isfile(file_path) and file_name.endswith(config.data['file_ext']):
-                with open(file_path, 'rb') as file:
-                    loaded_data = pickle.load(file)
-                    chars.append(loaded_data)
-                    file.close()
-        return chars
-    except FileNotFoundError:
-        raise FileNotFoundError("problem checking char list")
+    cached = char_cache.user_chars(user_id)
+    chars = backend.load_chars(user_id, skip=[c.name for c in cached])
+    return cached + chars
+
+
+def get_manifest(user_id: str) -> list:
+    """
+    Get the manifest entries for a user's characters.
+
+    Cheap alternative to :func:`get_chars()` for listing characters. Each
+    entry is a dict with the name, class, level, exp, gold and updated_at
+    of a character (see :func:`storage.manifest_entry()`). Characters held
+    in `char_cache` are summarized from memory so unsaved changes show up.
+
+    Parameters
+    ----------
+    user_id: :type:`str`
+        The user's Discord ID (eg ctx.author.id)
+    """
+    entries = {e['name']: e for e in backend.load_manifest(user_id)}
+    for c in char_cache.user_chars(user_id):
+        entries[c.name] = storage.manifest_entry(c)
+    return sorted(entries.values(), key=lambda e: e['name'])
 
 
 def save_char(user_id: str, char: character.Character):
     """
     Save a character.
 
-    Attempts to save a character object to the file structure. Data
-    directories are specified in `config.data`
+    Marks the character as dirty in `char_cache`, which keeps a
+    :func:`snapshot_char()` of it. The snapshot is written out to the
+    storage backend by :func:`write_snapshot()` when the character is
+    evicted from the cache or when :func:`flush_cache()` is called. The
+    caller must hold the character's lock in `char_locks`.
+
+    If group commit is enabled (config.data['group_commit_ms'] > 0) the save
+    is handed to `committer` instead and this blocks until the batch it
+    joined is durable. The character is only left dirty in the cache if the
+    commit fails. Must not be called on the event loop, use `store.save()`.
+
+    Parameters
+    ----------
+    user_id: :type:`str`
+        The user's Discord ID (eg ctx.author.id)
+
+    char    :class:`character.Character`
+        The character data being saved.
+    """
+    rank_char(user_id, char)
+    if committer is None:
+        char_cache.put(user_id, char, dirty=True)
+        return
+    char_cache.put(user_id, char)
+    char_cache.mark_clean(user_id, char.name)
+    try:
+        committer.save(user_id, char)
+    except Exception:
+        char_cache.put(user_id, char, dirty=True)
+        raise
+
+
+def write_char(user_id: str, char: character.Character):
+    """
+    Write a character to the storage backend.
+
+    Only the changes since the character was last written are appended to
+    its journal when possible, see :func:`storage.Storage.write()`.
 
     Parameters
     ----------
@@ -371,30 +431,86 @@ def save_char(user_id: str, char: character.Character):
     Raises
     ------
     FileNotFoundError:
-        If the character file could not be written.
-    """
-    _, char_file = get_paths(user_id, char.name)
-    f = None
-    try:  # this can probably be one block
-        if not os.path.isfile(char_file):
-            with open(char_file, 'w+b') as f:
-                pickle.dump(char, f)
-                f.close()
-        else:
-            with open(char_file, 'wb') as f:
-                pickle.dump(char, f)
-                f.close()
-    except FileNotFoundError:
-        raise FileNotFoundError("file problem on character save")
+        If the character could not be written.
+    """
+    backend.write(user_id, char)
+    rank_char(user_id, char)
+
+
+def snapshot_char(char: character.Character) -> bytes:
+    """
+    Encode a character for `char_cache` to write back later.
+
+    The snapshot is written as a full character, so the next write of the
+    live character has to be a full snapshot as well (see
+    :func:`journal.invalidate()`), its journal no longer matches.
+
+    Parameters
+    ----------
+    char    :class:`character.Character`
+        The character being saved.
+    """
+    journal.invalidate(char)
+    return backend.dumps(char)
+
+
+def write_snapshot(user_id: str, data: bytes):
+    """
+    Write a character snapshot taken by :func:`snapshot_char()`.
+
+    Called by `char_cache` on eviction and flush. Works on a copy decoded
+    from the snapshot, never on the live character.
+
+    Parameters
+    ----------
+    user_id: :type:`str`
+        The user's Discord ID (eg ctx.author.id)
+
+    data    :type:`bytes`
+        The snapshot.
+
+    Raises
+    ------
+    FileNotFoundError:
+        If the character could not be written.
+    """
+    backend.save_char(user_id, backend.loads(data))
+
+
+def rank_char(user_id: str, char: character.Character):
+    """
+    Move a character to its current place on the leaderboards in `board`.
+
+    Called on every save and write back, costs O(log n) per board.
+
+    Parameters
+    ----------
+    user_id: :type:`str`
+        The user's Discord ID (eg ctx.author.id)
+
+    char    :class:`character.Character`
+        The character that changed.
+    """
+    board.update(user_id, storage.manifest_entry(char))
+
+
+def load_board():
+    """
+    Build `board` from the manifests of every character in storage.
+
+    The manifests are read in parallel on config.data['io_workers']
+    threads (see :func:`storage.Storage.scan_manifests()`). Characters
+    held in `char_cache` are ranked from memory as they are saved.
+    """
+    board.load(backend.scan_manifests(config.data['io_workers']))
 
 
 def del_char(user_id: str, char: str) -> character.Character:
     """
     Delete a character.
 
-    Attempt to delete a character from the file structure. Data
-    directories are specified in `config.data` If a character is
-    removed its data is returned.
+    Attempt to delete a character from the storage backend. If a character
+    is removed its data is returned.
 
     Parameters
     ----------
@@ -407,28 +523,29 @@ def del_char(user_id: str, char: str) -> character.Character:
     Raises
     ------
     FileNotFoundError:
-        If the character file does not exist at the expected location.
+        If the character does not exist.
     """
     if isinstance(char, character.Character):
         name = char.name
     else:
         name = char
-    _, char_file = get_paths(user_id, name)
     try:
         loaded = load_char(user_id, name)
-        os.remove(char_file)
+        char_cache.discard(user_id, name)
+        backend.del_char(user_id, name)
+        board.remove(user_id, name)
         return loaded
     except FileNotFoundError as e:
-        raise FileNotFoundError(f"could not remove character file {char_file} ({e})")
+        raise FileNotFoundError(f"could not remove character {name} ({e})")
 
 
 def load_char(user_id: str, name: str) -> character.Character:
     """
     Load a character.
 
-    Attempt to load a character from the file structure. Data
-    directories are specified in `config.data` A :class:`character.Character` object
-    is returned upon success.
+    Attempt to load a character from `char_cache`, falling back to the
+    storage backend on a miss. A :class:`character.Character` object is
+    returned upon success.
 
     Parameters
     ----------
@@ -441,26 +558,22 @@ def load_char(user_id: str, name: str) -> character.Character:
     Raises
     ------
     FileNotFoundError:
-        If the character file being loaded could not be found.
+        If the character being loaded could not be found.
     """
-    _, char_file = get_paths(user_id, name)
-    try:
-        with open(char_file, 'rb') as f:
-            loaded_char = pickle.load(f)
-            f.close()
-        return loaded_char
-    except FileNotFoundError:
-        raise FileNotFoundError("Character not found!")
+    cached = char_cache.get(user_id, name)
+    if cached is not None:
+        return cached
+    loaded_char = backend.load_char(user_id, name)
+    char_cache.put(user_id, loaded_char)
+    return loaded_char
 
 
 def set_active(user_id: str, c: character.Character, choice: int = -1):
     """
     Set a character as the active character.
 
-    Assigned a previously created character as the active character. This is
-    achieved by writing the character data out to a file in the file structure.
-    By default this will be ./rpg-data/active/. This is a full representation of
-    the character data produced by `pickle.dump()`.
+    Assigned a previously created character as the active character. The
+    previously active character (or None) is returned.
 
     Parameters
     ----------
@@ -472,23 +585,12 @@ def set_active(user_id: str, c: character.Character, choice: int = -1):
 
     choice      Unused
     """
-    active_c = None
-    f = None
-    active_file = f"./{config.data['data_dir']}/" \
-                  f"{config.data['active_dir']}/" \
-                  f"{user_id}.{config.data['file_ext']}"
-    output_data = ((0, c.name, user_id))
-
     try:
         active_c = get_active(user_id)
     except FileNotFoundError:
         active_c = None
-    try:
-        with open(active_file, 'w+b') as f:
-            pickle.dump(output_data, f)
-            f.close()
-    except FileExistsError:
-        raise FileExistsError("could not set active character")
+    backend.set_active(user_id, c.name)
+    char_cache.set_active(user_id, c.name)
     return active_c
 
 
@@ -496,10 +598,45 @@ def get_active(user_id: str) -> character.Character:
     """
     Returns the user's active character.
 
-    Checks the file structure for the user's active character. The
+    Checks the storage backend for the user's active character. The
     application supports multiple characters per user. This serves
     as a method for uniquely identifying which character a user
-    intends to interact with.
+    intends to interact with. The active character name is remembered
+    in `char_cache` so repeat lookups skip the backend entirely.
+
+    Parameters
+    ----------
+    user_id: :type:`str`
+        The user's Discord ID (eg ctx.author.id)
+
+    Raises
+    ------
+    FileNotFoundError:
+        If there is nol active character, or it could not be loaded.
+    """
+    active_name = char_cache.get_active(user_id)
+    if active_name is not None:
+        return load_char(user_id, active_name)
+    try:
+        c = backend.load_active(user_id)
+    except FileNotFoundError:
+        raise FileNotFoundError("could not get active character")
+    # keep the cached copy if there is one, it may hold unsaved changes
+    cached = char_cache.get(user_id, c.name)
+    if cached is not None:
+        c = cached
+    else:
+        char_cache.put(user_id, c)
+    char_cache.set_active(user_id, c.name)
+    return c
+
+
+def get_active_name(user_id: str) -> str:
+    """
+    Returns the name of the user's active character.
+
+    Cheaper than :func:`get_active()` when the character itself is not
+    needed yet, eg to pick which lock in `char_locks` to take.
 
     Parameters
     ----------
@@ -509,21 +646,35 @@ def get_active(user_id: str) -> character.Character:
     Raises
     ------
     FileNotFoundError:
-        If there is nol active character, or the file could not be
-        openned.
+        If there is no active character.
     """
-    path = f"./{config.data['data_dir']}/{config.data['active_dir']}"
-    active_path = f"{path}/{user_id}.{config.data['file_ext']}"
+    active_name = char_cache.get_active(user_id)
+    if active_name is not None:
+        return active_name
     try:
-        if os.path.isfile(active_path):
-            with open(active_path, 'rb') as f:
-                active_char = pickle.load(f)
-                c = load_char(user_id, active_char[1])
-                return c
-        else:
-            raise FileNotFoundError("no active character!")
+        active_name = backend.get_active(user_id)
     except FileNotFoundError:
         raise FileNotFoundError("could not get active character")
+    char_cache.set_active(user_id, active_name)
+    return active_name
+
+
+def flush_cache() -> int:
+    """
+    Write every dirty character in `char_cache` out to the storage backend.
+
+    Should be called before the bot shuts down, otherwise any changes
+    not yet written back are lost. Also waits for any pending group
+    commit to finish.
+
+    Returns
+    -------
+    :type:`int`:
+        The number of characters written.
+    """
+    if committer is not None:
+        committer.flush()
+    return char_cache.flush()
 
 
 def get_char_count(user_id: int = 0):
@@ -535,7 +686,7 @@ def get_char_count(user_id: int = 0):
     user_id: :type:`str`
         The user's Discord ID (eg ctx.author.id)
     """
-    return len(get_chars(user_id))
+    return backend.count_chars(user_id)
 
 
 def get_class(name: str) -> character.bt_Class:
@@ -570,17 +721,9 @@ def get_paths(user_id: str, name: str):
     """
     Build the paths for the application's data directories.
 
-    Looks at information from config.data to determine the expected
-    file structure for the application. This function makes NO changes
-    to disk. It is a helper for other functions to simplify getting
-    the path for characters, etc.
-
-    Info
-    ----
-    data_dir    The root of the file structure for the application data.
-    char_dir    The directory to save character data in. ./data_dir/char_dir/
-    file_ext    The file extension to append to all files created by the
-                    application.
+    Kept for callers that still want the file tree layout, see
+    :func:`storage.PickleStorage.paths()`. This function makes NO changes
+    to disk.
 
     Parameters
     ----------
@@ -590,6 +733,128 @@ def get_paths(user_id: str, name: str):
     name    :type:`str`
         The name of the character.
     """
-    dir_path = f"./{config.data['data_dir']}/{config.data['char_dir']}/{user_id}"
-    char_file = f"{dir_path}/{name}.{config.data['file_ext']}"
-    return (dir_path, char_file)
+    return storage.PickleStorage().paths(user_id, name)
+
+
+class AsyncStore:
+    """
+    Async front end for the character storage functions in this module.
+
+    Every call is run on a dedicated, bounded :class:`ThreadPoolExecutor` so
+    blocking disk/database I/O never stalls the event loop. Commands should
+    use the module level `store` instance, eg
+        me = await store.get_active(ctx.author.id)
+        ...
+        await store.save(ctx.author.id, me)
+
+    Attributes
+    ----------
+    workers:    :type:`int`
+        The maximum number of threads doing storage I/O.
+
+    Methods
+    -------
+    run(func, *args, **kwargs):
+        Run any blocking callable on the storage pool.
+    active(user_id):
+        Async context manager that locks and loads the active character.
+    load(user_id, name), save(user_id, char), get_active(user_id),
+    set_active(user_id, char), create(user_id, name, c_name),
+    delete(user_id, name), get_chars(user_id), manifest(user_id),
+    count(user_id), flush():
+        Async versions of the module level functions of the same purpose.
+    """
+
+    def __init__(self, workers: int = 4):
+        if workers < 1:
+            raise ValueError("the storage pool needs at least one worker")
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers,
+                                        thread_name_prefix="storage")
+
+    async def run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._pool, functools.partial(func, *args, **kwargs))
+
+    async def load(self, user_id: str, name: str) -> character.Character:
+        return await self.run(load_char, user_id, name)
+
+    async def save(self, user_id: str, char: character.Character):
+        if committer is None:
+            return await self.run(save_char, user_id, char)
+        # wait on the commit without tying up a pool thread, otherwise a
+        # batch could never grow past the number of workers
+        await self.run(char_cache.put, user_id, char)
+        await self.run(char_cache.mark_clean, user_id, char.name)
+        await self.run(rank_char, user_id, char)
+        try:
+            await asyncio.wrap_future(committer.submit(user_id, char))
+        except Exception:
+            await self.run(char_cache.put, user_id, char, True)
+            raise
+
+    async def get_active(self, user_id: str) -> character.Character:
+        return await self.run(get_active, user_id)
+
+    async def active_name(self, user_id: str) -> str:
+        return await self.run(get_active_name, user_id)
+
+    @contextlib.asynccontextmanager
+    async def active(self, user_id: str):
+        """
+        Lock and load the user's active character.
+
+        The character's lock in `char_locks` is held until the block exits,
+        save inside the block to keep the read-modify-write atomic. Ex:
+            async with store.active(ctx.author.id) as me:
+                me.inventory.change_gold(10)
+                await store.save(ctx.author.id, me)
+
+        Any idle fishing catch is handed out first (see `fish.settle()`),
+        the cached character is then dirty so it is written back even if
+        the block does not save.
+        """
+        name = await self.active_name(user_id)
+        async with char_locks.hold(user_id, name):
+            me = await self.load(user_id, name)
+            if fish.settle(me) is not None:
+                await self.run(char_cache.put, user_id, me, True)
+            yield me
+
+    async def set_active(self, user_id: str, char: character.Character):
+        return await self.run(set_active, user_id, char)
+
+    async def create(self, user_id: str, name: str,
+                     c_name: str) -> character.Character:
+        return await self.run(create_char, user_id, name, c_name)
+
+    async def delete(self, user_id: str, name: str) -> character.Character:
+        return await self.run(del_char, user_id, name)
+
+    async def get_chars(self, user_id: str) -> list:
+        return await self.run(get_chars, user_id)
+
+    async def manifest(self, user_id: str) -> list:
+        return await self.run(get_manifest, user_id)
+
+    async def count(self, user_id: str) -> int:
+        return await self.run(get_char_count, user_id)
+
+    async def flush(self) -> int:
+        return await self.run(flush_cache)
+
+    def shutdown(self):
+        """Wait for queued I/O to finish and stop the pool."""
+        self._pool.shutdown(wait=True)
+
+
+backend = storage.get_backend()
+committer = None
+if config.data['group_commit_ms'] > 0:
+    committer = storage.GroupCommitter(backend, config.data['group_commit_ms'])
+char_cache = cache.CharacterCache(write_snapshot, config.data['cache_size'],
+                                  snapshot_char)
+store = AsyncStore(config.data['io_workers'])
+char_locks = locks.LockManager()
+board = leaderboard.Leaderboard()
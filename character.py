@@ -1,174 +1,42 @@
+import catalog
 import item
 import math
-from collections import Counter
-
-
-class Stats:
-    """
-    Wrapper for character stats.
-
-    Attributes
-    ----------
-    strength:       :type:`int`
-        Character's strength
-    agility:        :type:`int`
-        Character's agility
-    intellect:      :type:`int`
-        Character's intellect
-    charisma:      :type:`int`
-        Character's charisma
-    constitution:   :type:`int`
-        Character's constitution
-    luck:           :type:`int`
-        Character's luck
-
-    Methods
-    -------
-    None
-    """
-
-    def __init__(self, strength=0, agility=0, intellect=0,
-                 charisma=0, con=0, luck=0) -> None:
-        """
-        Create a new stat block for a `character.Character`
-
-        Parameters
-        ----------
-        strength:       int
-            Starting strength value.
-        agility:        int
-            Starting agility value.
-        intellect:      int
-            Starting intellect value.
-        charisma:       int
-            Starting charisma value.
-        constitution:   int
-            Starting constitution value.
-        luck:           int
-            Starting luck value.
-        """
-        self._strength = strength
-        self._agility = agility
-        self._intellect = intellect
-        self._charisma = charisma
-        self._constitution = con
-        self._luck = luck
-        self._index = 0
-        return
-
-    #  Strength Code
-    @property
-    def strength(self) -> int:
-        return self._strength
-
-    @strength.setter
-    def strength(self, val: int) -> None:
-        self._strength = val
-
-    #  Agility Code
-    @property
-    def agility(self) -> int:
-        return self._agility
-
-    @agility.setter
-    def agility(self, val: int) -> None:
-        self._agility = val
-    #  Intellect Code
-
-    @property
-    def intellect(self) -> int:
-        return self._intellect
-
-    @intellect.setter
-    def intellect(self, val: int) -> None:
-        self._intellect = val
-
-    # Charisma Code
-    @property
-    def charisma(self) -> int:
-        return self._charisma
-
-    @charisma.setter
-    def charisma(self, val: int) -> None:
-        self._charisma = val
-
-    #  Constitution Code
-    @property
-    def constitution(self) -> int:
-        return self._constitution
-
-    @constitution.setter
-    def constitution(self, val: int) -> None:
-        self._constitution = val
-
-    #  Luck Code
-    @property
-    def luck(self) -> int:
-        return self._luck
-
-    @luck.setter
-    def luck(self, val: int) -> None:
-        self._luck = val
-
-    def __str__(self):
-        """
-        Generate a dict of stat_name: stat_value and return it as a string.
-        """
-        rstats = {}
-        for k, v in vars(self).items():
-            if "index" in k:
-                continue
-            rstats[k[1:len(k)]] = v
-        return str(rstats)
-
-    def __iter__(self):
-        return self
-
-    def __next__(self):
-        """
-        Iterate over the stats of this object.
-
-        Iterates over vars(self). Using the data provided by :func:`vars()`
-        the iterator tries to lookup the key name (stat name), and
-        then pulls the corresponding value from vars(). Meant to be
-        scalable for new stats in the future.
-        May have unexpected results if :func:`vars()` does not provide a
-        consistent ordering of the objects.
-        """
-        if self._index < len(vars(self).keys()):
-            key = list(vars(self).keys())[self._index]
-            if "index" in key:
-                self._index += 1
-                return next(self)
-            value = vars(self)[key]
-            self._index += 1
-            return key[1:len(key)], value
-        else:
-            self._index = 0
-            raise StopIteration
-
-    def __eq__(self, other):
-        """
-        Compare two :class:`Stats` objects for equality.
-
-        Parameters
-        ----------
-        other:  :class:`Stats`
-            The :class:`Stats` object to compare this on against.
-
-        Returns
-        -------
-        True if both objects have the same attributes.
-        False otherwise or an object that is not a `Stats` is passed.
-        """
-        if isinstance(other, Stats):
-            return self.strength == other.strength and \
-                self.agility == other.agility and \
-                self.intellect == other.intellect and \
-                self.charisma == other.charisma and \
-                self.constitution == other.constitution and \
-                self.luck == other.luck
-        return False
+from bisect import bisect_left
+from collections import Counter, namedtuple
+from collections.abc import Mapping
+from stats import Stats
+
+ATTACK_BASE = 10
+ATTACK_SCALE = .5
+DEFENSE_BASE = 8
+DEFENSE_SCALE = .15
+"""attack = (ATTACK_BASE + main stat * ATTACK_SCALE) * weapon bonus, likewise
+for defense. The main stat includes the class' main stat bonus from gear."""
+
+CombatStats = namedtuple('CombatStats',
+                         ['attack', 'defense', 'gear_bonus', 'weapon_bonus'])
+"""Derived combat stats of a :class:`Character`, see `Character.combat_stats()`."""
+
+EXP_BASE = 100
+EXP_GROWTH = .15
+EXP_MAX = 2**63 - 1
+EXP_TABLE = []
+"""
+EXP_TABLE[n] is the total experience a character must exceed to reach
+level n+1, ceil(EXP_BASE * (1 + EXP_GROWTH)**n). The table stops before
+the first threshold past EXP_MAX (the most a save can hold), which makes
+len(EXP_TABLE) the level cap.
+"""
+while math.ceil(EXP_BASE * (1 + EXP_GROWTH) ** len(EXP_TABLE)) <= EXP_MAX:
+    EXP_TABLE.append(math.ceil(EXP_BASE * (1 + EXP_GROWTH) ** len(EXP_TABLE)))
+EXP_TABLE = tuple(EXP_TABLE)
+MAX_LEVEL = len(EXP_TABLE)
+
+JOURNAL_LIMIT = 1000
+"""
+Maximum number of unsaved changes an object remembers for the save journal
+(see `journal`). Past this the next save writes a full snapshot instead.
+"""
 
 
 class Gear:
@@ -178,6 +46,14 @@ class Gear:
     property is intended to hold a single `item.Equipment` with an
     :class:`item.Slot` corresponding to the attribute name.
 
+    Items are kept in a fixed array of `Gear.size` positions, one per
+    :class:`item.Slot` except 'finger' which has two (the rings), see
+    `Gear.positions`. The sum of every equipped item's bonuses is kept up
+    to date as items are equipped and removed, so reading it (`bonus`) is a
+    lookup. Each position remembers the bonus it added, so taking an item
+    off removes what it gave even if its bonuses changed since. Re-equip
+    an item after changing its bonuses to count the new ones.
+
     Attributes
     ----------
     head:       :class:`item.Head`
@@ -191,146 +67,252 @@ class Gear:
     hands:      :class:`item.Hands`
         Gloves
     rings:      :type:`list`
-        A list of two rings.
+        A list of two rings (empty if no ring is worn).
+    ring1, ring2:   :class:`item.Ring`
+        The rings on each hand.
     trinket:    :class:`item.Trinket`
         A special trinket (ooo fancy)
     weapon:     :class:`item.Weapon`
         A weapon
     oh:         :class:`item.OffHand`
         Another weapon, or maybe a shield?
+    bonus:      :class:`Stats`
+        Every equipped item's bonuses summed. Treat as read only.
 
     Methods
     -------
-    None
+    equip(item, position):
+        Equip an item in the position for its slot, returns what it replaced.
+    unequip(position):
+        Empty a position, returns what was there.
     """
 
+    HEAD, CHEST, ARMS, LEGS, HANDS, RING1, RING2, TRINKET, WEAPON, OH = \
+        range(10)
+    size = 10
+    """Number of positions (every slot plus a second ring)."""
+
+    positions = {0: (HEAD,), 1: (CHEST,), 2: (ARMS,), 3: (LEGS,), 4: (HANDS,),
+                 5: (RING1, RING2), 6: (TRINKET,), 7: (WEAPON,), 8: (OH,)}
+    """item.Slot.slot_id -> the positions items for that slot can go in."""
+
     def __init__(self):
         """
         Create a new :class:`Gear` container for a character.
 
         You start naked! No default values are assigned by the constructor.
-        Except in the case of rings which is assigned an empty list.
-        """
-        self._head = None
-        self._chest = None
-        self._arms = None
-        self._legs = None
-        self._hands = None
-        self._rings = []
-        self._trinket = None
-        self._weapon = None  # Main-hand weapon
-        self._oh = None  # Off-hand weapon
-        self._index = -1
+        """
+        self._items = [None] * self.size
+        # the bonus each position added to _bonus, subtracted when it empties
+        self._given = [None] * self.size
+        self._bonus = Stats()
+        self._version = 0
+
+    def __getstate__(self):
+        return {'_items': self._items}
+
+    def __setstate__(self, state):
+        if '_items' in state:
+            items = state['_items']
+        else:
+            # pickled before Gear was an array: _head, _chest, ... _rings
+            rings = state.get('_rings') or [None, None]
+            items = [state.get('_head'), state.get('_chest'), state.get('_arms'),
+                     state.get('_legs'), state.get('_hands'), rings[0], rings[1],
+                     state.get('_trinket'), state.get('_weapon'), state.get('_oh')]
+        # the bonus total is rebuilt from the items as they are now
+        self.__init__()
+        for pos, i in enumerate(items):
+            if i is not None:
+                self[pos] = i
+
+    def __getitem__(self, position: int) -> item.Equipment:
+        return self._items[position]
+
+    def __setitem__(self, position: int, value: item.Equipment):
+        """
+        Put value (or None) in a position, keeping the bonus total.
+
+        Setting the item already there again picks up any change to its
+        bonuses.
+        """
+        bonus = self._bonus
+        given = self._given[position]
+        if given is not None:
+            bonus = bonus - given
+        if value is not None:
+            given = Stats._of(value.bonus.values())
+            bonus = bonus + given
+        else:
+            given = None
+        self._items[position] = value
+        self._given[position] = given
+        self._bonus = bonus
+        self._version += 1
+
+    def position_for(self, value: item.Equipment) -> int:
+        """
+        Return the position value would be equipped in.
+
+        Rings go in the first free ring position (or the first one if both
+        are taken).
+        """
+        slot = value.slot
+        slot_id = slot.slot_id if isinstance(slot, item.Slot) else int(slot)
+        try:
+            options = self.positions[slot_id]
+        except KeyError:
+            raise ValueError(f"{value.name} has an unknown slot {slot_id}")
+        for pos in options:
+            if self._items[pos] is None:
+                return pos
+        return options[0]
+
+    def equip(self, value: item.Equipment, position: int = None) -> item.Equipment:
+        """
+        Equip an item.
+
+        Parameters
+        ----------
+        value:      :class:`item.Equipment`
+            What to put on.
+        position:   :type:`int`
+            Where to put it. By default the position for the item's slot,
+            see :func:`position_for()`.
+
+        Returns
+        -------
+        The item that was in that position (or None).
+
+        Raises
+        ------
+        ValueError:
+            If position is not a position for the item's slot.
+        """
+        if not isinstance(value, item.Equipment):
+            raise TypeError("you can only equip equipment")
+        if position is None:
+            position = self.position_for(value)
+        else:
+            slot_id = value.slot.slot_id if isinstance(value.slot, item.Slot) \
+                else int(value.slot)
+            if position not in self.positions.get(slot_id, ()):
+                raise ValueError(f"{value.name} does not go in position {position}")
+        old = self._items[position]
+        self[position] = value
+        return old
+
+    def unequip(self, position: int) -> item.Equipment:
+        """Empty a position and return what was in it."""
+        old = self._items[position]
+        self[position] = None
+        return old
+
+    @property
+    def bonus(self) -> Stats:
+        return self._bonus
 
     # Define the property getters and setters
     @property
     def head(self) -> item.Equipment:
-        return self._head
+        return self._items[self.HEAD]
 
     @head.setter
     def head(self, item: item.Equipment):
-        self._head = item
+        self[self.HEAD] = item
 
     @property
     def chest(self):
-        return self._chest
+        return self._items[self.CHEST]
 
     @chest.setter
     def chest(self, item: item.Equipment):
-        self._chest = item
+        self[self.CHEST] = item
 
     @property
     def arms(self) -> item.Equipment:
-        return self._arms
+        return self._items[self.ARMS]
 
     @arms.setter
     def arms(self, item: item.Equipment):
-        self._arms = item
+        self[self.ARMS] = item
 
     @property
     def legs(self) -> item.Equipment:
-        return self._legs
+        return self._items[self.LEGS]
 
     @legs.setter
     def legs(self, item: item.Equipment):
-        self._legs = item
+        self[self.LEGS] = item
 
     @property
     def hands(self) -> item.Equipment:
-        return self._hands
+        return self._items[self.HANDS]
 
     @hands.setter
     def hands(self, item: item.Equipment):
-        self._hands = item
+        self[self.HANDS] = item
 
     @property
-    def rings(self) -> item.Equipment:
-        return self._rings
+    def rings(self) -> list:
+        r = self._items[self.RING1:self.RING2+1]
+        if r[0] is None and r[1] is None:
+            return []
+        return r
 
     @rings.setter
-    def ring1(self, item: item.Equipment, rslot: int = 0):
-        if rslot == 0 or rslot == 1:
-            self._rings[rslot] = item
-        else:
+    def rings(self, value: list):
+        if len(value) > 2:
             raise ValueError("you can only wear 2 rings bozo")
+        value = list(value) + [None] * (2 - len(value))
+        self[self.RING1], self[self.RING2] = value
+
+    @property
+    def ring1(self) -> item.Equipment:
+        return self._items[self.RING1]
+
+    @ring1.setter
+    def ring1(self, item: item.Equipment):
+        self[self.RING1] = item
+
+    @property
+    def ring2(self) -> item.Equipment:
+        return self._items[self.RING2]
+
+    @ring2.setter
+    def ring2(self, item: item.Equipment):
+        self[self.RING2] = item
 
     @property
     def trinket(self) -> item.Equipment:
-        return self._trinket
+        return self._items[self.TRINKET]
 
     @trinket.setter
     def trinket(self, item: item.Equipment):
-        self._trinket = item
+        self[self.TRINKET] = item
 
     @property
     def weapon(self) -> item.Equipment:
-        return self._weapon
+        return self._items[self.WEAPON]
 
     @weapon.setter
     def weapon(self, item: item.Equipment):
-        self._weapon = item
+        self[self.WEAPON] = item
 
     @property
     def oh(self) -> item.Equipment:
-        return self._oh
+        return self._items[self.OH]
 
     @oh.setter
     def oh(self, item: item.Equipment):
-        self._oh = item
+        self[self.OH] = item
 
     def __iter__(self):
-        return self
-
-    def __next__(self):
-        self._index += 1
-        match self._index:
-            case 0:
-                return self.head
-            case 1:
-                return self.chest
-            case 2:
-                return self.arms
-            case 3:
-                return self.legs
-            case 4:
-                return self.hands
-            case 5:
-                if len(self._rings) <= 0:
-                    return None
-                return self._rings[0]
-            case 6:
-                if len(self._rings) <= 0:
-                    return None
-                return self._rings[1]
-            case 7:
-                return self.trinket
-            case 8:
-                return self.weapon
-            case 9:
-                return self.oh
-            case _:
-                self._index = -1
-                raise StopIteration
+        """Iterate over every position (None where nothing is equipped)."""
+        return iter(self._items)
+
+    def __len__(self):
+        return self.size
 
     def __eq__(self, other):
         """
@@ -355,15 +337,7 @@ class Gear:
         """
         if not isinstance(other, Gear):
             return False
-        return (self.head == other.head and
-                self.chest == other.chest and
-                self.arms == other.arms and
-                self.legs == other.legs and
-                self.hands == other.hands and
-                self.rings == other.rings and
-                self.trinket == other.trinket and
-                self.weapon == other.weapon and
-                self.oh == other.oh)
+        return self._items == other._items
 
     def __str__(self):
         """
@@ -394,8 +368,9 @@ class Level:
     An object containing the character's current level
     and experience amount.
 
-    TODO ensure that current_experience cannot exceed max
-    TODO ensure current level matches experience value
+    Experience is a running total. The level it is worth is looked up in
+    `EXP_TABLE` (see :func:`level_for()`), so any amount of experience can
+    be added in one step.
 
     Attributes
     ----------
@@ -411,6 +386,12 @@ class Level:
         amount required. Not the difference needed.
     check_next():
         Returns if current experience value if greater than get_next()
+    level_for(exp):
+        Returns the level a total amount of experience is worth.
+    add_exp(value):
+        Add experience and level up as many times as it is worth.
+    set_exp(value):
+        Set the experience total and the level it is worth.
     """
 
     def __init__(self, cur_level: int = 0, exp: int = 0):
@@ -427,21 +408,64 @@ class Level:
         self._cur_level = cur_level
         self._exp = exp
 
+    @staticmethod
+    def level_for(exp: int) -> int:
+        """Return the level exp total experience is worth (capped at
+        `MAX_LEVEL`)."""
+        return bisect_left(EXP_TABLE, exp)
+
     def get_next(self):
         """
         Returns the exp needed for the next level for this 
         :class:`character.Level`.
         """
-        t = 100
-        b = .15
-        x = self.cur_level
-        y = t * (1 + b) ** x
-        return math.ceil(y)
+        if self.cur_level < MAX_LEVEL:
+            return EXP_TABLE[self.cur_level]
+        return EXP_MAX
 
     def check_next(self):
         """Check if enough experience has been accrued to level up."""
         return self.exp > self.get_next()
 
+    def add_exp(self, value: int) -> int:
+        """
+        Add experience and level up as many times as the new total is worth.
+
+        Parameters
+        ----------
+        value:  :type:`int`
+            The amount of experience to add. The total is capped at
+            `EXP_MAX`.
+
+        Returns
+        -------
+        The number of levels gained.
+
+        Raises
+        ------
+        ValueError:
+            If value is negative.
+        """
+        if not isinstance(value, int) or value < 0:
+            raise ValueError("exp gained must be a non-negative integer")
+        self._exp = min(self._exp + value, EXP_MAX)
+        before = self._cur_level
+        self._cur_level = max(before, self.level_for(self._exp))
+        return self._cur_level - before
+
+    def set_exp(self, value: int) -> int:
+        """
+        Set the experience total and the level it is worth, up or down.
+
+        Returns
+        -------
+        The change in level.
+        """
+        self.exp = min(value, EXP_MAX)
+        before = self._cur_level
+        self._cur_level = self.level_for(self._exp)
+        return self._cur_level - before
+
     @property
     def cur_level(self) -> int:
         return self._cur_level
@@ -466,7 +490,7 @@ class Level:
 
     @property
     def exp_to_level(self) -> int:
-        return self.get_next() - self.cur_exp
+        return self.get_next() - self.exp
 
     @exp_to_level.setter
     def exp_to_level(self, value: int):
@@ -629,6 +653,8 @@ class bt_Class:
         Get how much bonus damage reduction is provided by equipped
         :class:`Gear`
     """
+    main_stat_name = 'strength'
+    """Name of the :class:`Stats` attribute that is the class' main stat."""
 
     def __init__(self, name: str = None, stats: Stats = Stats()):
         """
@@ -693,7 +719,7 @@ class bt_Class:
         for i in g:
             if i is None:
                 continue
-            ret.append(i.strength)
+            ret.append(getattr(i, self.main_stat_name))
         return ret
 
     def attack_bonus(self, g: Gear = Gear()) -> float:
@@ -743,6 +769,8 @@ class bt_Class:
 
 
 class Warrior(bt_Class):
+    main_stat_name = 'strength'
+
     def __init__(self):
         self.name = "warrior"
         base_stats = self.def_stats
@@ -752,12 +780,6 @@ class Warrior(bt_Class):
     def main_stat(self):
         return self.stats.strength
 
-    def get_gear_stats(self, g: Gear = Gear()):
-        ret = []
-        for i in g:
-            ret.append(i.strength)
-        return ret
-
     @property
     def def_stats(self):
         return Stats(strength=3, agility=1, intellect=1,
@@ -771,6 +793,8 @@ class Warrior(bt_Class):
 
 
 class Rogue(bt_Class):
+    main_stat_name = 'agility'
+
     def __init__(self):
         self.name = "rogue"
         base_stats = self.def_stats
@@ -780,12 +804,6 @@ class Rogue(bt_Class):
     def main_stat(self):
         return self.stats.agility
 
-    def get_gear_stats(self, g: Gear = Gear()):
-        ret = []
-        for i in g:
-            ret.append(i.agility)
-        return ret
-
     @property
     def def_stats(self):
         return Stats(strength=1, agility=3, intellect=1,
@@ -799,6 +817,8 @@ class Rogue(bt_Class):
 
 
 class Wizard(bt_Class):
+    main_stat_name = 'intellect'
+
     def __init__(self):
         self.name = "wizard"
         base_stats = self.def_stats
@@ -808,12 +828,6 @@ class Wizard(bt_Class):
     def main_stat(self):
         return self.stats.intellect
 
-    def get_gear_stats(self, g: Gear = Gear()):
-        ret = []
-        for i in g:
-            ret.append(i.intellect)
-        return ret
-
     @property
     def def_stats(self):
         return Stats(strength=1, agility=1, intellect=3,
@@ -827,6 +841,8 @@ class Wizard(bt_Class):
 
 
 class Trader(bt_Class):
+    main_stat_name = 'charisma'
+
     def __init__(self):
         self.name = "trader"
         base_stats = self.def_stats
@@ -836,12 +852,6 @@ class Trader(bt_Class):
     def main_stat(self):
         return self.stats.charisma
 
-    def get_gear_stats(self, g: Gear = Gear()):
-        ret = []
-        for i in g:
-            ret.append(i.charisma)
-        return ret
-
     @property
     def def_stats(self):
         return Stats(strength=1, agility=1, intellect=1,
@@ -855,6 +865,8 @@ class Trader(bt_Class):
 
 
 class Paladin(bt_Class):
+    main_stat_name = 'constitution'
+
     def __init__(self):
         self.name = "paladin"
         base_stats = self.def_stats
@@ -864,12 +876,6 @@ class Paladin(bt_Class):
     def main_stat(self):
         return self.stats.constitution
 
-    def get_gear_stats(self, g: Gear = Gear()):
-        ret = []
-        for i in g:
-            ret.append(i.constitution)
-        return ret
-
     @property
     def def_stats(self):
         return Stats(strength=1, agility=1, intellect=1,
@@ -884,6 +890,8 @@ class Paladin(bt_Class):
 
 
 class Villager(bt_Class):
+    main_stat_name = 'luck'
+
     def __init__(self):
         self.name = "villager"
         base_stats = self.def_stats
@@ -893,12 +901,6 @@ class Villager(bt_Class):
     def main_stat(self):
         return self.stats.luck
 
-    def get_gear_stats(self, g: Gear = Gear()):
-        ret = []
-        for i in g:
-            ret.append(i.luck)
-        return ret
-
     @property
     def def_stats(self):
         return Stats(strength=1, agility=1, intellect=1,
@@ -918,14 +920,39 @@ class Inventory:
     Contains info on the items a character holds but has not equipped.
     Additionally contains the characters wealth (coins).
 
+    Items are stored counted: `counts` maps each distinct item to how many
+    of it are held, so adding, removing and counting are O(1) no matter how
+    many fish a character has hoarded. Items that compare equal (eg two
+    Salmon worth 7) share one entry. Iterating yields every held item once
+    per unit, the same as the list the inventory used to hold.
+
     Attributes
     ----------
+    counts:     :type:`dict`
+        Item -> number held. Treat as read only, use the methods below.
     contents:   :type:`list`
-        The contents of the inventory.
+        The contents of the inventory, one entry per unit held.
     is_empty:   :type:`bool`
         Returns true if the inventory is empty, otherwise false.
     gold:        :type:`int`
         The amount of coins the character currently holds
+    total:      :type:`int`
+        Number of items held (running total).
+    value:      :type:`int`
+        Combined value of every item held (running total).
+    version:    :type:`int`
+        Incremented on every change to the items held.
+    by_type:    :type:`dict`
+        Item class -> {item: None} of the distinct items of exactly that
+        class held, in the order they were first added.
+    type_totals: :type:`dict`
+        Item class -> [number held, combined value] (running totals).
+    by_slot:    :type:`dict`
+        `item.Slot` id -> {item: None} of the :class:`item.Equipment` held
+        for that slot.
+    by_tier:    :type:`dict`
+        Material tier -> {item: None} of the :class:`item.Equipment` held
+        made of a material of that tier.
 
     Methods
     -------
@@ -933,38 +960,266 @@ class Inventory:
         Adds value to the inventory.
     del_item(value):
         Deletes value from the inventory.
+    add_many(items):
+        Adds several items (an iterable or a {item: count} mapping).
+    remove_many(items):
+        Removes several items, all or nothing.
+    count(value):
+        Number of value held.
+    of_type(kind):
+        {item: count} of the items that are a kind (eg `fish.Fish`).
+    of_slot(slot), of_tier(tier):
+        {item: count} of the equipment for a slot or of a material tier.
+    sell(kind, name, limit):
+        Sell items of a kind for their value in one step.
     change_gold(value):
         Adjust gold by the amount in value. Can be positive, negative or 0.
     """
-    items = []
     coins = 0
-    index = -1
+    _pages = None
 
     def __init__(self, items: list = [], coins: int = 0):
         """
         Construct a new inventory object. By default the inventory is
         empty and contains 0 coins.
         """
-        self.items = []
-        self.index = -1
+        self.counts = {}
+        self.total = 0
+        self.value = 0
+        self.version = 0
+        self.by_type = {}
+        self.type_totals = {}
+        self.by_slot = {}
+        self.by_tier = {}
         self.coins = coins
+        self._journal = []
+
+    def _log(self, *record):
+        """Remember a change for the save journal, see `journal`."""
+        if self._journal is not None:
+            self._journal.append(record)
+            if len(self._journal) > JOURNAL_LIMIT:
+                self._journal = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_journal', None)
+        for k in ('by_type', 'type_totals', 'by_slot', 'by_tier', '_pages'):
+            state.pop(k, None)
+        return state
+
+    def __setstate__(self, state):
+        # inventories pickled before counting held a list of items
+        items = state.pop('items', None)
+        state.pop('index', None)
+        counts = state.pop('counts', {})
+        version = state.get('version', 0)
+        self.__dict__.update(state)
+        self.counts = {}
+        self.total = 0
+        self.value = 0
+        self.version = 0
+        self.by_type = {}
+        self.type_totals = {}
+        self.by_slot = {}
+        self.by_tier = {}
+        if items is not None:
+            counts = {}
+            for i in items:
+                counts[i] = counts.get(i, 0) + 1
+        # share catalogued definitions (items from old pickles or saved by
+        # value come back as copies) and rebuild the running totals.
+        # Equipment is mutable and never shared between inventories.
+        for i, n in counts.items():
+            if not isinstance(i, item.Equipment):
+                i = catalog.items.intern(i)
+            self._add(i, n)
+        self.version = version
+        self._journal = []
+
+    def _add(self, value: item.Item, n: int):
+        """Add n of value without checks or journaling."""
+        held = self.counts.get(value, 0)
+        self.counts[value] = held + n
+        worth = getattr(value, 'value', 0) * n
+        self.total += n
+        self.value += worth
+        kind = type(value)
+        if not held:
+            self.by_type.setdefault(kind, {})[value] = None
+            for index, key in self._keys(value):
+                index.setdefault(key, {})[value] = None
+        totals = self.type_totals.setdefault(kind, [0, 0])
+        totals[0] += n
+        totals[1] += worth
+        self.version += 1
+
+    def _sub(self, value: item.Item, n: int) -> int:
+        """Remove up to n of value without journaling, return how many."""
+        held = self.counts.get(value, 0)
+        n = min(n, held)
+        if not n:
+            return 0
+        kind = type(value)
+        if n == held:
+            del self.counts[value]
+            for index, key in ((self.by_type, kind),) + self._keys(value):
+                entries = index[key]
+                del entries[value]
+                if not entries:
+                    del index[key]
+        else:
+            self.counts[value] = held - n
+        worth = getattr(value, 'value', 0) * n
+        self.total -= n
+        self.value -= worth
+        totals = self.type_totals[kind]
+        totals[0] -= n
+        totals[1] -= worth
+        if not totals[0]:
+            del self.type_totals[kind]
+        self.version += 1
+        return n
+
+    def _keys(self, value: item.Item) -> tuple:
+        """The (index, key) pairs value is filed under besides its type."""
+        if not isinstance(value, item.Equipment):
+            return ()
+        return ((self.by_slot, self._slot_id(value.slot)),
+                (self.by_tier, value.material.material_tier))
+
+    @staticmethod
+    def _slot_id(slot) -> int:
+        if isinstance(slot, item.Slot):
+            return slot.slot_id
+        if isinstance(slot, str):
+            return item.Slot.rev_slots[slot]
+        return slot
+
+    def _kinds(self, kind: type) -> list:
+        """The item classes held that are kind or a subclass of it."""
+        return [t for t in self.by_type if issubclass(t, kind)]
+
+    @staticmethod
+    def _tally(items) -> dict:
+        """Turn an iterable of items or an {item: count} mapping into counts."""
+        if isinstance(items, Mapping):
+            return dict(items)
+        return Counter(items)
 
     @property
     def contents(self) -> list:
-        """Return a string of the names of items in the inventory"""
-        out = []
-        for i in self.items:
-            if not isinstance(i, item.Item):
-                raise TypeError("how did you get that in there?")
-            out.append(i)
-        return out
+        """Return a list of the items in the inventory"""
+        return list(self)
 
-    def add_item(self, value: item.Equipment = None) -> list:
+    @property
+    def items(self) -> list:
+        """The items held as a list (one entry per unit). Built on access."""
+        return list(self)
+
+    def count(self, value: item.Item) -> int:
+        """Return how many of value are held."""
+        return self.counts.get(value, 0)
+
+    def of_type(self, kind: type = item.Item) -> dict:
         """
-        Add an item to the inventory container.
+        Return {item: count} for every item held that is a kind.
+
+        Costs time in proportion to the number of distinct items returned,
+        not the size of the inventory.
+        """
+        return {i: self.counts[i] for t in self._kinds(kind)
+                for i in self.by_type[t]}
 
-        Add an item to the inventory and then return the current contents
-        of the inventory.
+    def of_slot(self, slot) -> dict:
+        """
+        Return {item: count} for the equipment held for a slot.
+
+        Parameters
+        ----------
+        slot:
+            An :class:`item.Slot`, slot id or slot name (eg 'head').
+        """
+        return {i: self.counts[i]
+                for i in self.by_slot.get(self._slot_id(slot), ())}
+
+    def of_tier(self, tier) -> dict:
+        """Return {item: count} for the equipment held made of a material
+        of that tier."""
+        return {i: self.counts[i] for i in self.by_tier.get(tier, ())}
+
+    def count_of(self, kind: type = item.Item) -> tuple:
+        """Return (number held, combined value) of the items that are a
+        kind, from running totals."""
+        held = worth = 0
+        for t in self._kinds(kind):
+            held += self.type_totals[t][0]
+            worth += self.type_totals[t][1]
+        return held, worth
+
+    def sell(self, kind: type = item.Item, name: str = None,
+             limit: int = None) -> tuple:
+        """
+        Sell items for their value.
+
+        The items are removed and their value added to the coins in one
+        step, nothing changes if anything is wrong with the request.
+
+        Parameters
+        ----------
+        kind:   :type:`type`
+            What to sell, eg `fish.Fish` (subclasses included).
+        name:   :type:`str`
+            Only sell the items of that kind with this name (any case).
+        limit:  :type:`int`
+            Sell at most this many, in the order they were first added.
+            None sells all of them.
+
+        Returns
+        -------
+        (number sold, gold gained)
+
+        Raises
+        ------
+        ValueError:
+            If limit is negative.
+        """
+        if limit is not None and limit < 0:
+            raise ValueError("can't sell a negative amount")
+        if name is None and limit is None:
+            # everything of the kind, the totals already know the price
+            sold, gold = self.count_of(kind)
+            picked = [(i, self.counts[i]) for t in self._kinds(kind)
+                      for i in self.by_type[t]]
+        else:
+            key = None if name is None else name.casefold()
+            left = limit
+            sold = gold = 0
+            picked = []
+            for t in self._kinds(kind):
+                for i in self.by_type[t]:
+                    if left == 0:
+                        break
+                    if key is not None and i.name.casefold() != key:
+                        continue
+                    n = self.counts[i] if left is None \
+                        else min(self.counts[i], left)
+                    picked.append((i, n))
+                    sold += n
+                    gold += getattr(i, 'value', 0) * n
+                    if left is not None:
+                        left -= n
+        for i, n in picked:
+            self._sub(i, n)
+            self._log('del', i, n)
+        if gold:
+            self.coins += gold
+            self._log('gold', self.coins)
+        return sold, gold
+
+    def add_item(self, value: item.Equipment = None) -> int:
+        """
+        Add an item to the inventory container.
 
         Parameters
         ----------
@@ -973,21 +1228,19 @@ class Inventory:
 
         Returns
         -------
-        :type:`list`:
-            A list containing the current items in the inventory.
+        :type:`int`:
+            How many of that item are now held.
         """
         if not isinstance(value, item.Item):
             raise TypeError("You can't put that in your backpack")
-        self.items.append(value)
-        return self.items
+        self._add(value, 1)
+        self._log('add', value, 1)
+        return self.counts[value]
 
-    def del_item(self, value: item.Item = None) -> list:
+    def del_item(self, value: item.Item = None) -> int:
         """
         Remove an item from the inventory container.
 
-        Remove an item from the inventory and then return the current contents
-        of the inventory.
-
         Parameters
         ----------
         value:  :class:`item.Item`
@@ -995,23 +1248,86 @@ class Inventory:
 
         Returns
         -------
-        :type:`list`:
-            A list containing the current items in the inventory.
+        :type:`int`:
+            How many of that item are still held.
+        :exception:`ValueError`:
+            If the item is not in the inventory (returned, not raised).
         """
         if not isinstance(value, item.Item):
             raise TypeError("You can't remove that from your backpack")
-        try:
-            self.items.remove(value)
-        except ValueError as e:
-            return e
-        return self.items
+        if value not in self.counts:
+            return ValueError("item not in inventory")
+        self._sub(value, 1)
+        self._log('del', value, 1)
+        return self.counts.get(value, 0)
+
+    def add_many(self, items) -> int:
+        """
+        Add several items at once.
+
+        Parameters
+        ----------
+        items:
+            An iterable of :class:`item.Item` or a mapping of item -> count
+            (eg a :class:`collections.Counter`).
+
+        Returns
+        -------
+        :type:`int`:
+            The number of items added.
+        """
+        counts = self._tally(items)
+        for i, n in counts.items():
+            if not isinstance(i, item.Item):
+                raise TypeError("You can't put that in your backpack")
+            if n < 0:
+                raise ValueError("can't add a negative amount")
+        added = 0
+        for i, n in counts.items():
+            if n:
+                self._add(i, n)
+                self._log('add', i, n)
+                added += n
+        return added
+
+    def remove_many(self, items) -> int:
+        """
+        Remove several items at once.
+
+        Nothing is removed unless every item is held in the requested
+        amount.
+
+        Parameters
+        ----------
+        items:
+            An iterable of :class:`item.Item` or a mapping of item -> count.
+
+        Returns
+        -------
+        :type:`int`:
+            The number of items removed.
+
+        Raises
+        ------
+        ValueError:
+            If not enough of some item is held.
+        """
+        counts = self._tally(items)
+        for i, n in counts.items():
+            if n < 0:
+                raise ValueError("can't remove a negative amount")
+            if self.counts.get(i, 0) < n:
+                raise ValueError(f"not enough {i.name} in inventory")
+        removed = 0
+        for i, n in counts.items():
+            if n:
+                removed += self._sub(i, n)
+                self._log('del', i, n)
+        return removed
 
     @property
     def is_empty(self) -> bool:
-        if len(self.items) == 0:
-            return True
-        else:
-            return False
+        return self.total == 0
 
     @property
     def gold(self) -> int:
@@ -1023,6 +1339,7 @@ class Inventory:
             raise TypeError("int not passed to gold")
         if value >= 0:
             self.coins = value
+            self._log('gold', self.coins)
         else:
             raise ValueError("why do you want to be in debt?")
 
@@ -1041,6 +1358,7 @@ class Inventory:
             raise ValueError("why do you want to be in debt?")
         else:
             self.coins += value
+            self._log('gold', self.coins)
             return self.coins
 
     def set_gold(self, value: int = 0):
@@ -1055,6 +1373,7 @@ class Inventory:
         if not isinstance(value, int):
             raise TypeError("int not passed to change_gold")
         self.coins = value
+        self._log('gold', self.coins)
         return self.coins
 
     def __str__(self) -> str:
@@ -1063,29 +1382,21 @@ class Inventory:
 
         Coin count is NOT included in this information.
         """
-        out_str = ""
-        for i in self.items:
-            out_str += f"{i.name}, "
-        return out_str[0:len(out_str)-2]
+        return ", ".join(i.name for i in self)
 
     def __iter__(self):
-        self.index = -1
-        return self
+        """Yield every item held, once per unit."""
+        for i, n in self.counts.items():
+            for _ in range(n):
+                yield i
 
-    def __next__(self):
-        self.index += 1
-        if self.index >= len(self.items):
-            raise StopIteration
-        return self.items[self.index]
+    def __contains__(self, value) -> bool:
+        return value in self.counts
 
     def __eq__(self, other) -> bool:
         """
         Compare two :class:`Inventory` objects for equality.
 
-        Creates a :class:`collections.Counter` object for `self.items`
-        and `other.items` then compares the created dictionaries for
-        equality.
-
         Parameters
         ----------
         other:  :class:`Inventory`
@@ -1093,16 +1404,14 @@ class Inventory:
 
         Returns
         -------
-        True if all stats are equal and the name attribute is the same.
+        True if both hold the same items in the same amounts.
         """
         if not isinstance(other, Inventory):
             return TypeError("that's not an inventory")
-        temp = self.items.copy()
-        other_t = other.items.copy()
-        return Counter(temp) == Counter(other_t)
+        return self.counts == other.counts
 
     def __len__(self):
-        return len(self.items)
+        return self.total
 
 
 class Character:
@@ -1141,11 +1450,17 @@ class Character:
         Character's constitution
     luck:           :type:`int`
         Character's luck
+    idle_fishing:   :type:`tuple`
+        (pool name, start time) of the character's idle fishing session,
+        None when not idle fishing. See `fish.settle()`.
     """
+    _idle = None
+    _idle_catch = None
+
     def __init__(self, name: str,
-                 level: Level = Level(0, 0),
-                 gear_block: Gear = Gear(),
-                 class_choice: bt_Class = bt_Class('warrior'),
+                 level: Level = None,
+                 gear_block: Gear = None,
+                 class_choice: bt_Class = None,
                  health: Health = None
                  ):
         """
@@ -1173,6 +1488,14 @@ class Character:
         health:         :class:`Health`
             The character's health, including the max and current values.
         """
+        # defaults are built per character, cached characters must never
+        # share a Level/Gear/bt_Class instance
+        if level is None:
+            level = Level(0, 0)
+        if gear_block is None:
+            gear_block = Gear()
+        if class_choice is None:
+            class_choice = bt_Class('warrior', Stats())
         self._level = level
         self._name = name
         self._gear = gear_block
@@ -1182,8 +1505,41 @@ class Character:
             self.health = health
         else:
             self.health = Health(self._bt_class.stats.constitution*10)
+        self._idle = None
+        self._journal = []
+        self._combat = None
         return
 
+    def _log(self, *record):
+        """Remember a change for the save journal, see `journal`."""
+        if self._journal is not None:
+            self._journal.append(record)
+            if len(self._journal) > JOURNAL_LIMIT:
+                self._journal = None
+
+    def needs_snapshot(self):
+        """
+        Flag that this character changed in a way the journal can't record.
+
+        The next save writes the whole character. Called by the setters
+        below, call it yourself after changing nested objects directly
+        (eg `char.gear.weapon = ...`).
+        """
+        self._journal = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_journal', None)
+        state.pop('_jstate', None)
+        state.pop('_combat', None)
+        state.pop('_idle_catch', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._journal = []
+        self._combat = None
+
     #  HP
     @property
     def hp(self) -> int:
@@ -1196,6 +1552,7 @@ class Character:
         if value > self.health.max_hp:
             raise ValueError("you cant have more than your max hp")
         self.health.cur_hp = value
+        self.needs_snapshot()
         return self.health.cur_hp
 
     #  Level
@@ -1207,6 +1564,7 @@ class Character:
     def level(self, value):
         if isinstance(value, int) and value > 0:
             self._level.cur_level = value
+            self._log('exp', self._level.cur_level, self._level.exp)
         else:
             raise ValueError("Level must be a positive integer.")
     #  End Level
@@ -1220,6 +1578,7 @@ class Character:
     def name(self, value: str):
         if isinstance(value, str):
             self._name = value
+            self.needs_snapshot()
         else:
             raise ValueError("Name must be a string.")
     #  End Name
@@ -1235,6 +1594,7 @@ class Character:
             if self._stats.constitution != value.constitution:
                 self.hp.recalc_hp(value)
             self._bt_class.stats = value
+            self.needs_snapshot()
         else:
             raise TypeError("Stats must be a Stats object")
 
@@ -1268,11 +1628,13 @@ class Character:
 
     @experience.setter
     def experience(self, value: int = 0):
+        """Set the experience total, the level follows it up or down."""
         if not isinstance(value, int):
             raise TypeError("provide an int")
         if value < 0:
             raise ValueError("exp must be gt 0")
-        self._level.exp = value
+        self._level.set_exp(value)
+        self._log('exp', self._level.cur_level, self._level.exp)
     #  End Stats
 
     #  Gear
@@ -1284,6 +1646,7 @@ class Character:
     def gear(self, value: Gear):
         if isinstance(value, Gear):
             self._gear = value
+            self.needs_snapshot()
         else:
             raise TypeError("Gear must be a Gear object")
     #  End Gear
@@ -1297,12 +1660,54 @@ class Character:
     def inventory(self, value: Inventory):
         if isinstance(value, Inventory):
             self._inventory = value
+            self.needs_snapshot()
         else:
             raise TypeError("Inventory must be an Inventory object")
 
     #  End Inventory
 
     #  ATK & DEF
+    def combat_stats(self) -> CombatStats:
+        """
+        Return the character's derived combat stats.
+
+        Computed on first use and then cached until the character's class,
+        stats or gear change (each :class:`Stats` and :class:`Gear` carries
+        a version that its setters bump). Equipped items are treated as
+        immutable.
+
+        Returns
+        -------
+        :class:`CombatStats`
+        """
+        cls = self._bt_class
+        stats = cls.stats
+        gear = self._gear
+        cached = self._combat
+        if cached is not None:
+            k = cached[0]
+            if k[0] is cls and k[1] is stats and k[2] == stats._version \
+                    and k[3] is gear and k[4] == gear._version:
+                return cached[1]
+        derived = self._derive_combat()
+        self._combat = ((cls, stats, stats._version, gear, gear._version),
+                        derived)
+        return derived
+
+    def _derive_combat(self) -> CombatStats:
+        cls = self._bt_class
+        gear = self._gear
+        gear_bonus = gear.bonus
+        main = cls.main_stat + getattr(gear_bonus, cls.main_stat_name)
+        if gear.weapon is not None:
+            weapon_bonus = cls.attack_bonus(gear)
+        else:
+            weapon_bonus = 1.0
+        # (10 + (main_stat + gear_stats) * .5)
+        attack = int((ATTACK_BASE + main * ATTACK_SCALE)) * weapon_bonus
+        defense = int(DEFENSE_BASE + main * DEFENSE_SCALE)
+        return CombatStats(attack, defense, gear_bonus, weapon_bonus)
+
     @property
     def attack(self) -> int:
         """
@@ -1314,22 +1719,13 @@ class Character:
         Additionally checks :func:`bt_class.attack_bonus()` to see if the
         character is wielding their preferred weapon type.
 
+        Cached, see :func:`combat_stats()`.
+
         Returns
         -------
         A :type:`int` of the attack value.
         """
-        base = 10
-        # (10 + (main_stat + gear_stats) * .5)
-        main_stat = self._bt_class.main_stat
-        gear_stats = self._bt_class.get_gear_stats(self.gear)
-        attack = 0
-        if self.gear.weapon is not None:
-            bonus = self._bt_class.attack_bonus(self.gear)
-        else:
-            bonus = 1.0
-        for g in gear_stats:
-            attack += g
-        return int((base + (main_stat + attack) * .5)) * bonus
+        return self.combat_stats().attack
 
     @property
     def defense(self) -> int:
@@ -1338,37 +1734,75 @@ class Character:
         Derived from the character's main stat (:attr:`bt_Class.main_stat`),
             and the character's gear stats (:func:`bt_Class.get_gear_stats()`).
 
-        Additionally checks :func:`bt_Class.attack_bonus()` to see if the
-        character wielding their preferred weapon type.
+        Cached, see :func:`combat_stats()`.
 
         Returns
         -------
         A :type:`int` of the defense value.
         """
-        base = 8
-        main_stat = self._bt_class.main_stat
-        gear_stats = self._bt_class.get_gear_stats(self.gear)
-        defense = 0
-        for g in gear_stats:
-            defense += g
-        return int(base + (main_stat + defense) * .15)
+        return self.combat_stats().defense
+
+    @property
+    def gear_bonus(self) -> Stats:
+        """Every stat bonus from equipped gear summed up. Cached."""
+        return self.combat_stats().gear_bonus
+
+    @property
+    def weapon_bonus(self) -> float:
+        """Multiplier for wielding the class' preferred weapon. Cached."""
+        return self.combat_stats().weapon_bonus
     #  End Attack and Defense
 
-    def gain_exp(self, value: int = 0):
+    def gain_exp(self, value: int = 0) -> int:
         """Add exp to the character.
 
-        Gain experience, check if you leveled up and set new level if needed.
+        Gain experience and level up as many times as the new total is worth
+        (see :func:`Level.add_exp()`).
 
         Parameters
         ----------
         value:   :type:`int`
             The amount of experience to add.
+
+        Returns
+        -------
+        The number of levels gained.
+        """
+        gained = self._level.add_exp(value)
+        # TODO increase stats?
+        # TODO give stat points for player to allocate?
+        self._log('exp', self._level.cur_level, self._level.exp)
+        return gained
+
+    #  Idle fishing
+    @property
+    def idle_fishing(self) -> tuple:
+        return self._idle
+
+    def start_idle(self, pool: str, started: float):
+        """
+        Start (or move the start of) an idle fishing session.
+
+        Only the pool name and start time are kept, the catch is worked out
+        when the character is next loaded, see `fish.settle()`.
+
+        Parameters
+        ----------
+        pool:       :type:`str`
+            Name of the `fish.FishingPool`.
+        started:    :type:`float`
+            Start time (unix time) the catch is counted from.
         """
-        self._level.exp += value
-        if self._level.check_next():
-            self._level.cur_level += 1
-            # TODO increase stats?
-            # TODO give stat points for player to allocate?
+        self._idle = (pool, float(started))
+        self._log('idle', pool, float(started))
+
+    def stop_idle(self) -> tuple:
+        """End the idle fishing session, returns the old (pool, start)."""
+        old = self._idle
+        self._idle = None
+        self._log('idle', '', 0.0)
+        return old
+    #  End Idle fishing
 
     #  character.Character internal/inherited funcs #
     def __str__(self) -> str:
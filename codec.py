@@ -0,0 +1,386 @@
+"""
+Compact binary encoding for :class:`character.Character`.
+
+Layout (all integers little endian)
+------
+magic           b'BTC'
+version         uint8, see `VERSION`
+name            str (uint16 length + utf-8)
+class           str
+stats           6 x int64 (strength, agility, intellect, charisma,
+                    constitution, luck)
+level           int32 level, int64 exp
+health          3 x int64 (base, max, current)
+gold            int64
+item table      uint32 count, then one item per entry: uint8 kind, then
+                    either a uint32 `catalog` ID (CATALOG) or the full
+                    definition (ITEM, FISH, EQUIPMENT64, or EQUIPMENT as
+                    written before version 4)
+inventory       uint32 count, then (uint32 item index, uint32 count) pairs
+gear            10 x int32 item index, -1 for an empty slot. Ordered like
+                    `character.Gear` iteration (rings are slots 5 and 6).
+idle            str pool name (empty when not idle fishing), float64 start
+                    time. See `character.Character.idle_fishing`.
+
+Every distinct item is written once in the item table and referenced by
+its index, so 10k of the same fish cost one entry and one pair. Equipment
+gets one entry per object (not per definition). Items with
+a stable catalog ID (every fish species) are written as just that ID,
+anything else by value. Decoded fish and plain items are interned in the
+catalog, equipment is mutable and decoded as a new object every time.
+
+Versions
+------
+1       Items always written by value.
+2       Adds the CATALOG item kind.
+3       Adds idle.
+4       Stats and health widened to int64 like `stats.Stats`, equipment
+            written as EQUIPMENT64 (int64 item_id and bonuses).
+
+Older versions are decoded by their own reader into a plain dict and
+brought up to date by the functions in `migrations` before the
+:class:`character.Character` is built. Data that does not start with the
+magic bytes is assumed to be a pickle from before this format existed.
+"""
+
+import pickle
+import struct
+
+import catalog
+import character
+import fish
+import item
+
+MAGIC = b'BTC'
+VERSION = 4
+
+ITEM = 0
+FISH = 1
+EQUIPMENT = 2
+CATALOG = 3
+EQUIPMENT64 = 4
+
+_u8 = struct.Struct('<B')
+_u32 = struct.Struct('<I')
+_u16 = struct.Struct('<H')
+_i64 = struct.Struct('<q')
+_stats = struct.Struct('<6q')
+_stats32 = struct.Struct('<6i')
+_level = struct.Struct('<iq')
+_health = struct.Struct('<3q')
+_health32 = struct.Struct('<3i')
+_pair = struct.Struct('<II')
+_gear = struct.Struct('<10i')
+_equip = struct.Struct('<qi6qd')
+_equip32 = struct.Struct('<ii6id')
+_f64 = struct.Struct('<d')
+
+_classes = {
+    'warrior': character.Warrior,
+    'rogue': character.Rogue,
+    'wizard': character.Wizard,
+    'trader': character.Trader,
+    'paladin': character.Paladin,
+    'villager': character.Villager,
+}
+
+
+class CodecError(ValueError):
+    """Raised when data can not be decoded."""
+    pass
+
+
+class Reader:
+    """Cursor over a bytes object."""
+
+    def __init__(self, data: bytes, pos: int = 0):
+        self.data = data
+        self.pos = pos
+
+    def unpack(self, s: struct.Struct) -> tuple:
+        try:
+            out = s.unpack_from(self.data, self.pos)
+        except struct.error as e:
+            raise CodecError(f"truncated character data ({e})")
+        self.pos += s.size
+        return out
+
+    def str(self) -> str:
+        (n,) = self.unpack(_u16)
+        out = self.data[self.pos:self.pos+n]
+        if len(out) != n:
+            raise CodecError("truncated character data")
+        self.pos += n
+        return out.decode('utf-8')
+
+
+def pack_str(out: list, s: str):
+    """Append a length prefixed utf-8 string to out."""
+    b = s.encode('utf-8')
+    out.append(_u16.pack(len(b)))
+    out.append(b)
+
+
+def item_key(i: item.Item):
+    return catalog.Catalog.key(i)
+
+
+def pack_item(out: list, i: item.Item):
+    """Append a single item (its catalog ID or definition) to out."""
+    item_id = catalog.items.stable_id(i)
+    if item_id is not None:
+        out.append(bytes((CATALOG,)))
+        out.append(_u32.pack(item_id))
+        return
+    if isinstance(i, item.Equipment):
+        out.append(bytes((EQUIPMENT64,)))
+        pack_str(out, type(i).__name__)
+        pack_str(out, i.name)
+        s = i.slot.slot_id if isinstance(i.slot, item.Slot) else int(i.slot)
+        out.append(_equip.pack(i.item_id, s, *i.bonus.values(),
+                               float(i.material.material_tier)))
+        pack_str(out, i.material.material_type or "")
+        valid = [v.slot_id if isinstance(v, item.Slot) else v
+                 for v in i.material.valid]
+        out.append(_u16.pack(len(valid)))
+        out.append(struct.pack(f'<{len(valid)}i', *valid))
+        return
+    out.append(bytes((FISH if isinstance(i, fish.Fish) else ITEM,)))
+    pack_str(out, i.name)
+    out.append(_i64.pack(i.value))
+
+
+def read_item(r: Reader) -> dict:
+    """Read an item definition written by :func:`pack_item()`."""
+    (kind,) = r.unpack(_u8)
+    if kind == CATALOG:
+        (item_id,) = r.unpack(_u32)
+        return {'kind': kind, 'id': item_id}
+    if kind == EQUIPMENT or kind == EQUIPMENT64:
+        cls = r.str()
+        name = r.str()
+        (item_id, slot_id, st, ag, it, ch, co, lu, tier) = r.unpack(
+            _equip if kind == EQUIPMENT64 else _equip32)
+        mat = r.str()
+        (n,) = r.unpack(_u16)
+        valid = list(r.unpack(struct.Struct(f'<{n}i')))
+        return {'kind': kind, 'cls': cls, 'name': name, 'item_id': item_id,
+                'slot': slot_id, 'stats': (st, ag, it, ch, co, lu),
+                'material': mat, 'tier': tier, 'valid': valid}
+    if kind not in (ITEM, FISH):
+        raise CodecError(f"unknown item kind {kind}")
+    name = r.str()
+    (value,) = r.unpack(_i64)
+    return {'kind': kind, 'name': name, 'value': value}
+
+
+def build_item(d: dict) -> item.Item:
+    """
+    Return the item described by a dict from :func:`read_item()`.
+
+    Fish and plain items are interned, equipment is a new object.
+    """
+    if d['kind'] == CATALOG:
+        try:
+            return catalog.items.get(d['id'])
+        except KeyError:
+            raise CodecError(f"unknown item id {d['id']}")
+    if d['kind'] == FISH:
+        return catalog.items.intern(fish.Fish(d['name'], d['value']))
+    if d['kind'] == ITEM:
+        return catalog.items.intern(item.Item(d['name'], d['value']))
+    cls = getattr(item, d['cls'], item.Equipment)
+    if not (isinstance(cls, type) and issubclass(cls, item.Equipment)):
+        cls = item.Equipment
+    # skip __init__, the stored item was already validated when created
+    e = cls.__new__(cls)
+    e._name = d['name']
+    e._item_id = d['item_id']
+    e._slot = item.Slot(d['slot'])
+    e._bonus = character.Stats(*d['stats'])
+    tier = d['tier']
+    e._material = item.Material(d['material'], int(tier) if tier.is_integer() else tier,
+                                slots=d['valid'])
+    return e
+
+
+def encode(c: character.Character) -> bytes:
+    """
+    Encode a character in the current format version.
+
+    Parameters
+    ----------
+    c:  :class:`character.Character`
+        The character to encode.
+
+    Raises
+    ------
+    CodecError:
+        A value does not fit its field.
+    """
+    try:
+        return _encode(c)
+    except struct.error as e:
+        raise CodecError(f"cannot encode {c.name} ({e})")
+
+
+def _encode(c: character.Character) -> bytes:
+    out = [MAGIC, bytes((VERSION,))]
+    pack_str(out, c.name)
+    pack_str(out, c._bt_class.name)
+    s = c.stats
+    out.append(_stats.pack(*s.values()))
+    out.append(_level.pack(c.level, c.experience))
+    out.append(_health.pack(c.health.base_hp, c.health.max_hp, c.health.cur_hp))
+    out.append(_i64.pack(c.inventory.gold))
+
+    table = {}
+    defs = []
+    counts = {}
+
+    def index_of(i):
+        # equipment is mutable, every object gets its own entry so an
+        # equipped piece and an equal one in the bags stay separate objects
+        k = id(i) if isinstance(i, item.Equipment) else item_key(i)
+        idx = table.get(k)
+        if idx is None:
+            idx = len(defs)
+            table[k] = idx
+            defs.append(i)
+        return idx
+
+    for i, n in c.inventory.counts.items():
+        idx = index_of(i)
+        counts[idx] = counts.get(idx, 0) + n
+    gear = []
+    for g in c.gear:
+        gear.append(-1 if g is None else index_of(g))
+
+    out.append(_u32.pack(len(defs)))
+    for d in defs:
+        pack_item(out, d)
+    out.append(_u32.pack(len(counts)))
+    for idx, n in counts.items():
+        out.append(_pair.pack(idx, n))
+    out.append(_gear.pack(*gear))
+    pool, started = c.idle_fishing or ('', 0.0)
+    pack_str(out, pool)
+    out.append(_f64.pack(started))
+    return b''.join(out)
+
+
+def _read_v1(r: Reader, stats: struct.Struct = _stats32,
+             health: struct.Struct = _health32) -> dict:
+    doc = {}
+    doc['name'] = r.str()
+    doc['class'] = r.str()
+    doc['stats'] = r.unpack(stats)
+    doc['level'], doc['exp'] = r.unpack(_level)
+    doc['health'] = r.unpack(health)
+    (doc['gold'],) = r.unpack(_i64)
+    (n,) = r.unpack(_u32)
+    doc['items'] = [read_item(r) for _ in range(n)]
+    (n,) = r.unpack(_u32)
+    doc['inventory'] = [r.unpack(_pair) for _ in range(n)]
+    doc['gear'] = r.unpack(_gear)
+    return doc
+
+
+def _read_v2(r: Reader) -> dict:
+    # same layout, v2 only adds the CATALOG item kind (see read_item)
+    return _read_v1(r)
+
+
+def _read_v3(r: Reader, stats: struct.Struct = _stats32,
+             health: struct.Struct = _health32) -> dict:
+    doc = _read_v1(r, stats, health)
+    pool = r.str()
+    (started,) = r.unpack(_f64)
+    doc['idle'] = (pool, started) if pool else None
+    return doc
+
+
+def _read_v4(r: Reader) -> dict:
+    # v3 with int64 stats and health
+    return _read_v3(r, _stats, _health)
+
+
+def _v1_to_v2(doc: dict) -> dict:
+    return doc
+
+
+def _v2_to_v3(doc: dict) -> dict:
+    doc['idle'] = None
+    return doc
+
+
+def _v3_to_v4(doc: dict) -> dict:
+    return doc
+
+
+readers = {
+    1: _read_v1,
+    2: _read_v2,
+    3: _read_v3,
+    4: _read_v4,
+}
+"""Format version -> function reading that version into a dict."""
+
+migrations = {
+    1: _v1_to_v2,
+    2: _v2_to_v3,
+    3: _v3_to_v4,
+}
+"""
+Format version -> function upgrading a decoded dict from that version to
+the next one. Applied in order until the dict matches `VERSION`.
+"""
+
+
+def _build(doc: dict) -> character.Character:
+    cls = _classes.get(doc['class'])
+    if cls is None:
+        raise CodecError(f"unknown class {doc['class']}")
+    bt_class = cls()
+    bt_class.stats = character.Stats(*doc['stats'])
+    health = character.Health()
+    health.base_hp, health.max_hp, health.cur_hp = doc['health']
+    items = [build_item(d) for d in doc['items']]
+    gear = character.Gear()
+    for pos, i in enumerate(doc['gear']):
+        if i >= 0:
+            gear[pos] = items[i]
+    c = character.Character(doc['name'],
+                            level=character.Level(doc['level'], doc['exp']),
+                            gear_block=gear,
+                            class_choice=bt_class,
+                            health=health)
+    c.inventory.coins = doc['gold']
+    for idx, n in doc['inventory']:
+        c.inventory._add(items[idx], n)
+    c._idle = doc['idle']
+    return c
+
+
+def decode(data: bytes) -> character.Character:
+    """
+    Decode a character written by :func:`encode()` (any version).
+
+    Data without the magic header is treated as a legacy pickle.
+
+    Raises
+    ------
+    CodecError:
+        If the data is truncated or from a newer, unknown version.
+    """
+    if not data.startswith(MAGIC):
+        return pickle.loads(data)
+    version = data[len(MAGIC)]
+    reader = readers.get(version)
+    if reader is None:
+        raise CodecError(f"unsupported character format version {version}")
+    doc = reader(Reader(data, len(MAGIC) + 1))
+    while version < VERSION:
+        doc = migrations[version](doc)
+        version += 1
+    return _build(doc)
@@ -13,6 +13,7 @@ data_dir        The location for file storage for the application. Serves as a
                     prefix for other file paths. (default = 'rpg-data')
 char_dir        The location to store character files. (default = 'character')
 active_dir      The location to store a user's active character. (default = 'active')
+manifest_dir    The location to store each user's character manifest. (default = 'manifest')
 file_ext        The file extension to use for all files. (default = 'pickle')
 envs            Environment variables for the application. DISCORD_TOKEN should be set here.
                     DISCORD_APP_ID and DISCORD_PERMS should also be set here if you want the
@@ -20,16 +21,72 @@ envs            Environment variables for the application. DISCORD_TOKEN should
 max_characters  The maximum number of characters a user may create
 debug_guilds    A list of guilds used for debugging. Should be removed in production.
 classes         A list of currently supported classes for the application
+storage         The storage backend for characters. Either 'pickle' for the
+                    file tree under data_dir or 'sqlite'. (default = 'pickle')
+sqlite_file     The database file (inside data_dir) used by the sqlite
+                    backend. (default = 'rpg-data.sqlite3')
+codec           How characters are serialized. 'binary' for the compact
+                    versioned format in `codec` or 'pickle'. Either format
+                    can always be read back. (default = 'binary')
+fsync           Sync character data to disk on every save (or every group
+                    commit). (default = True)
+group_commit_ms When > 0 saves are collected for this many milliseconds and
+                    committed together, sharing one transaction or
+                    one sync per directory, see
+                    `storage.GroupCommitter`. 0 disables group commit and
+                    saves are written back by the character cache instead.
+                    (default = 0)
+io_workers      The number of threads used for storage I/O by
+                    `char_cmds.store`. (default = 4)
+cache_size      The maximum number of characters kept in memory by
+                    `char_cmds.char_cache`. (default = 512)
+journal         Append small changes (items, gold, exp) to a per-character
+                    journal instead of rewriting the whole character, see
+                    `journal`. (default = True)
+journal_max_records
+                The number of journal records after which the next save
+                    writes a full snapshot. (default = 1000)
+journal_max_bytes
+                The journal size (bytes) after which the next save writes a
+                    full snapshot. (default = 65536)
+shard_depth     Levels of hash named directories (eg 'character/ab/cd/<user_id>')
+                    used to spread users out under char_dir, active_dir and
+                    manifest_dir. 0 keeps every user directly under them. Data
+                    from the flat layout is still found and can be moved with
+                    /migrate, see `storage.PickleStorage`. (default = 2)
+fishing_file    The JSON file defining fish species and fishing pools, see
+                    `fish.load_pools`. Relative paths are relative to the
+                    bot's code directory. (default = 'data/fishing.json')
+idle_interval   Seconds per fishing trip while idle fishing (/fishing start),
+                    see `fish.settle`. (default = 60)
+idle_cap        The most idle fishing time (seconds) counted at once, time
+                    past this is lost until the catch is collected by using
+                    the character. (default = 43200, 12 hours)
 """
 data = {
     'data_dir': 'rpg-data',
     'char_dir': 'character',
     'active_dir': 'active',
+    'manifest_dir': 'manifest',
     'file_ext': 'pickle',
     'envs': dotenv_values(".env"),
     'max_characters': 10,
     'debug_guilds': [1136708527797309500, 1139564692755447878],
-    'classes': ['warrior', 'rogue', 'wizard', 'villager', 'paladin', 'trader']
+    'classes': ['warrior', 'rogue', 'wizard', 'villager', 'paladin', 'trader'],
+    'cache_size': 512,
+    'storage': 'pickle',
+    'sqlite_file': 'rpg-data.sqlite3',
+    'io_workers': 4,
+    'codec': 'binary',
+    'fsync': True,
+    'group_commit_ms': 0,
+    'journal': True,
+    'journal_max_records': 1000,
+    'journal_max_bytes': 64 * 1024,
+    'shard_depth': 2,
+    'fishing_file': 'data/fishing.json',
+    'idle_interval': 60,
+    'idle_cap': 12 * 60 * 60
 }
 
 
@@ -69,3 +126,6 @@ def init_data():
     active_files_dir = f"{data_dir}/{data['active_dir']}"
     if not os.path.isdir(active_files_dir):
         os.makedirs(active_files_dir)
+    manifest_files_dir = f"{data_dir}/{data['manifest_dir']}"
+    if not os.path.isdir(manifest_files_dir):
+        os.makedirs(manifest_files_dir)
@@ -1,6 +1,66 @@
 import character
 import enemy
-import random
+import math
+from collections import namedtuple
+
+Outcome = namedtuple('Outcome', ['winner', 'player_hp', 'enemy_hp', 'rounds'])
+"""
+Result of a fight, see :func:`resolve()`. winner is 'player', 'enemy' or
+None for a stalemate, the hp values are what each side has left (0 or less
+for the loser) and rounds is the number of rounds fought.
+"""
+
+
+def _hits_to_kill(hp: float, damage: float) -> float:
+    """Hits of damage needed to take hp to 0 or less, inf if damage is 0."""
+    if hp <= 0:
+        return 0
+    if damage <= 0:
+        return math.inf
+    return math.ceil(hp / damage)
+
+
+def resolve(p_attack: float, p_defense: float, p_hp: float,
+            e_attack: float, e_defense: float, e_hp: float) -> Outcome:
+    """
+    Work out how a fight between a player and an enemy ends.
+
+    Each round the player hits first for p_attack - e_defense and, if the
+    enemy survives, the enemy hits back for e_attack - p_defense. Damage
+    below 0 counts as 0 (a strong defense does not heal you). Rather than
+    playing the rounds out the number of hits each side needs is computed
+    directly, so this costs the same however long the fight is.
+
+    Parameters
+    ----------
+    p_attack, p_defense, p_hp:  :type:`float`
+        The player's attack, defense and current hp.
+    e_attack, e_defense, e_hp:  :type:`float`
+        Likewise for the enemy.
+
+    Returns
+    -------
+    :class:`Outcome`
+        If neither side can hurt the other the fight is a stalemate, the
+        winner is None and no rounds are fought.
+    """
+    p_dmg = max(p_attack - e_defense, 0)
+    e_dmg = max(e_attack - p_defense, 0)
+    if p_hp <= 0 or e_hp <= 0:
+        winner = 'enemy' if p_hp <= 0 < e_hp else 'player'
+        if p_hp <= 0 and e_hp <= 0:
+            winner = None
+        return Outcome(winner, p_hp, e_hp, 0)
+    p_hits = _hits_to_kill(e_hp, p_dmg)
+    e_hits = _hits_to_kill(p_hp, e_dmg)
+    if p_hits == math.inf and e_hits == math.inf:
+        return Outcome(None, p_hp, e_hp, 0)
+    if p_hits <= e_hits:
+        # the player strikes first, so the enemy only hit back p_hits - 1 times
+        return Outcome('player', p_hp - (p_hits - 1) * e_dmg,
+                       e_hp - p_hits * p_dmg, p_hits)
+    return Outcome('enemy', p_hp - e_hits * e_dmg,
+                   e_hp - e_hits * p_dmg, e_hits)
 
 
 class Event:
@@ -9,23 +69,80 @@ class Event:
 
 
 class Battle(Event):
+    """
+    A fight between a character and an enemy.
+
+    Methods
+    -------
+    resolve():
+        Work out the :class:`Outcome` without changing either side.
+    combat(log):
+        Fight! Applies the outcome to both sides and returns the winner.
+    """
     def __init__(self, player: character.Character, enemy: enemy.Enemy):
         #  super.__init__(self)
         self.p = player
         self.e = enemy
         pass
 
-    def combat(self):
-        while self.p.hp.cur_hp > 0 and self.e.hp.cur_hp > 0:
-            p_attack = self.p.attack
-            e_attack = self.e.attack
-            p_defense = self.p.defense
-            e_defense = self.e.defense
-            p_cur_hp = self.p.hp.cur_hp
-            e_cur_hp = self.e.hp.cur_hp
-            self.e.hp.cur_hp = e_cur_hp - (p_attack - e_defense)
-            if self.e.hp.cur_hp <= 0:
+    def _sides(self) -> tuple:
+        """Each side's attack, defense and hp, read once."""
+        return (self.p.attack, self.p.defense, self.p.health.cur_hp,
+                self.e.attack, self.e.defense, self.e.health.cur_hp)
+
+    def resolve(self) -> Outcome:
+        """Return how the fight would end, see :func:`event.resolve()`."""
+        return resolve(*self._sides())
+
+    def combat(self, log: list = None):
+        """
+        Fight until one side is out of hp.
+
+        Both sides are left with the hp they had at the end of the fight
+        (rounded up, 0 for the loser).
+
+        Parameters
+        ----------
+        log:    :type:`list`
+            If given, a line describing each round is appended to it.
+
+        Returns
+        -------
+        The winning character or enemy, None for a stalemate.
+        """
+        sides = self._sides()
+        out = resolve(*sides)
+        if log is not None:
+            self._log(log, sides, out)
+        self.p.health.cur_hp = max(math.ceil(out.player_hp), 0)
+        self.e.health.cur_hp = max(math.ceil(out.enemy_hp), 0)
+        match out.winner:
+            case 'player':
                 return self.p
-            self.p.hp.cur_hp = p_cur_hp - (e_attack - p_defense)
-            if self.p.hp.cur_hp <= 0:
+            case 'enemy':
                 return self.e
+        return None
+
+    def _log(self, log: list, sides: tuple, out: Outcome):
+        """Describe each round of a resolved fight."""
+        p_attack, p_defense, p_hp, e_attack, e_defense, e_hp = sides
+        p_dmg = max(p_attack - e_defense, 0)
+        e_dmg = max(e_attack - p_defense, 0)
+        p_name = self.p.name
+        e_name = getattr(self.e, 'name', 'the enemy')
+        for n in range(1, out.rounds + 1):
+            left = e_hp - n * p_dmg
+            log.append(f"Round {n}: {p_name} hits {e_name} for {p_dmg:g} "
+                       f"({max(left, 0):g} hp left)")
+            if left <= 0:
+                break
+            left = p_hp - n * e_dmg
+            log.append(f"Round {n}: {e_name} hits {p_name} for {e_dmg:g} "
+                       f"({max(left, 0):g} hp left)")
+        match out.winner:
+            case 'player':
+                log.append(f"{p_name} wins!")
+            case 'enemy':
+                log.append(f"{e_name} wins!")
+            case None:
+                log.append("Neither side can hurt the other, it's a draw.")
@@ -1,14 +1,135 @@
+import json
+import os
 import random
+import time
+from bisect import bisect_right
+from collections import namedtuple
+import catalog
 import config
 import item
 
+try:
+    import numpy as np
+    _rng = np.random.default_rng()
+except ImportError:
+    # catch_counts() falls back to random, one bite at a time
+    np = None
+
+EXP_RATE = 6.5
+"""Experience for a catch is its value / EXP_RATE, see :func:`exp_for()`."""
+
+IdleCatch = namedtuple('IdleCatch',
+                       ['pool', 'trips', 'fish', 'value', 'exp', 'levels'])
+"""
+What an idle fishing session caught, see :func:`settle()`. fish is a
+:class:`Fish` -> count dict, value their total value and levels the number
+of levels the exp was worth.
+"""
+
+
+def exp_for(value: int) -> int:
+    """Experience for catching fish worth value."""
+    return int(value/EXP_RATE)
+
+
+class AliasTable:
+    """
+    Weighted random choice in constant time (Vose's alias method).
+
+    Built once from a list of weights. A draw picks a column uniformly
+    and then either that column or its alias with a single biased coin
+    flip, so it costs the same however many choices there are.
+
+    Attributes
+    ----------
+    prob:   :type:`list`
+        Chance of keeping each column rather than taking its alias.
+    alias:  :type:`list`
+        The other choice in each column.
+
+    Methods
+    -------
+    draw():
+        Return the index of one weighted choice.
+    draw_many(n):
+        Return n choices as a numpy array (needs numpy).
+    """
+
+    def __init__(self, weights: list):
+        """
+        Raises
+        ------
+        ValueError:
+            If weights is empty, or has a negative weight or none above 0.
+        """
+        n = len(weights)
+        total = sum(weights)
+        if n == 0 or total <= 0 or min(weights) < 0:
+            raise ValueError("weights must be >= 0 with at least one > 0")
+        scaled = [w * n / total for w in weights]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        while small and large:
+            s = small.pop()
+            g = large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = g
+            scaled[g] -= 1 - scaled[s]
+            (small if scaled[g] < 1 else large).append(g)
+        # anything left over is 1 give or take rounding error
+        if np is not None:
+            self._prob = np.array(self.prob)
+            self._alias = np.array(self.alias)
+
+    def __len__(self):
+        return len(self.prob)
+
+    def draw(self) -> int:
+        i = random.randrange(len(self.prob))
+        return i if random.random() < self.prob[i] else self.alias[i]
+
+    def draw_many(self, n: int):
+        i = _rng.integers(0, len(self.prob), size=n)
+        return np.where(_rng.random(n) < self._prob[i], i, self._alias[i])
+
 
 class FishingPool:
-    def __init__(self, name: str = "lake", fish: list = [], diff: int = 10,  min_level: int = 0):
+    """
+    Somewhere to go fishing.
+
+    Each trip gets `bites` bites. Each bite is one species, picked by its
+    weight in the pool, and catches 1 to max(luck/10, 2) of it, doubled
+    on a crit (see `config.crit`).
+
+    Attributes
+    ----------
+    name:           :type:`str`
+        The pool's name.
+    avail_fish:     :type:`list`
+        The :class:`Fish` that live here.
+    weights:        :type:`list`
+        Relative chance of each fish biting, in `avail_fish` order.
+    bites:          :type:`int`
+        Bites per trip.
+    difficulty:     :type:`int`
+        Crit difficulty.
+    min_level:      :type:`int`
+        The level a character needs to fish here.
+    """
+    BATCH = 8
+    """Fewer attempts than this are cheaper to roll without numpy."""
+
+    def __init__(self, name: str = "lake", fish: list = [], diff: int = 10,
+                 min_level: int = 0, weights: list = None, bites: int = None):
         self.avail_fish = fish
         self.name = name
         self.difficulty = diff
         self.min_level = min_level
+        self.weights = [1] * len(fish) if weights is None else list(weights)
+        self.bites = len(fish) if bites is None else bites
+        self.table = AliasTable(self.weights)
 
     def go_fishing(self, luck: int = 0, fishing_rod: item.Equipment = None):
         caught = []
@@ -16,7 +137,8 @@ class FishingPool:
         luck_bonus = int(luck*0.1)
         min_caught = 1
         max_caught = max(luck_bonus, 2)
-        for f in self.avail_fish:
+        for _ in range(self.bites):
+            f = self.avail_fish[self.table.draw()]
             crit = config.crit(diff=self.difficulty, luck=luck)
             if fishing_rod is not None:
                 # get bonus from fishing rod
@@ -28,6 +150,173 @@ class FishingPool:
                 caught.append(f)
         return caught
 
+    def _bounds(self, luck: int) -> tuple:
+        """(max caught per bite, lowest d20 roll that crits) for luck."""
+        if not isinstance(luck, int):
+            raise TypeError("crit this Sussy")
+        # same check as config.crit(): roll + luck/2 >= diff + 10
+        return max(int(luck*0.1), 2), self.difficulty + 10 - luck/2
+
+    def roll(self, luck: int = 0, attempts: int = 1):
+        """
+        Roll attempts fishing trips at once.
+
+        Draws every bite, catch size and crit for every trip in one go
+        (needs numpy). The odds are the same as :func:`go_fishing()`.
+
+        Parameters
+        ----------
+        luck:       :type:`int`
+            The character's luck.
+        attempts:   :type:`int`
+            How many trips.
+
+        Returns
+        -------
+        A :class:`numpy.ndarray` of shape (attempts, len(avail_fish)), how
+        many of each species each trip caught.
+        """
+        max_caught, crit_at = self._bounds(luck)
+        n = attempts * self.bites
+        species = self.table.draw_many(n)
+        caught = _rng.integers(1, max_caught + 1, size=n)
+        caught <<= _rng.integers(1, 21, size=n) >= crit_at
+        k = len(self.avail_fish)
+        trip = np.arange(n) // self.bites
+        return np.bincount(trip * k + species, weights=caught,
+                           minlength=attempts * k
+                           ).astype(np.int64).reshape(attempts, k)
+
+    def catch_counts(self, luck: int = 0,
+                     fishing_rod: item.Equipment = None,
+                     attempts: int = 1) -> dict:
+        """
+        Go fishing attempts times and count the catch.
+
+        Like :func:`go_fishing()` but returns how many of each fish were
+        caught rather than a list with every fish in it, ready for
+        :func:`character.Inventory.add_many()`. `BATCH` or more attempts
+        are rolled together with :func:`roll()` when numpy is available.
+
+        Parameters
+        ----------
+        luck:           :type:`int`
+            The character's luck.
+        fishing_rod:    :class:`item.Equipment`
+            NYI
+        attempts:       :type:`int`
+            How many trips (eg auto-fishing). The totals of all of them
+            are returned.
+
+        Returns
+        -------
+        A dict of :class:`Fish` -> count for the fish that were caught, in
+        `avail_fish` order.
+        """
+        if np is not None and attempts >= self.BATCH:
+            totals = self.roll(luck, attempts).sum(axis=0).tolist()
+        else:
+            max_caught, crit_at = self._bounds(luck)
+            totals = [0] * len(self.avail_fish)
+            draw = self.table.draw
+            for _ in range(attempts * self.bites):
+                c = random.randint(1, max_caught)
+                totals[draw()] += c*2 if random.randint(1, 20) >= crit_at else c
+        return {f: n for f, n in zip(self.avail_fish, totals) if n}
+
+
+class PoolRegistry:
+    """
+    Every :class:`FishingPool`, indexed for lookups and autocomplete.
+
+    Everything is worked out when the registry is built. Lookups and
+    :func:`complete()` only index dicts and tuples built up front, they
+    never build a new list, so autocomplete can run on every keystroke.
+
+    Attributes
+    ----------
+    names:      :type:`tuple`
+        Every pool name, easiest (lowest min_level) first.
+
+    Methods
+    -------
+    get(name):
+        Return the pool called name (any case) or None.
+    usable(level):
+        Names of the pools a character of that level can fish in.
+    complete(prefix, level):
+        Names starting with prefix (any case), optionally only the pools
+        usable at level.
+    """
+
+    def __init__(self, pools: list):
+        """
+        Raises
+        ------
+        ValueError:
+            If two pools have the same name.
+        """
+        pools = sorted(pools, key=lambda p: (p.min_level, p.name))
+        self._pools = {}
+        for p in pools:
+            if p.name.casefold() in self._pools:
+                raise ValueError(f"there are two pools named {p.name}")
+            self._pools[p.name.casefold()] = p
+        self.names = tuple(p.name for p in pools)
+        self._levels = sorted({p.min_level for p in pools})
+        # prefix -> tuple with, for each number of min_levels reached (see
+        # _bucket()), the names with that prefix usable there
+        by_prefix = {}
+        for p in pools:
+            key = p.name.casefold()
+            for i in range(len(key) + 1):
+                by_prefix.setdefault(key[:i], []).append(p)
+        self._prefixes = {
+            k: tuple(tuple(p.name for p in v if p.min_level < limit)
+                     for limit in self._levels[1:] + [float('inf')])
+            for k, v in by_prefix.items()}
+        self._none = ((),) * len(self._levels)
+
+    def _bucket(self, level: int) -> int:
+        if level is None:
+            return len(self._levels) - 1
+        return bisect_right(self._levels, level) - 1
+
+    def get(self, name: str) -> FishingPool:
+        return self._pools.get(name.casefold())
+
+    def usable(self, level: int = None) -> tuple:
+        return self.complete('', level)
+
+    def complete(self, prefix: str = '', level: int = None) -> tuple:
+        """
+        Return the pool names starting with prefix, easiest first.
+
+        Parameters
+        ----------
+        prefix:     :type:`str`
+            What has been typed so far. Case is ignored.
+        level:      :type:`int`
+            Only offer pools a character of this level can use. None
+            offers every pool.
+        """
+        b = self._bucket(level)
+        if b < 0:
+            return ()
+        return self._prefixes.get(prefix.casefold(), self._none)[b]
+
+    def __getitem__(self, name: str) -> FishingPool:
+        return self._pools[name.casefold()]
+
+    def __contains__(self, name: str) -> bool:
+        return name.casefold() in self._pools
+
+    def __iter__(self):
+        return iter(self._pools.values())
+
+    def __len__(self):
+        return len(self._pools)
+
 
 class Fish(item.Item):
     def __init__(self, name: str = "cod", value: int = 1):
@@ -49,58 +338,197 @@ class Fish(item.Item):
             return False
 
 
-def build_pool(name: str = 'pond', difficulty: int = 10, min_lvl: int = 0, avail_fish: list = [], fish_dict: dict = {}):
+def build_pool(name: str = 'pond', difficulty: int = 10, min_lvl: int = 0,
+               avail_fish: list = [], fish_dict: dict = {},
+               weights: dict = None, bites: int = None):
+    """
+    Build a :class:`FishingPool` from species names.
+
+    Parameters
+    ----------
+    avail_fish:     :type:`list`
+        Names of the species in the pool.
+    fish_dict:      :type:`dict`
+        Species name -> value.
+    weights:        :type:`dict`
+        Species name -> weight (default 1).
+
+    Raises
+    ------
+    ValueError:
+        If a species in avail_fish is not in fish_dict.
+    """
     if not isinstance(avail_fish, list):
         raise TypeError("provide me a list buddy")
     if not isinstance(fish_dict, dict):
         raise TypeError("provide me a dict buddy")
-    out_list = []
-    for k, v in fish_dict.items():
-        if k in avail_fish:
-            out_list.append(Fish(k, v))
-    return FishingPool(name, out_list.copy(), difficulty, min_lvl)
-
-
-fish_dict = {
-    "Salmon": 7,
-    "Tuna": 10,
-    "Cod": 3,
-    "Trout": 5,
-    "Bass": 3,
-    "Catfish": 5,
-    "Mahi Mahi": 25,
-    "Snapper": 5,
-    "Swordfish": 10,
-    "Haddock": 5,
-    "Grouper": 8,
-    "Perch": 4,
-    "Mackerel": 3,
-    "Tilapia": 6,
-    "Carp": 4,
-    "Pike": 7,
-    "Anchovy": 1,
-    "Sardine": 1,
-    "Flounder": 4,
-    "Halibut": 5,
-    "Bluegill": 1,
-    "Walleye": 6
-}
-pond_fish = ['Cod', 'Bass', 'Bluegill']
-river_fish = ['Bluegill', 'Bass', 'Catfish', 'Trout', 'Perch', 'Pike']
-lake_fish = ['Bass', 'Catfish', 'Pike', 'Walleye', 'Perch', 'Carp', 'Sturgeon', 'Bluegill']
-fishing_pools = []
-fishing_pools.append(build_pool(name='pond',
-                                difficulty=8,
-                                avail_fish=pond_fish,
-                                fish_dict=fish_dict,
-                                min_lvl=0))
-fishing_pools.append(build_pool(name='river',
-                                difficulty=10,
-                                avail_fish=river_fish,
-                                fish_dict=fish_dict,
-                                min_lvl=3))
-fishing_pools.append(build_pool(name='lake',
-                                difficulty=12,
-                                avail_fish=lake_fish,
-                                fish_dict=fish_dict,
-                                min_lvl=5))
+    missing = [k for k in avail_fish if k not in fish_dict]
+    if missing:
+        raise ValueError(f"pool {name} has unknown species: "
+                         f"{', '.join(missing)}")
+    weights = weights or {}
+    out_list = [catalog.items.intern(Fish(k, fish_dict[k])) for k in avail_fish]
+    return FishingPool(name, out_list, difficulty, min_lvl,
+                       weights=[weights.get(k, 1) for k in avail_fish],
+                       bites=bites)
+
+
+def load_pools(path: str = None) -> tuple:
+    """
+    Load the species and fishing pools from a JSON data file.
+
+    Every species is registered in `catalog.items` under its ID. The file
+    looks like
+
+        {"species": {"Cod": {"id": 3, "value": 3, "weight": 10}, ...},
+         "pools": [{"name": "pond", "difficulty": 8, "min_level": 0,
+                    "bites": 3, "fish": ["Cod", ["Bass", 20], ...]}, ...]}
+
+    A pool's fish are species names, or [name, weight] to override the
+    species' weight in that pool. bites defaults to the number of fish.
+
+    Parameters
+    ----------
+    path:   :type:`str`
+        The file to read (default config.data['fishing_file']).
+
+    Returns
+    -------
+    (species, pools):
+        Species name -> its data, and the list of :class:`FishingPool`.
+
+    Raises
+    ------
+    ValueError:
+        Listing every problem found, eg pools with species that are not
+        defined.
+    """
+    if path is None:
+        path = config.data['fishing_file']
+        if not os.path.isabs(path):
+            path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                path)
+    with open(path) as f:
+        doc = json.load(f)
+    species = doc.get('species', {})
+    errors = []
+    ids = {}
+    for name, s in species.items():
+        for key in ('id', 'value'):
+            if not isinstance(s.get(key), int):
+                errors.append(f"species {name} needs an integer {key}")
+        if s.get('id') in ids:
+            errors.append(f"species {name} and {ids[s['id']]} share id "
+                          f"{s['id']}")
+        ids[s.get('id')] = name
+        if s.get('weight', 1) <= 0:
+            errors.append(f"species {name} needs a weight > 0")
+    pools = []
+    for p in doc.get('pools', []):
+        entries = [(e, None) if isinstance(e, str) else tuple(e)
+                   for e in p.get('fish', [])]
+        missing = [n for n, _ in entries if n not in species]
+        if missing:
+            errors.append(f"pool {p.get('name')} has unknown species: "
+                          f"{', '.join(missing)}")
+        if not entries:
+            errors.append(f"pool {p.get('name')} has no fish")
+        if any(w is not None and w <= 0 for _, w in entries):
+            errors.append(f"pool {p.get('name')} needs weights > 0")
+        pools.append((p, entries))
+    if errors:
+        raise ValueError(f"bad fishing data in {path}:\n" + "\n".join(errors))
+
+    for name, s in species.items():
+        catalog.items.register(Fish(name, s['value']), s['id'])
+    out = []
+    for p, entries in pools:
+        out.append(build_pool(
+            name=p['name'],
+            difficulty=p.get('difficulty', 10),
+            min_lvl=p.get('min_level', 0),
+            avail_fish=[n for n, _ in entries],
+            fish_dict={n: species[n]['value'] for n, _ in entries},
+            weights={n: species[n].get('weight', 1) if w is None else w
+                     for n, w in entries},
+            bites=p.get('bites')))
+    return species, out
+
+
+species, fishing_pools = load_pools()
+pools = PoolRegistry(fishing_pools)
+fish_dict = {k: v['value'] for k, v in species.items()}
+fish_ids = {k: v['id'] for k, v in species.items()}
+"""
+Species name -> value and `catalog` ID. Saved characters refer to fish by
+their ID, so never reuse or renumber one in the data file, only add new
+IDs.
+"""
+
+
+def settle(c, now: float = None) -> IdleCatch:
+    """
+    Hand out what a character's idle fishing session caught so far.
+
+    Nothing runs while a character is idle fishing, the session is only a
+    pool name and a start time. Here every whole config.data['idle_interval']
+    since the start counts as one trip, all of them are rolled in one batch
+    (:func:`FishingPool.catch_counts()`), the fish and exp are added and
+    the start moves past the trips counted. Time beyond
+    config.data['idle_cap'] seconds is not counted. Called whenever the
+    character is loaded to be used, see `char_cmds.AsyncStore.active()`.
+
+    The catch is also added to c._idle_catch (not saved) so the next
+    command can tell the player about it.
+
+    Parameters
+    ----------
+    c:      :class:`character.Character`
+        The character, with its lock held.
+    now:    :type:`float`
+        The current unix time (default time.time()).
+
+    Returns
+    -------
+    :class:`IdleCatch`:
+        If any trips were counted.
+    None:
+        If the character is not idle fishing or no trip has finished yet.
+    """
+    session = c.idle_fishing
+    if session is None:
+        return None
+    name, started = session
+    pool = pools.get(name)
+    if pool is None:
+        # the pool was removed from the fishing data
+        c.stop_idle()
+        return None
+    now = time.time() if now is None else now
+    interval = config.data['idle_interval']
+    elapsed = now - started
+    if elapsed > config.data['idle_cap']:
+        started = now - config.data['idle_cap']
+        elapsed = config.data['idle_cap']
+    trips = int(elapsed // interval)
+    if trips <= 0:
+        return None
+    caught = pool.catch_counts(c.luck, None, attempts=trips)
+    c.inventory.add_many(caught)
+    value = sum(f.value*n for f, n in caught.items())
+    exp = exp_for(value)
+    levels = c.gain_exp(exp)
+    c.start_idle(name, started + trips*interval)
+
+    out = IdleCatch(pool.name, trips, caught, value, exp, levels)
+    prev = c._idle_catch
+    if prev is not None:
+        merged = dict(prev.fish)
+        for f, n in caught.items():
+            merged[f] = merged.get(f, 0) + n
+        c._idle_catch = IdleCatch(pool.name, prev.trips + trips, merged,
+                                  prev.value + value, prev.exp + exp,
+                                  prev.levels + levels)
+    else:
+        c._idle_catch = out
+    return out
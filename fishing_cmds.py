@@ -1,9 +1,8 @@
-from collections import Counter
+import time
 
 import discord
 import fish
-from char_cmds import get_active
-from char_cmds import save_char
+from char_cmds import char_cache, store
 from discord import SlashCommandGroup
 from discord.ext import commands
 
@@ -23,20 +22,20 @@ class Fishing(commands.Cog):
 
     def get_fishing_holes(ctx: discord.AutocompleteContext):
         """
-        Return a list of valid fishing pools based on the data available in `fish`
+        Return the fishing pools matching what has been typed so far.
 
-        Checks the fish.fishing_pools list for FishingPool objects, grabs
-        their name, and constructs a list from the found objects. Used in
-        the `catch` command for auto-filling the possible options.
+        Served from the precomputed `fish.pools` index, nothing is built per
+        keystroke. If the user's active character is in the cache only the
+        pools they are high enough level for are offered, otherwise all of
+        them (autocomplete never loads a character).
 
         Parameters
         ----------
         ctx     Context object provided by py-cord.
         """
-        out = []
-        for n in fish.fishing_pools:
-            out.append(f"{n.name}")
-        return out
+        me = char_cache.peek(ctx.interaction.user.id)
+        return fish.pools.complete(ctx.value or '',
+                                   None if me is None else me.level)
 
     @fishing_command_group.command(
         description="Go fishin'",
@@ -51,16 +50,18 @@ class Fishing(commands.Cog):
                     ctx: discord.ApplicationContext,
                     where: discord.Option(str,
                                           description="Where do you want to go fishing?",
-                                          autocomplete=discord.utils.basic_autocomplete(get_fishing_holes))):
+                                          autocomplete=get_fishing_holes)):
         """
         Go fishing!
 
         Attempt to catch some Fish from a FishingPool. The number of fish
         caught is dependent on the character's Luck stat currently. Fishing
-        rod's and other bonuses NYI. Calls the `go_fishing()` function to
+        rod's and other bonuses NYI. Calls the `catch_counts()` function to
         generate what fish and how many were caught. Value of each fish is
         summed and then used to determine how much experience the character
-        receives.
+        receives. The active character is locked until the catch is saved.
+        Characters that are idle fishing have to /fishing stop first, their
+        time is already being fished.
 
         Parameters
         ----------
@@ -68,32 +69,97 @@ class Fishing(commands.Cog):
 
         where   Which FishingPool you want to fish in.
         """
-        pool = None
-        for n in fish.fishing_pools:
-            if where == n.name:
-                pool = n
-                break
+        pool = fish.pools.get(where)
         if pool is None:
             raise ValueError("no fishing pool!")
-        me = get_active(ctx.author.id)
-        if me.level < n.min_level:
-            await ctx.respond("You are too low level for this area. Try"
-                              " somewhere easier first.")
-            return
-        feesh = pool.go_fishing(me.luck, None)
-        feesh_d = Counter(feesh)
-        exp_gained = 0
-        out_str = "```You caught\n--------\n"
-        for k, v in feesh_d.items():
-            out_str += f"{k.name} x{feesh_d[k]} ({k.value*feesh_d[k]} 💰)\n"
-            exp_gained += k.value*feesh_d[k]
-        for f in feesh:
-            me.inventory.add_item(f)
-        out_str += f"You gained {int(exp_gained/10)} experience!\n"
-        me.gain_exp(int(exp_gained/6.5))
-        save_char(ctx.author.id, me)
+        async with store.active(ctx.author.id) as me:
+            if me.idle_fishing is not None:
+                await ctx.respond(f"{idle_report(me)}"
+                                  f"```{me.name} is idle fishing the "
+                                  f"{me.idle_fishing[0]}. Use /fishing stop"
+                                  " to reel in first.```")
+                return
+            if me.level < pool.min_level:
+                await ctx.respond("You are too low level for this area. Try"
+                                  " somewhere easier first.")
+                return
+            feesh_d = pool.catch_counts(me.luck, None)
+            exp_gained = 0
+            out_str = "```You caught\n--------\n"
+            for k, v in feesh_d.items():
+                out_str += f"{k.name} x{feesh_d[k]} ({k.value*feesh_d[k]} 💰)\n"
+                exp_gained += k.value*feesh_d[k]
+            me.inventory.add_many(feesh_d)
+            exp_gained = fish.exp_for(exp_gained)
+            out_str += f"You gained {exp_gained} experience!\n"
+            if me.gain_exp(exp_gained):
+                out_str += f"You reached level {me.level}!\n"
+            await store.save(ctx.author.id, me)
         await ctx.respond(f"{out_str}```")
 
+    @fishing_command_group.command(
+        description="Go idle fishing.",
+        help="Keep fishing while you are away, until /fishing stop"
+    )
+    async def start(self,
+                    ctx: discord.ApplicationContext,
+                    where: discord.Option(str,
+                                          description="Where do you want to go fishing?",
+                                          autocomplete=get_fishing_holes)):
+        """
+        Start idle fishing.
+
+        Only the pool and the start time are saved. The fish and exp are
+        worked out in one go the next time the character is used (see
+        `fish.settle()`), a trip every config.data['idle_interval'] seconds.
+        Starting again moves the session to the new pool after handing out
+        what the old one caught, starting again at the same pool keeps the
+        session (and the time towards the next trip) as it is.
+
+        Parameters
+        ----------
+        ctx     The discord context object for the command
+
+        where   Which FishingPool you want to fish in.
+        """
+        pool = fish.pools.get(where)
+        if pool is None:
+            raise ValueError("no fishing pool!")
+        async with store.active(ctx.author.id) as me:
+            if me.level < pool.min_level:
+                out_str = "```You are too low level for this area. Try"\
+                          " somewhere easier first.```"
+            elif me.idle_fishing is not None \
+                    and me.idle_fishing[0] == pool.name:
+                out_str = idle_report(me)
+                out_str += f"```{me.name} is already fishing the "\
+                           f"{pool.name}. Use /fishing stop to reel in.```"
+            else:
+                out_str = idle_report(me)
+                me.start_idle(pool.name, time.time())
+                await store.save(ctx.author.id, me)
+                out_str += f"```{me.name} settles in to fish the "\
+                           f"{pool.name}. Use /fishing stop to reel in.```"
+        await ctx.respond(out_str)
+
+    @fishing_command_group.command(
+        description="Stop idle fishing.",
+        help="Stop idle fishing and see what you caught"
+    )
+    async def stop(self, ctx: discord.ApplicationContext):
+        """
+        Stop idle fishing and report the catch since it was last reported.
+        """
+        async with store.active(ctx.author.id) as me:
+            if me.idle_fishing is None:
+                out_str = "```You aren't fishing. Use /fishing start.```"
+            else:
+                me.stop_idle()
+                await store.save(ctx.author.id, me)
+                out_str = idle_report(me) or "```You didn't catch anything"\
+                                             " this time.```"
+        await ctx.respond(out_str)
+
     @fishing_command_group.command(
         description="Sell your fish.",
     )
@@ -101,39 +167,43 @@ class Fishing(commands.Cog):
                        type=discord.ext.commands.BucketType.user)
     async def sell(self,
                    ctx: discord.ApplicationContext,
-                   what: str = "all"):
+                   what: discord.Option(str,
+                                        description="'all' or a kind of fish",
+                                        default="all"),
+                   amount: discord.Option(int,
+                                          description="How many to sell"
+                                          " (default all of them)",
+                                          min_value=1,
+                                          required=False,
+                                          default=None)):
         """
         Sell off the fish you caught.
 
-        Inspects the character's backpack and looks for Fish items. Any that
-        are found are added to a list. Items in that list are then iterated
-        over and passed into `Inventory.del_item()` to remove them from the
-        inventory.
+        The active character is locked (see `char_cmds.store.active()`) until
+        the sale is saved.
 
-        This function may be better suited within `character.Inventory`
-        and would then become something like
-            /inventory sell fish or /inventory sell fish all
+        The fish are taken out and paid for in one
+        `character.Inventory.sell()` call, priced from the inventory's
+        running totals.
 
         Parameters
         ----------
         ctx     The discord context object for the command
 
-        what    NYI -- Eventually a selector for certain objects to sell.
-        """
-        me = get_active(ctx.author.id)
-        to_sell = []
-        for f in me.inventory:
-            if isinstance(f, fish.Fish):
-                to_sell.append(f)
-        gold_gained = 0
-        fish_sold = 0
-        for s in to_sell:
-            fish_sold += 1
-            gold_gained += s.value
-        for s in to_sell:
-            me.inventory.del_item(s)
-        me.inventory.change_gold(gold_gained)
-        save_char(ctx.author.id, me)
+        what    'all' for every fish, or the name of a species to sell.
+
+        amount  Sell at most this many (default all).
+        """
+        species = None if what.casefold() == "all" else what
+        async with store.active(ctx.author.id) as me:
+            fish_sold, gold_gained = me.inventory.sell(fish.Fish, species,
+                                                       amount)
+            if fish_sold:
+                await store.save(ctx.author.id, me)
+        if not fish_sold:
+            what_str = "fish" if species is None else species
+            await ctx.respond(f"```You don't have any {what_str} to sell!```")
+            return
         out_str = f"```You sold {fish_sold} fish and"\
                   f" gained {gold_gained} gold!```"
         await ctx.respond(out_str)
@@ -149,11 +219,15 @@ class Fishing(commands.Cog):
         """
         out_str = "```Available Fishing Holes\n"\
                   "-----------------------\n"
-        for n in fish.fishing_pools:
+        for n in fish.pools:
             out_str += f"{n.name} (Lv. {n.min_level})\n"
         out_str = out_str[0:len(out_str)-1]+"```"
         await ctx.respond(out_str)
 
+    @start.error
+    async def start_error(self, ctx, error):
+        await self.catch_error(ctx, error)
+
     @catch.error
     async def catch_error(self, ctx, error):
         """
@@ -170,3 +244,23 @@ class Fishing(commands.Cog):
                 await ctx.respond(msg)
         else:
             raise error
+
+
+def idle_report(c) -> str:
+    """
+    Describe the idle fishing catch not reported yet (see `fish.settle()`).
+
+    Returns an empty string if there is none.
+    """
+    got = c._idle_catch
+    if got is None:
+        return ""
+    c._idle_catch = None
+    out_str = f"```While idle fishing the {got.pool} you caught\n"\
+              "--------\n"
+    for k, v in got.fish.items():
+        out_str += f"{k.name} x{v} ({k.value*v} 💰)\n"
+    out_str += f"You gained {got.exp} experience!\n"
+    if got.levels:
+        out_str += f"You reached level {c.level}!\n"
+    return out_str + "```"
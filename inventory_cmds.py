@@ -1,12 +1,92 @@
-from collections import Counter
+import math
 
 import character
 import discord
-from char_cmds import get_active
+from char_cmds import store
 from discord import SlashCommandGroup
 from discord.ext import commands
 
 
+PAGE_LINES = 20
+"""
+Items per page of /inventory list. Lines are at most NAME_WIDTH plus ~25
+characters, keeping a page well under Discord's 2000 character limit.
+"""
+NAME_WIDTH = 32
+
+SORTS = {
+    'value': lambda e: (-getattr(e[0], 'value', 0) * e[1], e[0].name),
+    'name': lambda e: (e[0].name.casefold(), -e[1]),
+    'count': lambda e: (-e[1], e[0].name),
+}
+"""Sort option -> key for the (item, count) pairs of an inventory."""
+
+
+class InventoryPages:
+    """
+    The pages of one inventory listing in one sort order.
+
+    The items are sorted once, each page is only formatted the first time
+    it is asked for. Stale as soon as the inventory's version changes, see
+    :func:`pages()`.
+
+    Attributes
+    ----------
+    version:    :type:`int`
+        `character.Inventory.version` the pages were made from.
+    """
+    __slots__ = ('version', '_entries', '_pages')
+
+    def __init__(self, inv: character.Inventory, sort: str = 'value'):
+        self.version = inv.version
+        self._entries = sorted(inv.counts.items(), key=SORTS[sort])
+        self._pages = {}
+
+    def __len__(self):
+        return max(math.ceil(len(self._entries) / PAGE_LINES), 1)
+
+    def page(self, n: int) -> str:
+        """Return page n (from 0), rendering it on first use."""
+        out = self._pages.get(n)
+        if out is None:
+            lines = []
+            for i, count in self._entries[n*PAGE_LINES:(n+1)*PAGE_LINES]:
+                name = i.name if len(i.name) <= NAME_WIDTH \
+                    else i.name[:NAME_WIDTH-1] + "…"
+                lines.append(f"{name:<{NAME_WIDTH}} x{count:<7}"
+                             f"{getattr(i, 'value', 0) * count}")
+            out = self._pages[n] = "\n".join(lines)
+        return out
+
+    def __iter__(self):
+        """Yield every page in order, rendering them as they are reached."""
+        for n in range(len(self)):
+            yield self.page(n)
+
+
+def pages(inv: character.Inventory, sort: str = 'value') -> InventoryPages:
+    """
+    Return the (cached) pages listing inv in the given sort order.
+
+    The pages are kept on the inventory (not saved) and reused until its
+    version changes.
+
+    Raises
+    ------
+    KeyError:
+        If sort is not one of `SORTS`.
+    """
+    if sort not in SORTS:
+        raise KeyError(f"unknown sort {sort}")
+    cache = inv._pages
+    if cache is None:
+        cache = inv._pages = {}
+    p = cache.get(sort)
+    if p is None or p.version != inv.version:
+        p = cache[sort] = InventoryPages(inv, sort)
+    return p
+
+
 class inventoryCommands(commands.Cog):
     """
     Inventory Commands Cog
@@ -27,42 +107,45 @@ class inventoryCommands(commands.Cog):
 
     @inventory_command_group.command(
         description="Check your inventory.",
-        help="List the contents of your inventory out.",
+        help="List the contents of your inventory out, a page at a time.",
         brief="What in the bag?"
     )
-    async def list(self, ctx: discord.ApplicationContext):
+    async def list(self, ctx: discord.ApplicationContext,
+                   sort: discord.Option(str,
+                                        description="Order to list items in",
+                                        choices=[*SORTS],
+                                        default='value'),
+                   page: discord.Option(int,
+                                        description="Which page to show",
+                                        min_value=1,
+                                        default=1)):
         """
-        Print out the contents of the character's inventory.
+        Print out a page of the contents of the character's inventory.
+
+        Pages are rendered on demand and cached until the inventory changes
+        (see :func:`pages()`), so paging through an unchanged bag is free.
 
         Parameters
         ----------
         ctx     The discord context object for the command
+
+        sort    'value' (most valuable stack first), 'name' or 'count'.
+
+        page    The page to show, starting at 1.
         """
-        me = get_active(ctx.author.id)
-        if me.inventory.is_empty:
+        async with store.active(ctx.author.id) as me:
+            if me.inventory.is_empty:
+                out_str = None
+            else:
+                p = pages(me.inventory, sort)
+                page = min(page, len(p))
+                out_str = "```Inventory Contents (item, # held, value)\n"\
+                          "----------------------------------------\n"\
+                          f"{p.page(page - 1)}\n"\
+                          f"Page {page}/{len(p)}, {me.inventory.total} items"\
+                          f" worth {me.inventory.value} 💰```"
+        if out_str is None:
             await ctx.respond("```Your inventory is empty!```")
             return
-        out_str = "```Inventory Contents (item, # held)\n"\
-                  "----------------------------------\n"\
-                  f"{get_inv_contents(me)}"
-        out_str += "```"
         await ctx.respond(out_str)
         return
-
-
-def get_inv_contents(c: character.Character) -> str:
-    """
-    Return a string with inventory contents and the # of each item.
-
-    Inspects the inventory contents for the user's active character and returns
-    them as a string 'item name, item count'
-
-    Parameters
-    ----------
-    user_id     The user's Discord ID (eg ctx.author.id
-    """
-    count = Counter(c.inventory)
-    out_str = ""
-    for v in count.keys():
-        out_str += f"{v.name}, {count[v]}\n"
-    return out_str[0:len(out_str)-1]
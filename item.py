@@ -1,3 +1,7 @@
+import catalog
+from stats import Stats
+
+
 class Item:
     def __init__(self, name: str, value: int = 0):
         self.name = name
@@ -12,6 +16,16 @@ class Item:
         else:
             return self.name == other.name
 
+    def __hash__(self):
+        return hash(self.name)
+
+    def __reduce_ex__(self, protocol):
+        # catalogued items pickle as their ID and unpickle as the shared object
+        item_id = catalog.items.stable_id(self)
+        if item_id is not None:
+            return (catalog.lookup, (item_id,))
+        return super().__reduce_ex__(protocol)
+
     def __lt__(self, other):
         if not isinstance(other, Item):
             return False
@@ -135,30 +149,53 @@ class Material:
         """
         self._material_type = material_type
         self._material_tier = material_tier
-        self.valid = []
+        valid = []
         try:
             kwargs['slots']
         except KeyError:
             kwargs['slots'] = None
         if kwargs['slots'] is not None\
                 and isinstance(kwargs['slots'], list):
-            self.valid = kwargs['slots'].copy()
+            valid = kwargs['slots'].copy()
         else:
             for arg in args:
-                if isinstance(arg, str) and "all" in str:
+                if isinstance(arg, str) and "all" in arg:
                     for i in range(0, len(Slot.slots)):
-                        self.valid.append(i)
+                        valid.append(i)
                 if isinstance(arg, Slot):
-                    self.valid.append(Slot.slot_id)
+                    valid.append(arg.slot_id)
                 if isinstance(arg, list):
                     for e in arg:
                         if isinstance(e, Slot):
-                            self.valid.append(e)
-                if isinstance(arg, int) and arg in Slot.slots.values():
-                    self.valid.append(arg)
+                            valid.append(e)
+                if isinstance(arg, int) and arg in Slot.slots:
+                    valid.append(arg)
             temp = []
-            [temp.append(x) for x in self.valid if x not in temp]
-            self.valid = temp.copy()
+            [temp.append(x) for x in valid if x not in temp]
+            valid = temp
+        self.valid = valid
+
+    def __setstate__(self, state):
+        # pickled before the slot mask: 'valid' was a plain attribute
+        if 'valid' in state:
+            state['_valid'] = state.pop('valid')
+        self.__dict__.update(state)
+        self.valid = self._valid
+
+    @property
+    def valid(self) -> list:
+        return self._valid
+
+    @valid.setter
+    def valid(self, value: list):
+        self._valid = value
+        self._mask = 0
+        for s in value:
+            self._mask |= 1 << (s.slot_id if isinstance(s, Slot) else int(s))
+
+    def allows(self, slot_id: int) -> bool:
+        """Return True if the material can be used for the slot_id."""
+        return bool(self._mask >> slot_id & 1)
 
     @property
     def material_type(self) -> str:
@@ -195,10 +232,7 @@ class Material:
 
     @property
     def valid_slots(self) -> list:
-        r = []
-        for s in self.valid:
-            r.append(s.slot_id)
-        return r
+        return [s.slot_id if isinstance(s, Slot) else s for s in self.valid]
 
     def __str__(self) -> str:
         out = f"Material Type: {self._material_type}, " \
@@ -228,19 +262,20 @@ class Equipment(Item):
         intellect The intellect bonus this equipment grants
         charisma The charisma bonus this equipment grants
         constitution The constitution bonus this equipment grants
-        luck The luck bonus this equipment grants"""
+        luck The luck bonus this equipment grants
+        bonus All of the above as a `stats.Stats` vector"""
     def __init__(self, *args, **kwargs):
         self._name = kwargs['name']
         self._item_id = kwargs['item_id']
         self._slot = kwargs['slot']
-        self._b_strength = kwargs['strength']
-        self._b_agility = kwargs['agility']
-        self._b_intellect = kwargs['intellect']
-        self._b_charisma = kwargs['charisma']
-        self._b_constitution = kwargs['constitution']
-        self._b_luck = kwargs['luck']
+        self._bonus = Stats(strength=kwargs['strength'],
+                            agility=kwargs['agility'],
+                            intellect=kwargs['intellect'],
+                            charisma=kwargs['charisma'],
+                            con=kwargs['constitution'],
+                            luck=kwargs['luck'])
         self._material = kwargs['material']
-        if self._slot.slot_id not in self.material.valid_slots:
+        if not self.material.allows(self._slot.slot_id):
             raise ValueError("this type is not valid for this slot "
                              f"slot_id: {self.slot.slot_id}"
                              f"valid_ids: {self.material.valid}")
@@ -271,51 +306,55 @@ class Equipment(Item):
 
     @property
     def strength(self) -> int:
-        return self._b_strength
+        return self._bonus.strength
 
     @strength.setter
     def strength(self, value: int):
-        self._b_strength = value
+        self._bonus.strength = value
 
     @property
     def agility(self) -> int:
-        return self._b_agility
+        return self._bonus.agility
 
     @agility.setter
     def agility(self, value: int):
-        self._b_agility = value
+        self._bonus.agility = value
 
     @property
     def intellect(self) -> int:
-        return self._b_intellect
+        return self._bonus.intellect
 
     @intellect.setter
     def intellect(self, value: int):
-        self._b_intellect = value
+        self._bonus.intellect = value
 
     @property
     def charisma(self) -> int:
-        return self._b_charisma
+        return self._bonus.charisma
 
     @charisma.setter
     def charisma(self, value: int):
-        self._b_charisma = value
+        self._bonus.charisma = value
 
     @property
     def constitution(self) -> int:
-        return self._b_constitution
+        return self._bonus.constitution
 
     @constitution.setter
     def constitution(self, value: int):
-        self._b_constitution = value
+        self._bonus.constitution = value
 
     @property
     def luck(self) -> int:
-        return self._b_luck
+        return self._bonus.luck
 
     @luck.setter
     def luck(self, value: int):
-        self._b_luck = value
+        self._bonus.luck = value
+
+    @property
+    def bonus(self) -> Stats:
+        return self._bonus
 
     @property
     def material(self) -> Material:
@@ -325,17 +364,49 @@ class Equipment(Item):
     def material(self, new_material: Material = Material("wood", 0)):
         self._material = new_material
 
+    def definition(self) -> tuple:
+        """
+        Everything that tells two pieces of equipment apart: class, name,
+        item_id, slot, bonuses and material.
+        """
+        slot = self._slot.slot_id if isinstance(self._slot, Slot) \
+            else int(self._slot)
+        m = self._material
+        return (type(self), self._name, self._item_id, slot,
+                self._bonus.values(), m.material_type, m.material_tier,
+                m._mask)
+
+    def __eq__(self, other):
+        """
+        Equal only if every part of the :func:`definition()` matches, so
+        an inventory counts two pieces together only when they are the
+        same in every way. The hash follows the definition too, change
+        equipment only while it is not in an inventory.
+        """
+        if not isinstance(other, Equipment):
+            return False
+        return self.definition() == other.definition()
+
+    def __hash__(self):
+        return hash(self.definition())
+
+    def __setstate__(self, state):
+        if '_bonus' not in state:
+            # pickled before bonuses were a Stats vector
+            state['_bonus'] = Stats(*(state.pop(f"_b_{n}", 0) for n in Stats.names))
+        self.__dict__.update(state)
+
     def __str__(self) -> str:
         return (f"Item: {self._name} (ID: {self._item_id}), "
                 f"Slot: {self._slot},"
                 f"Material: {self.material.material_type}, "
                 f"({self.material.material_tier}), "
-                f"Strength: {self._b_strength}, "
-                f"Agility: {self._b_agility}, "
-                f"Intellect: {self._b_intellect}, "
-                f"Charisma: {self._b_charisma}, "
-                f"Constitution: {self._b_constitution}, "
-                f"Luck: {self._b_luck}")
+                f"Strength: {self.strength}, "
+                f"Agility: {self.agility}, "
+                f"Intellect: {self.intellect}, "
+                f"Charisma: {self.charisma}, "
+                f"Constitution: {self.constitution}, "
+                f"Luck: {self.luck}")
 
 
 class Head(Equipment):
@@ -0,0 +1,312 @@
+"""
+Append-only journal of small changes to a :class:`character.Character`.
+
+Most commands only catch a fish, sell something or gain some exp. Rather
+than writing the whole character for each of those the storage backends
+append a few typed delta records to a per-character journal and replay it
+when the character is loaded. Once the journal grows past
+config.data['journal_max_records'] records or
+config.data['journal_max_bytes'] bytes the next save writes a full
+snapshot (see `codec`) and starts a new, empty journal.
+
+:class:`character.Character` and :class:`character.Inventory` remember
+their changes since the last save in `_journal`. Anything the journal can
+not describe (renaming, new stats, equipping gear, hp changes, ...) sets
+`_journal` to None, or is caught by comparing :func:`_core()` with the
+value captured at the last save, and forces a snapshot.
+
+Layout (all integers little endian)
+------
+header          b'BTJ', version uint8, 8 byte digest of the snapshot the
+                    journal applies to. A journal whose digest does not
+                    match the snapshot is stale and ignored.
+frame           uint32 length, then that many bytes of records. One frame
+                    is appended per save, a truncated final frame (crash
+                    mid-append) is ignored.
+record          uint8 type followed by
+                    ADD/DEL     uint32 count, item definition (see
+                                `codec.pack_item`)
+                    EXP         int32 level, int64 exp (absolute)
+                    GOLD        int64 coins (absolute)
+                    IDLE        float64 start time, str pool name (empty
+                                when not idle fishing), see `codec`
+"""
+
+import hashlib
+import struct
+
+import codec
+
+MAGIC = b'BTJ'
+VERSION = 1
+
+ADD = 1
+DEL = 2
+EXP = 3
+GOLD = 4
+IDLE = 5
+
+_u8 = struct.Struct('<B')
+_u32 = struct.Struct('<I')
+_i64 = struct.Struct('<q')
+_level = struct.Struct('<iq')
+_f64 = struct.Struct('<d')
+
+HEADER_SIZE = len(MAGIC) + 1 + 8
+
+
+class State:
+    """
+    What a character's storage backend knows about its on-disk journal.
+
+    Attributes
+    ----------
+    base:       :type:`bytes`
+        Digest of the snapshot the journal applies to.
+    core:       :type:`tuple`
+        :func:`_core()` of the character when the snapshot was taken.
+    records:    :type:`int`
+        Number of records in the journal.
+    size:       :type:`int`
+        Size of the journal in bytes.
+    """
+    __slots__ = ('base', 'core', 'records', 'size')
+
+    def __init__(self, base: bytes, core: tuple):
+        self.base = base
+        self.core = core
+        self.records = 0
+        self.size = 0
+
+
+def digest(snapshot: bytes) -> bytes:
+    """Return the digest identifying a snapshot."""
+    return hashlib.blake2b(snapshot, digest_size=8).digest()
+
+
+def header(base: bytes) -> bytes:
+    """Return the header for a journal applying to the snapshot base."""
+    return MAGIC + bytes((VERSION,)) + base
+
+
+def _core(c) -> tuple:
+    """
+    The parts of a character the journal can not record.
+
+    Scalars are compared by value, objects (class, inventory, gear) by
+    identity.
+    """
+    s = c.stats
+    h = c.health
+    return ((c.name,) + s.values() + (h.base_hp, h.max_hp, h.cur_hp),
+            (c._bt_class, c._inventory) + tuple(c.gear))
+
+
+def _same(a: tuple, b: tuple) -> bool:
+    return a[0] == b[0] and len(a[1]) == len(b[1]) and \
+        all(x is y for x, y in zip(a[1], b[1]))
+
+
+def snapshot_taken(c, base: bytes = None):
+    """Record that c was just written (or read) as a full snapshot."""
+    c._journal = []
+    c.inventory._journal = []
+    c._jstate = State(base, _core(c))
+
+
+def appended(c, records: int, size: int):
+    """Record that records (size bytes) were appended to c's journal."""
+    c._jstate.records += records
+    c._jstate.size += size
+
+
+def invalidate(c):
+    """Force the next save of c to be a full snapshot."""
+    c._jstate = None
+
+
+def take(c, max_records: int, max_bytes: int):
+    """
+    Collect the changes made to c since it was last saved.
+
+    The in-memory journals are emptied either way.
+
+    Returns
+    -------
+    list:
+        The records to append, see :func:`encode()`. Empty if nothing
+        changed.
+    None:
+        If c has to be written as a full snapshot instead.
+    """
+    state = getattr(c, '_jstate', None)
+    inv = c.inventory
+    records = c._journal
+    inv_records = getattr(inv, '_journal', None)
+    c._journal = []
+    inv._journal = []
+    if state is None or records is None or inv_records is None:
+        return None
+    if state.records >= max_records or state.size >= max_bytes:
+        return None
+    if not _same(state.core, _core(c)):
+        return None
+    return _merge(records + inv_records)
+
+
+def _merge(records: list) -> list:
+    """
+    Shrink a list of in-memory records.
+
+    Only the last EXP, GOLD and IDLE matter as they are absolute, runs of
+    ADD or DEL of the same item become one record with a count.
+    """
+    out = []
+    exp = gold = idle = None
+    for r in records:
+        match r[0]:
+            case 'exp':
+                exp = r
+            case 'gold':
+                gold = r
+            case 'idle':
+                idle = r
+            case 'add' | 'del':
+                if out and out[-1][0] == r[0] and \
+                        codec.item_key(out[-1][1]) == codec.item_key(r[1]):
+                    out[-1] = (r[0], r[1], out[-1][2] + r[2])
+                else:
+                    out.append(r)
+    if exp is not None:
+        out.append(exp)
+    if gold is not None:
+        out.append(gold)
+    if idle is not None:
+        out.append(idle)
+    return out
+
+
+def encode(records: list) -> bytes:
+    """Encode records from :func:`take()` as one frame."""
+    out = []
+    for r in records:
+        match r[0]:
+            case 'add' | 'del':
+                out.append(_u8.pack(ADD if r[0] == 'add' else DEL))
+                out.append(_u32.pack(r[2]))
+                codec.pack_item(out, r[1])
+            case 'exp':
+                out.append(_u8.pack(EXP))
+                out.append(_level.pack(r[1], r[2]))
+            case 'gold':
+                out.append(_u8.pack(GOLD))
+                out.append(_i64.pack(r[1]))
+            case 'idle':
+                out.append(_u8.pack(IDLE))
+                out.append(_f64.pack(r[2]))
+                codec.pack_str(out, r[1])
+    payload = b''.join(out)
+    return _u32.pack(len(payload)) + payload
+
+
+def frames(data: bytes, pos: int = 0):
+    """Yield the payload of each complete frame in data, starting at pos."""
+    while pos + _u32.size <= len(data):
+        (n,) = _u32.unpack_from(data, pos)
+        pos += _u32.size
+        if pos + n > len(data):
+            return
+        yield data[pos:pos+n]
+        pos += n
+
+
+def decode(payload: bytes) -> list:
+    """
+    Decode one frame into records in the form :func:`take()` returns.
+
+    Raises
+    ------
+    CodecError:
+        The frame is cut short or holds an unknown record or item.
+    """
+    r = codec.Reader(payload)
+    out = []
+    while r.pos < len(payload):
+        (kind,) = r.unpack(_u8)
+        if kind == ADD or kind == DEL:
+            (count,) = r.unpack(_u32)
+            it = codec.build_item(codec.read_item(r))
+            out.append(('add' if kind == ADD else 'del', it, count))
+        elif kind == EXP:
+            out.append(('exp', *r.unpack(_level)))
+        elif kind == GOLD:
+            out.append(('gold', *r.unpack(_i64)))
+        elif kind == IDLE:
+            (started,) = r.unpack(_f64)
+            out.append(('idle', r.str(), started))
+        else:
+            raise codec.CodecError(f"unknown journal record {kind}")
+    return out
+
+
+def apply(c, payload: bytes) -> int:
+    """
+    Apply one frame of records to c without journaling them again.
+
+    The whole frame is decoded before c is touched, a frame that does not
+    decode changes nothing.
+
+    Returns
+    -------
+    The number of records applied.
+
+    Raises
+    ------
+    CodecError:
+        See :func:`decode()`.
+    """
+    records = decode(payload)
+    inv = c.inventory
+    for r in records:
+        match r[0]:
+            case 'add':
+                inv._add(r[1], r[2])
+            case 'del':
+                inv._sub(r[1], r[2])
+            case 'exp':
+                c._level._cur_level, c._level._exp = r[1], r[2]
+            case 'gold':
+                inv.coins = r[1]
+            case 'idle':
+                c._idle = (r[1], r[2]) if r[1] else None
+    return len(records)
+
+
+def replay(c, data: bytes) -> bool:
+    """
+    Apply a journal file written for c's snapshot.
+
+    The journal state of c (see :func:`snapshot_taken()`) must already be
+    set, its record and byte counts are updated.
+
+    Replay stops at the first frame that is cut short or does not decode
+    (a crash mid-append) without applying any of it, the byte count then
+    covers only the frames applied so the next append overwrites the rest.
+
+    Returns
+    -------
+    True if the journal belonged to c's snapshot and was applied, False if
+    it was stale (or empty) and ignored.
+    """
+    state = c._jstate
+    if len(data) < HEADER_SIZE or data[:len(MAGIC)] != MAGIC \
+            or data[len(MAGIC)] != VERSION \
+            or data[len(MAGIC)+1:HEADER_SIZE] != state.base:
+        return False
+    for payload in frames(data, HEADER_SIZE):
+        try:
+            state.records += apply(c, payload)
+        except (codec.CodecError, UnicodeDecodeError):
+            break
+        state.size += _u32.size + len(payload)
+    return True
@@ -0,0 +1,452 @@
+"""
+In-memory rankings of every character, see :class:`Leaderboard`.
+
+Characters are ranked on each of `BOARDS` from their manifest entry (see
+`storage.manifest_entry`), so the whole index can be rebuilt from the
+manifests at startup without decoding a single character and kept up to
+date by handing it the entry of each character as it is saved. Each board
+is a :class:`SkipList` of sort keys, which gives the top N, any
+character's rank and a page from the middle of the board in O(log n).
+"""
+
+import random
+import threading
+
+BOARDS = ('level', 'exp', 'gold', 'fish')
+"""The boards kept, named after the manifest entry field ranked on."""
+
+
+def sort_key(board: str, user_id: str, entry: dict) -> tuple:
+    """
+    The key of a character on a board, ascending is best first.
+
+    Ties are broken by user_id then name so every key is unique. The level
+    board breaks ties on exp first.
+    """
+    if board == 'level':
+        return (-entry['level'], -entry['exp'], user_id, entry['name'])
+    return (-entry.get(board, 0), user_id, entry['name'])
+
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key, height: int):
+        self.key = key
+        self.next = [None] * height
+        # number of positions each link moves forward
+        self.width = [1] * height
+
+
+class SkipList:
+    """
+    Sorted list of unique keys with O(log n) insert, remove, rank and
+    lookup by position.
+
+    An indexable skip list: every link records how many keys it skips so
+    the position of a key is the sum of the widths walked to reach it.
+
+    Methods
+    -------
+    insert(key):
+        Add a key.
+    remove(key):
+        Remove a key, KeyError if it is not there.
+    rank(key):
+        Position (0 based) of a key, KeyError if it is not there.
+    slice(start, stop):
+        The keys at positions start to stop - 1.
+    sl[i]:
+        The key at position i.
+    """
+    __slots__ = ('_head', '_len', '_height')
+
+    max_height = 24
+    """Enough for about 2 ** 24 keys before lookups start to slow down."""
+
+    def __init__(self, keys=()):
+        """
+        Parameters
+        ----------
+        keys:   iterable
+            Initial keys, they are sorted and linked in O(n log n).
+        """
+        self._head = _Node(None, self.max_height)
+        self._len = 0
+        # levels in use, links (and widths) above it are never followed
+        self._height = 1
+        last = [self._head] * self.max_height
+        at = [0] * self.max_height
+        for pos, k in enumerate(sorted(keys), 1):
+            node = _Node(k, self._random_height())
+            for lvl in range(len(node.next)):
+                last[lvl].next[lvl] = node
+                last[lvl].width[lvl] = pos - at[lvl]
+                last[lvl] = node
+                at[lvl] = pos
+            self._len = pos
+
+    def _random_height(self) -> int:
+        height = 1
+        while height < self.max_height and random.random() < 0.5:
+            height += 1
+        self._height = max(self._height, height)
+        return height
+
+    def _path(self, key) -> tuple:
+        """The last node before key on each level and its position."""
+        update = [self._head] * self._height
+        steps = [0] * self._height
+        node = self._head
+        pos = 0
+        for lvl in reversed(range(self._height)):
+            nxt = node.next[lvl]
+            while nxt is not None and nxt.key < key:
+                pos += node.width[lvl]
+                node = nxt
+                nxt = node.next[lvl]
+            update[lvl] = node
+            steps[lvl] = pos
+        return update, steps
+
+    def insert(self, key):
+        height = self._random_height()
+        update, steps = self._path(key)
+        pos = steps[0]
+        new = _Node(key, height)
+        for lvl in range(height):
+            prev = update[lvl]
+            new.next[lvl] = prev.next[lvl]
+            prev.next[lvl] = new
+            new.width[lvl] = prev.width[lvl] - (pos - steps[lvl])
+            prev.width[lvl] = pos + 1 - steps[lvl]
+        for lvl in range(height, self._height):
+            update[lvl].width[lvl] += 1
+        self._len += 1
+
+    def remove(self, key):
+        update, _ = self._path(key)
+        target = update[0].next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+        for lvl in range(self._height):
+            prev = update[lvl]
+            if prev.next[lvl] is target:
+                prev.width[lvl] += target.width[lvl] - 1
+                prev.next[lvl] = target.next[lvl]
+            else:
+                prev.width[lvl] -= 1
+        self._len -= 1
+
+    def rank(self, key) -> int:
+        update, steps = self._path(key)
+        target = update[0].next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+        return steps[0]
+
+    def _node_at(self, i: int) -> _Node:
+        node = self._head
+        pos = 0
+        for lvl in reversed(range(self._height)):
+            while node.next[lvl] is not None and \
+                    pos + node.width[lvl] <= i + 1:
+                pos += node.width[lvl]
+                node = node.next[lvl]
+        return node
+
+    def __getitem__(self, i: int):
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError("skip list index out of range")
+        return self._node_at(i).key
+
+    def slice(self, start: int, stop: int) -> list:
+        start = max(start, 0)
+        stop = min(stop, self._len)
+        if start >= stop:
+            return []
+        node = self._node_at(start)
+        out = []
+        for _ in range(stop - start):
+            out.append(node.key)
+            node = node.next[0]
+        return out
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        node = self._head.next[0]
+        while node is not None:
+            yield node.key
+            node = node.next[0]
+
+
+class Leaderboard:
+    """
+    Rankings of every character on each of `BOARDS`, overall and per guild.
+
+    A guild board only holds the characters of the guild's members, so a
+    guild's top N and ranks cost the same as the global ones. Membership
+    is told to the index with :func:`set_guild()`, :func:`add_member()`
+    and :func:`remove_member()`, a character update then touches the
+    global boards and those of each guild its user is in. Thread safe,
+    updates come from the storage threads.
+
+    Ranks are 1 based. user_ids are compared as :type:`str` like in
+    `storage`, guild ids as given.
+
+    Attributes
+    ----------
+    loaded:     :type:`bool`
+        Set once the index has been built by :func:`load()`.
+
+    Methods
+    -------
+    load(manifests):
+        Rebuild the index from every user's manifest entries.
+    update(user_id, entry):
+        Insert or move a character.
+    remove(user_id, name):
+        Drop a character.
+    clear():
+        Drop every character.
+    top(board, n, start, guild_id):
+        The best n characters on a board.
+    rank(board, user_id, name, guild_id):
+        A character's rank on a board.
+    entry(user_id, name):
+        A character's last known manifest entry.
+    set_guild(guild_id, member_ids), drop_guild(guild_id),
+    add_member(guild_id, user_id), remove_member(guild_id, user_id):
+        Keep the guild boards in step with guild membership.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._chars = {}
+        self._boards = self._new_boards()
+        self._guilds = {}
+        self._members = {}
+        self._user_guilds = {}
+
+    def _new_boards(self, user_ids=None) -> dict:
+        """Boards holding the characters of user_ids (None: nobody)."""
+        if not user_ids:
+            return {b: SkipList() for b in BOARDS}
+        chars = [(u, self._entries[(u, n)])
+                 for u in user_ids for n in self._chars.get(u, ())]
+        return {b: SkipList(sort_key(b, u, e) for u, e in chars)
+                for b in BOARDS}
+
+    def _boards_of(self, user_id: str):
+        """The global board set and one per guild user_id is in."""
+        yield self._boards
+        for g in self._user_guilds.get(user_id, ()):
+            yield self._guilds[g]
+
+    @staticmethod
+    def _insert(boards: dict, user_id: str, entry: dict):
+        for b, sl in boards.items():
+            sl.insert(sort_key(b, user_id, entry))
+
+    @staticmethod
+    def _remove(boards: dict, user_id: str, entry: dict):
+        for b, sl in boards.items():
+            sl.remove(sort_key(b, user_id, entry))
+
+    def load(self, manifests):
+        """
+        Rebuild the index.
+
+        Parameters
+        ----------
+        manifests:  iterable
+            (user_id, [manifest entry, ...]) for every user, see
+            `storage.Storage.scan_manifests`.
+        """
+        with self._lock:
+            self._entries = {}
+            self._chars = {}
+            for user_id, entries in manifests:
+                user_id = str(user_id)
+                for e in entries:
+                    self._entries[(user_id, e['name'])] = e
+                    self._chars.setdefault(user_id, set()).add(e['name'])
+            self._boards = self._new_boards(self._chars)
+            for g in self._guilds:
+                self._guilds[g] = self._new_boards(self._members[g])
+            self.loaded = True
+
+    def _put(self, user_id: str, entry: dict):
+        k = (user_id, entry['name'])
+        old = self._entries.get(k)
+        if old is not None:
+            if all(sort_key(b, user_id, old) == sort_key(b, user_id, entry)
+                   for b in BOARDS):
+                self._entries[k] = entry
+                return
+            for boards in self._boards_of(user_id):
+                self._remove(boards, user_id, old)
+        self._entries[k] = entry
+        self._chars.setdefault(user_id, set()).add(entry['name'])
+        for boards in self._boards_of(user_id):
+            self._insert(boards, user_id, entry)
+
+    def update(self, user_id, entry: dict):
+        """
+        Insert a character or move it to its new place on every board.
+
+        Parameters
+        ----------
+        user_id:    :type:`str`
+            The user's Discord ID (eg ctx.author.id)
+        entry:      :type:`dict`
+            The character's manifest entry, see `storage.manifest_entry`.
+        """
+        with self._lock:
+            self._put(str(user_id), entry)
+
+    def remove(self, user_id, name: str):
+        """Drop a character, does nothing if it is not ranked."""
+        user_id = str(user_id)
+        with self._lock:
+            old = self._entries.pop((user_id, name), None)
+            if old is None:
+                return
+            names = self._chars[user_id]
+            names.discard(name)
+            if not names:
+                del self._chars[user_id]
+            for boards in self._boards_of(user_id):
+                self._remove(boards, user_id, old)
+
+    def clear(self):
+        """Drop every character, guild membership is kept."""
+        with self._lock:
+            self._entries = {}
+            self._chars = {}
+            self._boards = self._new_boards()
+            for g in self._guilds:
+                self._guilds[g] = self._new_boards()
+
+    def _board(self, board: str, guild_id) -> SkipList:
+        if board not in BOARDS:
+            raise ValueError(f"unknown leaderboard {board}")
+        if guild_id is None:
+            return self._boards[board]
+        try:
+            return self._guilds[guild_id][board]
+        except KeyError:
+            raise KeyError(f"guild {guild_id} is not indexed")
+
+    def top(self, board: str, n: int = 10, start: int = 0,
+            guild_id=None) -> list:
+        """
+        The best characters on a board.
+
+        Parameters
+        ----------
+        board:      :type:`str`
+            One of `BOARDS`.
+        n:          :type:`int`
+            How many characters to return.
+        start:      :type:`int`
+            Skip this many first, eg to page through the board.
+        guild_id:   :type:`int`
+            Only rank members of this guild. None ranks everyone.
+
+        Returns
+        -------
+        :type:`list`
+            (rank, user_id, manifest entry) tuples, best first.
+
+        Raises
+        ------
+        ValueError:
+            If board is not one of `BOARDS`.
+        KeyError:
+            If guild_id has not been indexed with :func:`set_guild()`.
+        """
+        with self._lock:
+            keys = self._board(board, guild_id).slice(start, start + n)
+            return [(start + i + 1, k[-2], self._entries[(k[-2], k[-1])])
+                    for i, k in enumerate(keys)]
+
+    def rank(self, board: str, user_id, name: str, guild_id=None) -> int:
+        """
+        A character's rank on a board, None if it is not ranked there.
+
+        Raises as :func:`top()` does.
+        """
+        user_id = str(user_id)
+        with self._lock:
+            sl = self._board(board, guild_id)
+            entry = self._entries.get((user_id, name))
+            if entry is None:
+                return None
+            try:
+                return sl.rank(sort_key(board, user_id, entry)) + 1
+            except KeyError:
+                return None
+
+    def size(self, guild_id=None) -> int:
+        """The number of characters ranked (in a guild)."""
+        with self._lock:
+            return len(self._board(BOARDS[0], guild_id))
+
+    def entry(self, user_id, name: str) -> dict:
+        """A character's last known manifest entry or None."""
+        with self._lock:
+            return self._entries.get((str(user_id), name))
+
+    def set_guild(self, guild_id, member_ids):
+        """(Re)build a guild's boards from the ids of all its members."""
+        members = {str(m) for m in member_ids}
+        with self._lock:
+            for user_id in self._members.get(guild_id, ()):
+                self._user_guilds[user_id].discard(guild_id)
+            self._members[guild_id] = members
+            for user_id in members:
+                self._user_guilds.setdefault(user_id, set()).add(guild_id)
+            self._guilds[guild_id] = self._new_boards(members)
+
+    def drop_guild(self, guild_id):
+        """Forget a guild (eg the bot left it)."""
+        with self._lock:
+            for user_id in self._members.pop(guild_id, ()):
+                self._user_guilds[user_id].discard(guild_id)
+            self._guilds.pop(guild_id, None)
+
+    def add_member(self, guild_id, user_id):
+        """Add a user's characters to a guild's boards."""
+        user_id = str(user_id)
+        with self._lock:
+            members = self._members.get(guild_id)
+            if members is None or user_id in members:
+                return
+            members.add(user_id)
+            self._user_guilds.setdefault(user_id, set()).add(guild_id)
+            for name in self._chars.get(user_id, ()):
+                self._insert(self._guilds[guild_id], user_id,
+                             self._entries[(user_id, name)])
+
+    def remove_member(self, guild_id, user_id):
+        """Take a user's characters off a guild's boards."""
+        user_id = str(user_id)
+        with self._lock:
+            members = self._members.get(guild_id)
+            if members is None or user_id not in members:
+                return
+            members.discard(user_id)
+            self._user_guilds[user_id].discard(guild_id)
+            for name in self._chars.get(user_id, ()):
+                self._remove(self._guilds[guild_id], user_id,
+                             self._entries[(user_id, name)])
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,110 @@
+import discord
+import leaderboard
+from char_cmds import board, store
+from discord.ext import commands
+from tabulate import tabulate
+
+
+PAGE_LINES = 10
+"""Characters per page of /leaderboard."""
+
+TITLES = {
+    'level': 'Level',
+    'exp': 'Exp',
+    'gold': 'Gold',
+    'fish': 'Fish value',
+}
+"""Board -> column title, one for each of `leaderboard.BOARDS`."""
+
+
+class leaderboardCommands(commands.Cog):
+    """
+    Leaderboard Commands Cog
+    ------------------------
+
+    Ranks characters from the index in `char_cmds.board`, which is kept up
+    to date as characters are saved so no character is loaded to answer.
+
+    Methods
+    ----------
+    leaderboard(ctx, by, scope, page):
+        Show a page of a leaderboard and the player's own rank.
+    """
+
+    def __init__(self, bot):
+        """
+        Construct the cog for leaderboard commands.
+        """
+        self.bot = bot
+
+    def _name(self, user_id: str) -> str:
+        user = self.bot.get_user(int(user_id))
+        return user.display_name if user is not None else user_id
+
+    @commands.slash_command(
+        description="See who is on top.",
+        help="Rank characters by level, exp, gold or the value of their fish.",
+        brief="Who is the best?"
+    )
+    async def leaderboard(self, ctx: discord.ApplicationContext,
+                          by: discord.Option(str,
+                                             description="What to rank by",
+                                             choices=[*leaderboard.BOARDS],
+                                             default='level'),
+                          scope: discord.Option(str,
+                                                description="Who to rank",
+                                                choices=['server', 'global'],
+                                                default='server'),
+                          page: discord.Option(int,
+                                               description="Which page to show",
+                                               min_value=1,
+                                               default=1)):
+        """
+        Print out a page of a leaderboard.
+
+        The player's active character and its rank are added below the
+        page. Ranks are read from `char_cmds.board` in O(log n), see
+        :class:`leaderboard.Leaderboard`.
+
+        Parameters
+        ----------
+        ctx     The discord context object for the command
+
+        by      The board, one of `leaderboard.BOARDS`.
+
+        scope   'server' ranks the members of this server, 'global' every
+                character. Outside a server it is always global.
+
+        page    The page to show, starting at 1.
+        """
+        guild_id = None
+        if scope == 'server' and ctx.guild is not None:
+            guild_id = ctx.guild.id
+        try:
+            size = board.size(guild_id)
+        except KeyError:
+            await ctx.respond("```This server's leaderboard is not ready yet,"
+                              " try again soon.```")
+            return
+        if size == 0:
+            await ctx.respond("```Nobody is ranked yet!```")
+            return
+        pages = -(-size // PAGE_LINES)
+        page = min(page, pages)
+        rows = board.top(by, PAGE_LINES, (page - 1) * PAGE_LINES, guild_id)
+        data = [[rank, e['name'], e['class'], self._name(uid), e.get(by, 0)]
+                for rank, uid, e in rows]
+        out_str = tabulate(data, ["#", "Name", "Class", "Player", TITLES[by]],
+                           tablefmt="simple", numalign="right",
+                           stralign="left")
+        out_str += f"\nPage {page}/{pages}"
+        try:
+            name = await store.active_name(ctx.author.id)
+        except FileNotFoundError:
+            name = None
+        if name is not None:
+            rank = board.rank(by, ctx.author.id, name, guild_id)
+            if rank is not None:
+                e = board.entry(ctx.author.id, name)
+                out_str += f"\nYou: #{rank} {name} ({e.get(by, 0)})"
+        await ctx.respond(f"```{out_str}```")
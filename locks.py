@@ -0,0 +1,62 @@
+import asyncio
+import contextlib
+import weakref
+
+
+class LockManager:
+    """
+    Hand out one :class:`asyncio.Lock` per (user_id, character name).
+
+    Commands that read, modify and then save a character should hold the
+    lock for that character for the whole sequence so overlapping commands
+    (or an admin command on the same character) cannot lose updates.
+    Commands for different characters never wait on each other.
+
+    Locks are only weakly referenced. Once no coroutine is holding or
+    waiting on a lock it is garbage collected, so memory stays bounded by
+    the number of characters with commands in flight.
+
+    Methods
+    -------
+    get(user_id, name):
+        Return the lock for a character.
+    hold(user_id, name):
+        Async context manager that acquires the lock for a character.
+    """
+
+    def __init__(self):
+        self._locks = weakref.WeakValueDictionary()
+        self.waits = 0
+
+    @staticmethod
+    def key(user_id, name: str) -> tuple:
+        return (str(user_id), name)
+
+    def get(self, user_id, name: str) -> asyncio.Lock:
+        """Return the lock for (user_id, name), creating it if needed."""
+        k = self.key(user_id, name)
+        lock = self._locks.get(k)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[k] = lock
+        return lock
+
+    @contextlib.asynccontextmanager
+    async def hold(self, user_id, name: str):
+        """
+        Acquire the lock for (user_id, name) for the duration of the block.
+
+        Ex:
+            async with char_locks.hold(ctx.author.id, name):
+                me = await store.load(ctx.author.id, name)
+                ...
+                await store.save(ctx.author.id, me)
+        """
+        lock = self.get(user_id, name)
+        if lock.locked():
+            self.waits += 1
+        async with lock:
+            yield lock
+
+    def __len__(self):
+        return len(self._locks)
@@ -1,11 +1,11 @@
-import os
-
 import admin
 import char_cmds
 import config
 import discord
 import fishing_cmds
 import inventory_cmds
+import leaderboard_cmds
+import metrics
 from discord.ext import commands
 
 # from dotenv import dotenv_values
@@ -28,20 +28,17 @@ def invite_uri():
 
 @bot.event
 async def on_ready():
-    data_dir = f"./{config.data['data_dir']}"
     try:
-        if not os.path.isdir(data_dir):
-            os.makedirs(data_dir)
-        char_files_dir = f"{data_dir}/{config.data['char_dir']}"
-        if not os.path.isdir(char_files_dir):
-            os.makedirs(char_files_dir)
-        active_files_dir = f"{data_dir}/{config.data['active_dir']}"
-        if not os.path.isdir(active_files_dir):
-            os.makedirs(active_files_dir)
+        await char_cmds.store.run(char_cmds.backend.init)
     except FileExistsError:
         raise FileExistsError("could not initialize bot files")
+    metrics.loop_lag.start()
+    board = char_cmds.board
+    if not board.loaded:
+        await char_cmds.store.run(char_cmds.load_board)
     for g in bot.guilds:
-        pass
+        await char_cmds.store.run(board.set_guild, g.id,
+                                  [m.id for m in g.members])
     # cogs = ['char_cmds']
     # for c in cogs:
     #     bot.load_extension(c)
@@ -51,10 +48,27 @@ async def on_ready():
 
 @bot.event
 async def on_guild_join(guild):
-    pass
+    await char_cmds.store.run(char_cmds.board.set_guild, guild.id,
+                              [m.id for m in guild.members])
+
+
+@bot.event
+async def on_guild_remove(guild):
+    char_cmds.board.drop_guild(guild.id)
+
+
+@bot.event
+async def on_member_join(member):
+    char_cmds.board.add_member(member.guild.id, member.id)
+
+
+@bot.event
+async def on_member_remove(member):
+    char_cmds.board.remove_member(member.guild.id, member.id)
 
 bot.add_cog(admin.adminCommands(bot))
 bot.add_cog(char_cmds.characterCommands(bot))
 bot.add_cog(inventory_cmds.inventoryCommands(bot))
 bot.add_cog(fishing_cmds.Fishing(bot))
+bot.add_cog(leaderboard_cmds.leaderboardCommands(bot))
 bot.run(config.data['envs']['DISCORD_TOKEN'])
@@ -0,0 +1,97 @@
+import asyncio
+
+
+class LoopLagMonitor:
+    """
+    Measure how late the asyncio event loop wakes up.
+
+    The monitor sleeps for `interval` seconds in a loop and records how much
+    longer than that the sleep actually took. Any blocking call made on the
+    event loop (disk I/O, heavy CPU work) shows up as lag here.
+
+    Attributes
+    ----------
+    interval:   :type:`float`
+        How often (in seconds) the loop is sampled.
+    threshold:  :type:`float`
+        Lag (in seconds) above which a sample is counted as a stall.
+    last:       :type:`float`
+        The most recent lag sample in seconds.
+    worst:      :type:`float`
+        The largest lag sample seen in seconds.
+    avg:        :type:`float`
+        Exponentially weighted average of the lag in seconds.
+    samples:    :type:`int`
+        Number of samples taken.
+    stalls:     :type:`int`
+        Number of samples above threshold.
+
+    Methods
+    -------
+    start(loop):
+        Start sampling on the given (or running) event loop.
+    stop():
+        Stop sampling.
+    stats():
+        Return the counters as a dict (values in milliseconds).
+    """
+
+    def __init__(self, interval: float = 0.5, threshold: float = 0.05):
+        self.interval = interval
+        self.threshold = threshold
+        self.last = 0.0
+        self.worst = 0.0
+        self.avg = 0.0
+        self.samples = 0
+        self.stalls = 0
+        self._task = None
+
+    def record(self, lag: float):
+        """Record a single lag sample (seconds)."""
+        lag = max(lag, 0.0)
+        self.last = lag
+        self.worst = max(self.worst, lag)
+        if self.samples == 0:
+            self.avg = lag
+        else:
+            self.avg = self.avg * 0.9 + lag * 0.1
+        self.samples += 1
+        if lag > self.threshold:
+            self.stalls += 1
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.record(loop.time() - start - self.interval)
+
+    def start(self, loop: asyncio.AbstractEventLoop = None):
+        """
+        Start sampling.
+
+        Safe to call more than once (eg on_ready fires again on reconnect),
+        only one sampling task is ever running.
+        """
+        if self._task is not None and not self._task.done():
+            return
+        if loop is None:
+            loop = asyncio.get_running_loop()
+        self._task = loop.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            'last_ms': round(self.last * 1000, 2),
+            'avg_ms': round(self.avg * 1000, 2),
+            'worst_ms': round(self.worst * 1000, 2),
+            'samples': self.samples,
+            'stalls': self.stalls,
+        }
+
+
+loop_lag = LoopLagMonitor()
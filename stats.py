@@ -0,0 +1,162 @@
+from array import array
+
+
+def _stat(i: int, name: str) -> property:
+    def get(self) -> int:
+        return self._v[i]
+
+    def set(self, val: int) -> None:
+        self._v[i] = val
+        self._version += 1
+    return property(get, set, doc=f"The {name} stat.")
+
+
+class Stats:
+    """
+    Wrapper for character stats.
+
+    A fixed length vector of the six stats, stored in one :class:`array.array`
+    in the order of `Stats.names`. Used for a class' stats, equipment
+    bonuses and anything derived from them, so they can be combined with
+    elementwise arithmetic instead of stat by stat.
+
+    Attributes
+    ----------
+    strength:       :type:`int`
+        Character's strength
+    agility:        :type:`int`
+        Character's agility
+    intellect:      :type:`int`
+        Character's intellect
+    charisma:      :type:`int`
+        Character's charisma
+    constitution:   :type:`int`
+        Character's constitution
+    luck:           :type:`int`
+        Character's luck
+
+    Methods
+    -------
+    values():
+        The stats as a tuple, in `Stats.names` order.
+    sum(vectors):
+        Add up any number of :class:`Stats` in one pass.
+    a + b, a - b, a * n:
+        Elementwise add/subtract, scale by a number. Return a new Stats.
+    """
+    __slots__ = ('_v', '_version')
+
+    names = ('strength', 'agility', 'intellect', 'charisma',
+             'constitution', 'luck')
+
+    def __init__(self, strength=0, agility=0, intellect=0,
+                 charisma=0, con=0, luck=0) -> None:
+        """
+        Create a new stat block for a `character.Character`
+
+        Parameters
+        ----------
+        strength:       int
+            Starting strength value.
+        agility:        int
+            Starting agility value.
+        intellect:      int
+            Starting intellect value.
+        charisma:       int
+            Starting charisma value.
+        constitution:   int
+            Starting constitution value.
+        luck:           int
+            Starting luck value.
+        """
+        self._v = array('q', (strength, agility, intellect, charisma, con, luck))
+        self._version = 0
+
+    strength = _stat(0, 'strength')
+    agility = _stat(1, 'agility')
+    intellect = _stat(2, 'intellect')
+    charisma = _stat(3, 'charisma')
+    constitution = _stat(4, 'constitution')
+    luck = _stat(5, 'luck')
+
+    @classmethod
+    def _of(cls, values) -> 'Stats':
+        s = cls.__new__(cls)
+        s._v = array('q', values)
+        s._version = 0
+        return s
+
+    def values(self) -> tuple:
+        return tuple(self._v)
+
+    @classmethod
+    def sum(cls, vectors) -> 'Stats':
+        """
+        Add up an iterable of :class:`Stats` (eg every equipped item's
+        bonuses). Returns an all zero Stats for an empty iterable.
+        """
+        cols = [s._v for s in vectors]
+        if not cols:
+            return cls()
+        return cls._of(map(sum, zip(*cols)))
+
+    def __add__(self, other: 'Stats') -> 'Stats':
+        if not isinstance(other, Stats):
+            return NotImplemented
+        return Stats._of(a + b for a, b in zip(self._v, other._v))
+
+    def __sub__(self, other: 'Stats') -> 'Stats':
+        if not isinstance(other, Stats):
+            return NotImplemented
+        return Stats._of(a - b for a, b in zip(self._v, other._v))
+
+    def __mul__(self, n) -> 'Stats':
+        if not isinstance(n, (int, float)):
+            return NotImplemented
+        return Stats._of(int(a * n) for a in self._v)
+
+    __rmul__ = __mul__
+
+    def __getitem__(self, i: int) -> int:
+        return self._v[i]
+
+    def __len__(self):
+        return len(self._v)
+
+    def __str__(self):
+        """
+        Generate a dict of stat_name: stat_value and return it as a string.
+        """
+        return str(dict(self))
+
+    def __iter__(self):
+        """Yield (stat_name, value) pairs in `Stats.names` order."""
+        return zip(self.names, self._v)
+
+    def __eq__(self, other):
+        """
+        Compare two :class:`Stats` objects for equality.
+
+        Parameters
+        ----------
+        other:  :class:`Stats`
+            The :class:`Stats` object to compare this on against.
+
+        Returns
+        -------
+        True if both objects have the same attributes.
+        False otherwise or an object that is not a `Stats` is passed.
+        """
+        if isinstance(other, Stats):
+            return self._v == other._v
+        return False
+
+    def __getstate__(self):
+        return tuple(self._v)
+
+    def __setstate__(self, state):
+        if isinstance(state, dict):
+            # pickled before Stats were vectors: {'_strength': 3, ...}
+            state = [state.get(f"_{n}", 0) for n in self.names]
+        self._v = array('q', state)
+        self._version = 0
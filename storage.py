@@ -0,0 +1,1146 @@
+import contextlib
+import errno
+import hashlib
+import itertools
+import os
+import pickle
+import shutil
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import codec
+import config
+import fish
+import journal
+
+
+class Storage:
+    """
+    Superclass for character storage backends.
+
+    A backend is responsible for persisting :class:`character.Character`
+    objects and each user's active character pointer. Not meant to be used
+    on its own, use one of the sub-classes. `get_backend()` builds the
+    backend named in config.data['storage'].
+
+    Every lookup that fails because the character (or active pointer) does
+    not exist raises :exception:`FileNotFoundError` regardless of the
+    backend so the commands in `char_cmds` can handle them the same way.
+
+    Methods
+    -------
+    init():
+        Create whatever files/tables the backend needs.
+    purge():
+        Delete ALL game data held by the backend.
+    load_char(user_id, name):
+        Return a single character.
+    load_chars(user_id, skip):
+        Return every character for a user, except those named in skip.
+    save_char(user_id, char):
+        Insert or replace a character.
+    save_many(items):
+        Insert or replace a batch of (user_id, char) with one durability
+        barrier for the whole batch.
+    write(user_id, char):
+        Save a character, appending to its journal when only small changes
+        were made.
+    write_many(items):
+        Like write() for a batch of (user_id, char).
+    append_many(items):
+        Append journal records for a batch of (user_id, char, records).
+    del_char(user_id, name):
+        Remove a character.
+    has_char(user_id, name):
+        Check if a character exists.
+    count_chars(user_id):
+        Return the number of characters a user has.
+    get_active(user_id):
+        Return the name of the user's active character.
+    set_active(user_id, name):
+        Set the name of the user's active character.
+    load_active(user_id):
+        Return the user's active character.
+    load_manifest(user_id):
+        Return the manifest entries for all of a user's characters.
+    """
+
+    def init(self):
+        raise NotImplementedError
+
+    def purge(self):
+        raise NotImplementedError
+
+    def close(self):
+        return
+
+    def load_char(self, user_id: str, name: str):
+        raise NotImplementedError
+
+    def load_chars(self, user_id: str, skip=()) -> list:
+        raise NotImplementedError
+
+    def save_char(self, user_id: str, char):
+        raise NotImplementedError
+
+    def save_many(self, items: list):
+        """
+        Save a batch of (user_id, char) pairs.
+
+        Backends should override this to make the whole batch durable with
+        a single sync, the default just saves them one at a time.
+        """
+        for user_id, char in items:
+            self.save_char(user_id, char)
+
+    def append_many(self, items: list):
+        raise NotImplementedError
+
+    def write(self, user_id: str, char):
+        """
+        Save a character, writing only what changed where possible.
+
+        See :func:`write_many()`.
+        """
+        self.write_many([(user_id, char)])
+
+    def write_many(self, items: list):
+        """
+        Save a batch of (user_id, char) pairs.
+
+        Characters whose changes since the last save can be described by
+        `journal` records get those appended to their journal, everything
+        else (and any character whose journal is due for compaction) is
+        written as a full snapshot. Characters without changes are not
+        written at all. If the write fails every character in the batch is
+        written as a snapshot next time.
+        """
+        snaps = []
+        appends = []
+        for user_id, char in items:
+            records = None
+            if config.data['journal']:
+                records = journal.take(char, config.data['journal_max_records'],
+                                       config.data['journal_max_bytes'])
+            if records is None:
+                snaps.append((user_id, char))
+            elif records:
+                appends.append((user_id, char, records))
+        try:
+            self._commit(snaps, appends)
+        except Exception:
+            for _, char in items:
+                journal.invalidate(char)
+            raise
+
+    def _commit(self, snaps: list, appends: list):
+        if appends:
+            self.append_many(appends)
+        if snaps:
+            self.save_many(snaps)
+
+    def del_char(self, user_id: str, name: str):
+        raise NotImplementedError
+
+    def has_char(self, user_id: str, name: str) -> bool:
+        raise NotImplementedError
+
+    def count_chars(self, user_id: str) -> int:
+        raise NotImplementedError
+
+    def get_active(self, user_id: str) -> str:
+        raise NotImplementedError
+
+    def set_active(self, user_id: str, name: str):
+        raise NotImplementedError
+
+    def load_active(self, user_id: str):
+        """
+        Return the user's active character.
+
+        Backends that can do this in a single lookup should override this.
+        """
+        return self.load_char(user_id, self.get_active(user_id))
+
+    def load_manifest(self, user_id: str) -> list:
+        """
+        Return the manifest entries for a user's characters.
+
+        See :func:`manifest_entry()`. Backends keep the manifest up to date
+        in save_char and del_char so listing characters never has to
+        decode a full character.
+        """
+        raise NotImplementedError
+
+    def scan_manifests(self, workers: int = 8) -> list:
+        """
+        Read the manifest entries of every user, eg to build
+        `leaderboard.Leaderboard` at startup.
+
+        Parameters
+        ----------
+        workers:    :type:`int`
+            Threads to read with, for backends that keep a manifest per
+            user.
+
+        Returns
+        -------
+        :type:`list`
+            (user_id, [manifest entry, ...]) for every user.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def dumps(char) -> bytes:
+        """Serialize a character with the codec in config.data['codec']."""
+        if config.data['codec'] == 'binary':
+            return codec.encode(char)
+        return pickle.dumps(char)
+
+    @staticmethod
+    def loads(data: bytes):
+        """Deserialize a character, either format is accepted."""
+        return codec.decode(data)
+
+
+def manifest_entry(char) -> dict:
+    """
+    Build the manifest entry for a character.
+
+    The manifest holds just enough to list and rank characters (name,
+    class, level, exp, gold, the combined value of the fish held and
+    updated_at) without decoding the whole character.
+
+    Parameters
+    ----------
+    char:   :class:`character.Character`
+        The character to summarize.
+    """
+    return {
+        'name': char.name,
+        'class': char._bt_class.name,
+        'level': char.level,
+        'exp': char.experience,
+        'gold': char.inventory.gold,
+        'fish': char.inventory.count_of(fish.Fish)[1],
+        'updated_at': time.time(),
+    }
+
+
+class PickleStorage(Storage):
+    """
+    The original file tree storage.
+
+    Each character is pickled into
+        ./data_dir/char_dir/<shard>/<user_id>/<name>.file_ext
+    the active pointer for a user is stored in
+        ./data_dir/active_dir/<shard>/<user_id>.file_ext
+    and the user's manifest (name -> :func:`manifest_entry()`) in
+        ./data_dir/manifest_dir/<shard>/<user_id>.file_ext
+    Changes appended since the last snapshot of a character (see `journal`)
+    are kept next to it in
+        ./data_dir/char_dir/<shard>/<user_id>/<name>.journal
+
+    <shard> spreads users over config.data['shard_depth'] levels of
+    directories named by a hash of the user_id (eg 'ab/cd') so no single
+    directory ends up with hundreds of thousands of entries. With a depth
+    of 0 there is no shard and this is the original flat layout.
+
+    Data written with the flat layout keeps working: paths resolve to the
+    flat location until :func:`migrate()` (or :func:`migrate_user()`) has
+    moved that user. Every operation holds a per-user lock so a user is
+    never moved while their files are being read or written.
+
+    Every file is written to a temporary file first and then renamed over
+    the old one, so a crash mid-save leaves either the old or the new data
+    on disk, never a truncated file. When config.data['fsync'] is set the
+    data is synced before the rename and the directory after it.
+    """
+
+    stripes = 64
+
+    def __init__(self):
+        self._manifest_lock = threading.Lock()
+        self._user_locks = tuple(threading.RLock() for _ in range(self.stripes))
+
+    def _stripe(self, user_id) -> int:
+        return int(self.shard_hash(user_id)[:8], 16) % self.stripes
+
+    def lock(self, user_id) -> threading.RLock:
+        """Return the lock held while a user's files are in use."""
+        return self._user_locks[self._stripe(user_id)]
+
+    @contextlib.contextmanager
+    def _locked(self, user_ids):
+        """Hold the locks for several users (taken in a fixed order)."""
+        with contextlib.ExitStack() as stack:
+            for i in sorted({self._stripe(u) for u in user_ids}):
+                stack.enter_context(self._user_locks[i])
+            yield
+
+    @staticmethod
+    def shard_hash(user_id) -> str:
+        return hashlib.sha1(str(user_id).encode('utf-8')).hexdigest()
+
+    def shard(self, user_id) -> str:
+        """
+        Return the shard directory for a user, eg 'ab/cd'.
+
+        Empty when config.data['shard_depth'] is 0.
+        """
+        h = self.shard_hash(user_id)
+        return '/'.join(h[2*i:2*i+2] for i in range(config.data['shard_depth']))
+
+    def _locate(self, kind: str, user_id, entry: str, legacy: bool = False) -> str:
+        base = f"./{config.data['data_dir']}/{config.data[kind]}"
+        shard = '' if legacy else self.shard(user_id)
+        if shard:
+            return f"{base}/{shard}/{entry}"
+        return f"{base}/{entry}"
+
+    def _resolve(self, kind: str, user_id, entry: str) -> str:
+        """
+        Path of entry in the sharded layout, or in the flat layout if it
+        only exists there (not migrated yet).
+        """
+        path = self._locate(kind, user_id, entry)
+        if config.data['shard_depth'] and not os.path.exists(path):
+            legacy = self._locate(kind, user_id, entry, legacy=True)
+            if os.path.exists(legacy):
+                return legacy
+        return path
+
+    def paths(self, user_id: str, name: str) -> tuple:
+        """
+        Build the paths for the application's data directories.
+
+        Looks at information from config.data to determine the expected
+        file structure for the application. This function makes NO changes
+        to disk.
+
+        Parameters
+        ----------
+        user_id: :type:`str`
+            The user's Discord ID (eg ctx.author.id)
+
+        name    :type:`str`
+            The name of the character.
+        """
+        dir_path = self._resolve('char_dir', user_id, str(user_id))
+        char_file = f"{dir_path}/{name}.{config.data['file_ext']}"
+        return (dir_path, char_file)
+
+    def journal_path(self, user_id: str, name: str) -> str:
+        dir_path, _ = self.paths(user_id, name)
+        return f"{dir_path}/{name}.journal"
+
+    def active_path(self, user_id: str) -> str:
+        return self._resolve('active_dir', user_id,
+                             f"{user_id}.{config.data['file_ext']}")
+
+    def manifest_path(self, user_id: str) -> str:
+        return self._resolve('manifest_dir', user_id,
+                             f"{user_id}.{config.data['file_ext']}")
+
+    def migrate_user(self, user_id: str) -> bool:
+        """
+        Move a user's files from the flat layout into their shard.
+
+        Safe to run while the bot is up, the user's lock is held for the
+        move. Files that already exist in the shard are newer and win.
+
+        Returns
+        -------
+        True if anything was moved.
+        """
+        if not config.data['shard_depth']:
+            return False
+        moved = False
+        file_name = f"{user_id}.{config.data['file_ext']}"
+        with self.lock(user_id):
+            for kind, entry in (('char_dir', str(user_id)),
+                                ('active_dir', file_name),
+                                ('manifest_dir', file_name)):
+                src = self._locate(kind, user_id, entry, legacy=True)
+                if not os.path.exists(src):
+                    continue
+                dst = self._locate(kind, user_id, entry)
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                if not os.path.exists(dst):
+                    os.rename(src, dst)
+                elif os.path.isdir(src):
+                    for f in os.listdir(src):
+                        if not os.path.exists(f"{dst}/{f}"):
+                            os.rename(f"{src}/{f}", f"{dst}/{f}")
+                    shutil.rmtree(src)
+                else:
+                    os.remove(src)
+                moved = True
+        return moved
+
+    def legacy_users(self) -> set:
+        """Return the user_ids that still have files in the flat layout."""
+        if not config.data['shard_depth']:
+            return set()
+        users = set()
+        ext = f".{config.data['file_ext']}"
+        for kind in ('char_dir', 'active_dir', 'manifest_dir'):
+            base = f"./{config.data['data_dir']}/{config.data[kind]}"
+            try:
+                entries = list(os.scandir(base))
+            except FileNotFoundError:
+                continue
+            for e in entries:
+                if kind == 'char_dir':
+                    # shard directories are two hex characters
+                    if e.is_dir() and not self._is_shard(e.name):
+                        users.add(e.name)
+                elif e.is_file() and e.name.endswith(ext):
+                    users.add(e.name[0:len(e.name)-len(ext)])
+        return users
+
+    @staticmethod
+    def _is_shard(name: str) -> bool:
+        return len(name) == 2 and all(c in '0123456789abcdef' for c in name)
+
+    def migrate(self, limit: int = None) -> int:
+        """
+        Move users from the flat layout into the sharded one.
+
+        Parameters
+        ----------
+        limit:  :type:`int`
+            Stop after this many users so a caller can migrate in batches
+            without tying up a storage thread for long. None for all.
+
+        Returns
+        -------
+        The number of users moved. 0 once nothing is left to migrate.
+        """
+        n = 0
+        for user_id in sorted(self.legacy_users()):
+            if limit is not None and n >= limit:
+                break
+            if self.migrate_user(user_id):
+                n += 1
+        return n
+
+    def init(self):
+        config.init_data()
+
+    @staticmethod
+    def _stage(path: str, data: bytes, sync: bool = False) -> str:
+        """Write data to a temporary file next to path, return its name."""
+        parent = os.path.dirname(path)
+        if not os.path.isdir(parent):
+            os.makedirs(parent)
+        tmp = f"{path}.tmp{threading.get_ident()}"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        return tmp
+
+    @staticmethod
+    def _sync_dir(path: str):
+        """Sync a directory's entries, where the platform supports it."""
+        if os.name != 'posix':
+            return
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        except OSError as e:
+            # some filesystems do not sync directories
+            if e.errno not in (errno.EINVAL, errno.ENOTSUP):
+                raise
+        finally:
+            os.close(fd)
+
+    def _atomic_write(self, path: str, data: bytes):
+        """Replace path with data, syncing if config.data['fsync'] is set."""
+        sync = config.data['fsync']
+        tmp = self._stage(path, data, sync)
+        os.replace(tmp, path)
+        if sync:
+            self._sync_dir(os.path.dirname(path))
+
+    def _sync_dirs(self, paths: list):
+        """Sync the directories holding paths, once per directory."""
+        for d in {os.path.dirname(p) for p in paths}:
+            self._sync_dir(d)
+
+    def _read_manifest(self, user_id: str) -> dict:
+        """
+        Read a user's manifest, building it if it does not exist yet.
+
+        Characters saved before manifests existed (or before an entry
+        field was added) are decoded once here and the result is written
+        out.
+        """
+        try:
+            with open(self.manifest_path(user_id), 'rb') as f:
+                manifest = pickle.load(f)
+        except FileNotFoundError:
+            pass
+        else:
+            stale = [n for n, e in manifest.items() if 'fish' not in e]
+            if stale:
+                for n in stale:
+                    try:
+                        manifest[n] = manifest_entry(self.load_char(user_id, n))
+                    except FileNotFoundError:
+                        del manifest[n]
+                self._write_manifest(user_id, manifest)
+            return manifest
+        try:
+            names = self.char_names(user_id)
+        except FileNotFoundError:
+            return {}
+        manifest = {}
+        for n in names:
+            entry = manifest_entry(self.load_char(user_id, n))
+            manifest[entry['name']] = entry
+        self._write_manifest(user_id, manifest)
+        return manifest
+
+    def _write_manifest(self, user_id: str, manifest: dict):
+        self._atomic_write(self.manifest_path(user_id), pickle.dumps(manifest))
+
+    def _stage_manifests(self, by_user: dict) -> list:
+        """
+        Stage updated manifests for {user_id: [char, ...]}.
+
+        Must be called with _manifest_lock held. Returns (tmp, final) pairs
+        to rename once the batch is durable.
+        """
+        staged = []
+        sync = config.data['fsync']
+        for user_id, chars in by_user.items():
+            manifest = self._read_manifest(user_id)
+            for c in chars:
+                manifest[c.name] = manifest_entry(c)
+            path = self.manifest_path(user_id)
+            staged.append((self._stage(path, pickle.dumps(manifest), sync),
+                           path))
+        return staged
+
+    def _drop_journal(self, user_id: str, name: str):
+        try:
+            os.remove(self.journal_path(user_id, name))
+        except FileNotFoundError:
+            pass
+
+    def load_manifest(self, user_id: str) -> list:
+        with self.lock(user_id):
+            with self._manifest_lock:
+                return list(self._read_manifest(user_id).values())
+
+    def user_ids(self) -> set:
+        """Return every user_id with a character directory (either layout)."""
+        base = f"./{config.data['data_dir']}/{config.data['char_dir']}"
+        depth = config.data['shard_depth']
+        dirs = [base]
+        for _ in range(depth):
+            dirs = [e.path for d in dirs for e in self._subdirs(d)
+                    if self._is_shard(e.name)]
+        users = {e.name for d in dirs for e in self._subdirs(d)}
+        return users | self.legacy_users()
+
+    @staticmethod
+    def _subdirs(path: str) -> list:
+        try:
+            return [e for e in os.scandir(path) if e.is_dir()]
+        except FileNotFoundError:
+            return []
+
+    def _scan_manifest(self, user_id: str) -> tuple:
+        """
+        Read a user's manifest for :func:`scan_manifests()`.
+
+        Manifests are replaced by renaming a complete file over the old
+        one, so this reads without the manifest lock and only falls back
+        to :func:`load_manifest()` when the manifest has to be built.
+        """
+        try:
+            with open(self.manifest_path(user_id), 'rb') as f:
+                entries = list(pickle.load(f).values())
+        except FileNotFoundError:
+            entries = None
+        if entries is None or any('fish' not in e for e in entries):
+            entries = self.load_manifest(user_id)
+        return user_id, entries
+
+    def scan_manifests(self, workers: int = 8) -> list:
+        users = sorted(self.user_ids())
+        with ThreadPoolExecutor(max_workers=workers,
+                                thread_name_prefix="manifest-scan") as pool:
+            return list(pool.map(self._scan_manifest, users,
+                                 chunksize=max(len(users) // (workers * 4), 1)))
+
+    def purge(self):
+        path = f"./{config.data['data_dir']}/"
+        try:
+            shutil.rmtree(path)
+        except FileNotFoundError as e:
+            raise FileNotFoundError(f"could not find {path} -- {e}")
+
+    def load_char(self, user_id: str, name: str):
+        with self.lock(user_id):
+            _, char_file = self.paths(user_id, name)
+            try:
+                with open(char_file, 'rb') as f:
+                    data = f.read()
+            except FileNotFoundError:
+                raise FileNotFoundError("Character not found!")
+            char = self.loads(data)
+            journal.snapshot_taken(char, journal.digest(data))
+            try:
+                with open(self.journal_path(user_id, name), 'rb') as f:
+                    journal.replay(char, f.read())
+            except FileNotFoundError:
+                pass
+            return char
+
+    def char_names(self, user_id: str) -> list:
+        with self.lock(user_id):
+            dir_path, _ = self.paths(user_id, None)
+            ext = f".{config.data['file_ext']}"
+            try:
+                files = os.listdir(dir_path)
+            except FileNotFoundError:
+                raise FileNotFoundError("problem checking char list")
+            return [f[0:len(f)-len(ext)] for f in files if f.endswith(ext)]
+
+    def load_chars(self, user_id: str, skip=()) -> list:
+        with self.lock(user_id):
+            return [self.load_char(user_id, n) for n in self.char_names(user_id)
+                    if n not in skip]
+
+    def save_char(self, user_id: str, char):
+        with self.lock(user_id):
+            _, char_file = self.paths(user_id, char.name)
+            try:
+                data = self.dumps(char)
+                self._atomic_write(char_file, data)
+                self._drop_journal(user_id, char.name)
+                with self._manifest_lock:
+                    manifest = self._read_manifest(user_id)
+                    manifest[char.name] = manifest_entry(char)
+                    self._write_manifest(user_id, manifest)
+            except FileNotFoundError:
+                raise FileNotFoundError("file problem on character save")
+            journal.snapshot_taken(char, journal.digest(data))
+
+    def save_many(self, items: list):
+        """
+        Save a batch of characters with one commit.
+
+        Every character and the affected manifests are staged to synced
+        temporary files and renamed into place, then each directory
+        touched is synced once so the renames are durable too.
+        """
+        self._commit(items, [])
+
+    def append_many(self, items: list):
+        """
+        Append journal records for a batch of (user_id, char, records).
+
+        Journals and the affected manifests are synced as in
+        :func:`save_many()`.
+        """
+        self._commit([], items)
+
+    def _commit(self, snaps: list, appends: list):
+        with self._locked([u for u, *_ in snaps + appends]):
+            staged = []
+            written = []
+            by_user = {}
+            sync = config.data['fsync']
+            try:
+                for user_id, char, records in appends:
+                    path = self.journal_path(user_id, char.name)
+                    state = char._jstate
+                    frame = journal.encode(records)
+                    # the first append after a snapshot replaces any stale
+                    # journal. Later ones cut off anything past the frames
+                    # replayed so far (a frame torn by a crash), otherwise
+                    # every frame appended after it would be unreachable.
+                    if state.size:
+                        f = open(path, 'r+b')
+                        f.truncate(journal.HEADER_SIZE + state.size)
+                        f.seek(0, os.SEEK_END)
+                    else:
+                        f = open(path, 'wb')
+                        f.write(journal.header(state.base))
+                    with f:
+                        f.write(frame)
+                        if sync:
+                            f.flush()
+                            os.fsync(f.fileno())
+                    journal.appended(char, len(records), len(frame))
+                    written.append(path)
+                    by_user.setdefault(user_id, []).append(char)
+                bases = []
+                for user_id, char in snaps:
+                    _, char_file = self.paths(user_id, char.name)
+                    data = self.dumps(char)
+                    bases.append(journal.digest(data))
+                    staged.append((self._stage(char_file, data, sync),
+                                   char_file))
+                    by_user.setdefault(user_id, []).append(char)
+                with self._manifest_lock:
+                    staged.extend(self._stage_manifests(by_user))
+                    for tmp, final in staged:
+                        os.replace(tmp, final)
+                if sync:
+                    # new journals and the renames are only durable once
+                    # their directory entries are
+                    self._sync_dirs(written + [f for _, f in staged])
+            except FileNotFoundError:
+                raise FileNotFoundError("file problem on character save")
+            for (user_id, char), base in zip(snaps, bases):
+                self._drop_journal(user_id, char.name)
+                journal.snapshot_taken(char, base)
+
+    def del_char(self, user_id: str, name: str):
+        with self.lock(user_id):
+            _, char_file = self.paths(user_id, name)
+            os.remove(char_file)
+            self._drop_journal(user_id, name)
+            with self._manifest_lock:
+                manifest = self._read_manifest(user_id)
+                manifest.pop(name, None)
+                self._write_manifest(user_id, manifest)
+
+    def has_char(self, user_id: str, name: str) -> bool:
+        with self.lock(user_id):
+            _, char_file = self.paths(user_id, name)
+            return os.path.isfile(char_file)
+
+    def count_chars(self, user_id: str) -> int:
+        return len(self.load_manifest(user_id))
+
+    def get_active(self, user_id: str) -> str:
+        with self.lock(user_id):
+            try:
+                with open(self.active_path(user_id), 'rb') as f:
+                    return pickle.load(f)[1]
+            except FileNotFoundError:
+                raise FileNotFoundError("no active character!")
+
+    def set_active(self, user_id: str, name: str):
+        with self.lock(user_id):
+            try:
+                self._atomic_write(self.active_path(user_id),
+                                   pickle.dumps((0, name, user_id)))
+            except FileExistsError:
+                raise FileExistsError("could not set active character")
+
+
+class SqliteStorage(Storage):
+    """
+    Store characters in a single SQLite database.
+
+    The database is opened in WAL mode so readers never block the writer.
+    With config.data['fsync'] set every commit is synced (synchronous=FULL).
+    Characters are stored as pickled blobs keyed by (user_id, name) and the
+    active pointers live in their own table keyed by user_id, so every
+    operation is a single indexed query. The manifest table mirrors the
+    :func:`manifest_entry()` of every character and is written in the same
+    transaction as the character. Journal frames (see `journal`) are rows
+    of the journal table, numbered by seq, and are deleted in the same
+    transaction that writes a new snapshot. Each thread gets its own
+    connection.
+
+    The database file is ./data_dir/sqlite_file
+    """
+
+    schema = (
+        "CREATE TABLE IF NOT EXISTS characters ("
+        " user_id TEXT NOT NULL,"
+        " name TEXT NOT NULL,"
+        " data BLOB NOT NULL,"
+        " PRIMARY KEY (user_id, name)"
+        ") WITHOUT ROWID",
+        "CREATE TABLE IF NOT EXISTS active ("
+        " user_id TEXT NOT NULL PRIMARY KEY,"
+        " name TEXT NOT NULL"
+        ") WITHOUT ROWID",
+        "CREATE TABLE IF NOT EXISTS manifest ("
+        " user_id TEXT NOT NULL,"
+        " name TEXT NOT NULL,"
+        " class TEXT NOT NULL,"
+        " level INTEGER NOT NULL,"
+        " exp INTEGER NOT NULL,"
+        " gold INTEGER NOT NULL,"
+        " updated_at REAL NOT NULL,"
+        " fish INTEGER,"
+        " PRIMARY KEY (user_id, name)"
+        ") WITHOUT ROWID",
+        "CREATE TABLE IF NOT EXISTS journal ("
+        " user_id TEXT NOT NULL,"
+        " name TEXT NOT NULL,"
+        " seq INTEGER NOT NULL,"
+        " data BLOB NOT NULL,"
+        " PRIMARY KEY (user_id, name, seq)"
+        ") WITHOUT ROWID",
+    )
+    manifest_cols = ('name', 'class', 'level', 'exp', 'gold', 'updated_at',
+                     'fish')
+
+    def __init__(self, path: str = None):
+        if path is None:
+            path = f"./{config.data['data_dir']}/{config.data['sqlite_file']}"
+        self.path = path
+        self._local = threading.local()
+        self._conns = []
+        self._conns_lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """The calling thread's connection, opened on first use."""
+        c = getattr(self._local, 'conn', None)
+        if c is None:
+            parent = os.path.dirname(self.path)
+            if parent and not os.path.isdir(parent):
+                os.makedirs(parent)
+            c = sqlite3.connect(self.path, check_same_thread=False)
+            c.execute("PRAGMA journal_mode=WAL")
+            if config.data['fsync']:
+                c.execute("PRAGMA synchronous=FULL")
+            else:
+                c.execute("PRAGMA synchronous=NORMAL")
+            for stmt in self.schema:
+                c.execute(stmt)
+            # manifest tables created before fish values were kept
+            if 'fish' not in {r[1] for r in
+                              c.execute("PRAGMA table_info(manifest)")}:
+                c.execute("ALTER TABLE manifest ADD COLUMN fish INTEGER")
+            c.commit()
+            self._local.conn = c
+            self._backfill_manifest(c)
+            with self._conns_lock:
+                self._conns.append(c)
+        return c
+
+    def _backfill_manifest(self, c: sqlite3.Connection):
+        """
+        Build manifest rows for characters saved before the table existed,
+        or before the fish column was added.
+        """
+        rows = c.execute(
+            "SELECT c.user_id, c.data FROM characters c LEFT JOIN manifest m"
+            " ON m.user_id = c.user_id AND m.name = c.name"
+            " WHERE m.fish IS NULL").fetchall()
+        with c:
+            for user_id, data in rows:
+                self._put_manifest(c, user_id, self._load(user_id, data))
+
+    def _put_manifest(self, c: sqlite3.Connection, user_id: str, char):
+        e = manifest_entry(char)
+        c.execute("INSERT OR REPLACE INTO manifest"
+                  " (user_id, name, class, level, exp, gold, updated_at, fish)"
+                  " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                  (str(user_id),) + tuple(e[k] for k in self.manifest_cols))
+
+    def init(self):
+        self.conn
+
+    def close(self):
+        with self._conns_lock:
+            for c in self._conns:
+                c.close()
+            self._conns = []
+        self._local = threading.local()
+
+    def purge(self):
+        self.close()
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(self.path + suffix)
+            except FileNotFoundError:
+                pass
+
+    def _load(self, user_id: str, data: bytes):
+        """Decode a snapshot and replay the character's journal onto it."""
+        char = self.loads(data)
+        journal.snapshot_taken(char)
+        rows = self.conn.execute(
+            "SELECT data FROM journal WHERE user_id = ? AND name = ?"
+            " ORDER BY seq", (str(user_id), char.name)).fetchall()
+        for (data,) in rows:
+            journal.appended(char, journal.apply(char, data), len(data))
+        return char
+
+    def load_char(self, user_id: str, name: str):
+        row = self.conn.execute(
+            "SELECT data FROM characters WHERE user_id = ? AND name = ?",
+            (str(user_id), name)).fetchone()
+        if row is None:
+            raise FileNotFoundError("Character not found!")
+        return self._load(user_id, row[0])
+
+    def load_chars(self, user_id: str, skip=()) -> list:
+        rows = self.conn.execute(
+            "SELECT name, data FROM characters WHERE user_id = ?",
+            (str(user_id),)).fetchall()
+        return [self._load(user_id, r[1]) for r in rows if r[0] not in skip]
+
+    def _put_char(self, c: sqlite3.Connection, user_id: str, char):
+        c.execute("INSERT OR REPLACE INTO characters (user_id, name, data)"
+                  " VALUES (?, ?, ?)",
+                  (str(user_id), char.name, self.dumps(char)))
+        c.execute("DELETE FROM journal WHERE user_id = ? AND name = ?",
+                  (str(user_id), char.name))
+        self._put_manifest(c, user_id, char)
+
+    def save_char(self, user_id: str, char):
+        self._commit([(user_id, char)], [])
+
+    def save_many(self, items: list):
+        """Save a batch of characters in a single transaction (one sync)."""
+        self._commit(items, [])
+
+    def append_many(self, items: list):
+        """Append journal frames for a batch in a single transaction."""
+        self._commit([], items)
+
+    def _commit(self, snaps: list, appends: list):
+        # rows hold the frame payload, the row itself is the framing
+        payloads = [journal.encode(records)[4:] for _, _, records in appends]
+        with self.conn as c:
+            for (user_id, char, _), data in zip(appends, payloads):
+                c.execute("INSERT INTO journal (user_id, name, seq, data)"
+                          " SELECT ?, ?, COALESCE(MAX(seq), -1) + 1, ?"
+                          " FROM journal WHERE user_id = ? AND name = ?",
+                          (str(user_id), char.name, data,
+                           str(user_id), char.name))
+                self._put_manifest(c, user_id, char)
+            for user_id, char in snaps:
+                self._put_char(c, user_id, char)
+        for (_, char, records), data in zip(appends, payloads):
+            journal.appended(char, len(records), len(data))
+        for _, char in snaps:
+            journal.snapshot_taken(char)
+
+    def del_char(self, user_id: str, name: str):
+        with self.conn as c:
+            cur = c.execute(
+                "DELETE FROM characters WHERE user_id = ? AND name = ?",
+                (str(user_id), name))
+            c.execute("DELETE FROM manifest WHERE user_id = ? AND name = ?",
+                      (str(user_id), name))
+            c.execute("DELETE FROM journal WHERE user_id = ? AND name = ?",
+                      (str(user_id), name))
+        if cur.rowcount == 0:
+            raise FileNotFoundError("Character not found!")
+
+    def has_char(self, user_id: str, name: str) -> bool:
+        row = self.conn.execute(
+            "SELECT 1 FROM characters WHERE user_id = ? AND name = ?",
+            (str(user_id), name)).fetchone()
+        return row is not None
+
+    def count_chars(self, user_id: str) -> int:
+        row = self.conn.execute(
+            "SELECT COUNT(*) FROM manifest WHERE user_id = ?",
+            (str(user_id),)).fetchone()
+        return row[0]
+
+    def get_active(self, user_id: str) -> str:
+        row = self.conn.execute(
+            "SELECT name FROM active WHERE user_id = ?",
+            (str(user_id),)).fetchone()
+        if row is None:
+            raise FileNotFoundError("no active character!")
+        return row[0]
+
+    def set_active(self, user_id: str, name: str):
+        with self.conn as c:
+            c.execute("INSERT OR REPLACE INTO active (user_id, name)"
+                      " VALUES (?, ?)", (str(user_id), name))
+
+    def load_active(self, user_id: str):
+        row = self.conn.execute(
+            "SELECT c.data FROM active a JOIN characters c"
+            " ON c.user_id = a.user_id AND c.name = a.name"
+            " WHERE a.user_id = ?", (str(user_id),)).fetchone()
+        if row is None:
+            raise FileNotFoundError("no active character!")
+        return self._load(user_id, row[0])
+
+    def load_manifest(self, user_id: str) -> list:
+        rows = self.conn.execute(
+            "SELECT name, class, level, exp, gold, updated_at, fish"
+            " FROM manifest WHERE user_id = ?", (str(user_id),)).fetchall()
+        return [dict(zip(self.manifest_cols, r)) for r in rows]
+
+    def scan_manifests(self, workers: int = 8) -> list:
+        # one indexed pass over the table beats splitting it across threads
+        out = []
+        rows = self.conn.execute(
+            "SELECT user_id, name, class, level, exp, gold, updated_at, fish"
+            " FROM manifest ORDER BY user_id")
+        for user_id, group in itertools.groupby(rows, key=lambda r: r[0]):
+            out.append((user_id, [dict(zip(self.manifest_cols, r[1:]))
+                                  for r in group]))
+        return out
+
+
+class GroupCommitter:
+    """
+    Batch character saves from many commands into one durable commit.
+
+    Saves submitted within `window` seconds of each other are handed to
+    :func:`Storage.write_many()` together, so the whole batch shares one
+    commit (one transaction, or one sync per directory for the file tree)
+    instead of paying for one per save. Repeated saves of the same
+    character inside a window are collapsed into one write. Callers of
+    :func:`save()` block until their batch is on disk, so this should only
+    be called from the storage thread pool, never the event loop.
+
+    Attributes
+    ----------
+    window:     :type:`float`
+        How long (seconds) to collect saves before committing.
+    batches:    :type:`int`
+        Number of commits made.
+    saves:      :type:`int`
+        Number of characters written across all commits.
+    largest:    :type:`int`
+        The biggest batch committed.
+    sizes:      :type:`dict`
+        Histogram of batch sizes (bucket -> count).
+
+    Methods
+    -------
+    submit(user_id, char):
+        Queue a save, returns a :class:`concurrent.futures.Future`.
+    save(user_id, char):
+        Queue a save and wait for it to be committed.
+    flush():
+        Wait for every queued save to be committed.
+    close():
+        Flush and stop the commit thread.
+    """
+
+    buckets = ((1, '1'), (4, '2-4'), (16, '5-16'), (64, '17-64'))
+
+    def __init__(self, backend: Storage, window_ms: float = 10):
+        self.backend = backend
+        self.window = window_ms / 1000
+        self.batches = 0
+        self.saves = 0
+        self.largest = 0
+        self.sizes = {b: 0 for _, b in self.buckets}
+        self.sizes['65+'] = 0
+        self._pending = {}
+        self._inflight = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="group-commit",
+                                        daemon=True)
+        self._thread.start()
+
+    def submit(self, user_id: str, char) -> Future:
+        fut = Future()
+        k = (str(user_id), char.name)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("group commit is closed")
+            entry = self._pending.get(k)
+            if entry is None:
+                self._pending[k] = [user_id, char, [fut]]
+            else:
+                entry[1] = char
+                entry[2].append(fut)
+            self._cond.notify_all()
+        return fut
+
+    def save(self, user_id: str, char):
+        return self.submit(user_id, char).result()
+
+    def _record(self, size: int):
+        self.batches += 1
+        self.saves += size
+        self.largest = max(self.largest, size)
+        for limit, bucket in self.buckets:
+            if size <= limit:
+                self.sizes[bucket] += 1
+                return
+        self.sizes['65+'] += 1
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+            # give other commands a chance to join this batch
+            time.sleep(self.window)
+            with self._cond:
+                batch = list(self._pending.values())
+                self._pending = {}
+                self._inflight = len(batch)
+            err = None
+            try:
+                self.backend.write_many([(u, c) for u, c, _ in batch])
+            except Exception as e:
+                err = e
+            self._record(len(batch))
+            for _, _, futs in batch:
+                for f in futs:
+                    if err is None:
+                        f.set_result(None)
+                    else:
+                        f.set_exception(err)
+            with self._cond:
+                self._inflight = 0
+                self._cond.notify_all()
+
+    def flush(self):
+        """Block until every queued save has been committed."""
+        with self._cond:
+            self._cond.wait_for(lambda: not self._pending and not self._inflight)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def stats(self) -> dict:
+        avg = self.saves / self.batches if self.batches else 0
+        out = {
+            'window_ms': self.window * 1000,
+            'batches': self.batches,
+            'saves': self.saves,
+            'avg_batch': round(avg, 2),
+            'largest': self.largest,
+        }
+        for k, v in self.sizes.items():
+            out[f"batch {k}"] = v
+        return out
+
+
+def get_backend(name: str = None) -> Storage:
+    """
+    Construct the storage backend named in config.data['storage'].
+
+    Parameters
+    ----------
+    name:   :type:`str`
+        Override the configured backend. One of 'pickle' or 'sqlite'.
+    """
+    if name is None:
+        name = config.data['storage']
+    match name:
+        case 'pickle':
+            return PickleStorage()
+        case 'sqlite':
+            return SqliteStorage()
+        case _:
+            raise ValueError(f"unknown storage backend {name}")
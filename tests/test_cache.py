@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+
+import cache
+
+
+class Char:
+    def __init__(self, name: str, gold: int = 0):
+        self.name = name
+        self.gold = gold
+
+
+class Disk:
+    """write_back that records snapshots and can be made to fail or block."""
+
+    def __init__(self):
+        self.saved = {}
+        self.fail = False
+        self.gate = None
+
+    def __call__(self, user_id, snap):
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.fail:
+            raise OSError("disk full")
+        self.saved[(user_id, snap[0])] = snap[1]
+
+
+def snapshot(c) -> tuple:
+    return (c.name, c.gold)
+
+
+@pytest.fixture
+def disk():
+    return Disk()
+
+
+def test_writes_the_snapshot_taken_on_put(disk):
+    cc = cache.CharacterCache(disk, 1, snapshot)
+    a = Char("a", 5)
+    cc.put('1', a, dirty=True)
+    a.gold = 99
+    cc.put('1', Char("b"))
+    assert disk.saved == {('1', "a"): 5}
+    assert cc.writes == 1
+
+
+def test_failed_eviction_is_put_back(disk):
+    cc = cache.CharacterCache(disk, 1, snapshot)
+    cc.put('1', Char("a", 5), dirty=True)
+    disk.fail = True
+    cc.put('1', Char("b"))
+    assert cc.failures == 1
+    assert cc.peek('1', "a").gold == 5
+    disk.fail = False
+    assert cc.flush() == 1
+    assert disk.saved == {('1', "a"): 5}
+
+
+def test_failed_flush_stays_dirty(disk):
+    cc = cache.CharacterCache(disk, 4, snapshot)
+    cc.put('1', Char("a", 5), dirty=True)
+    disk.fail = True
+    with pytest.raises(OSError):
+        cc.flush()
+    assert cc.stats()['dirty'] == 1
+    disk.fail = False
+    assert cc.flush() == 1
+    assert cc.stats()['dirty'] == 0
+
+
+def test_lookups_do_not_wait_on_write_back(disk):
+    cc = cache.CharacterCache(disk, 1, snapshot)
+    cc.put('1', Char("a", 5), dirty=True)
+    disk.gate = threading.Event()
+    t = threading.Thread(target=cc.put, args=('2', Char("b")))
+    t.start()
+    try:
+        done = threading.Event()
+
+        def lookups():
+            cc.peek('2', "b")
+            cc.peek('1', "a")
+            cc.stats()
+            done.set()
+        threading.Thread(target=lookups).start()
+        assert done.wait(1)
+        assert cc.peek('1', "a").gold == 5
+    finally:
+        disk.gate.set()
+        t.join()
+    assert disk.saved == {('1', "a"): 5}
+    assert cc.get('1', "a") is None
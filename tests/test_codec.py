@@ -0,0 +1,107 @@
+import pickle
+
+import pytest
+
+import character
+import codec
+import fish
+import item
+from tests.test_inventory import sword
+
+
+def make_char(name="Tester", strength=1) -> character.Character:
+    c = character.Character(name=name, class_choice=character.Warrior())
+    c.gain_exp(1234)
+    c.inventory.gold = 77
+    c.inventory.add_many([fish.Fish("Salmon", 4)] * 5)
+    c.inventory.add_item(sword(strength=strength))
+    c.gear.equip(sword(strength=strength + 1))
+    c.start_idle("pond", 1000.5)
+    return c
+
+
+def test_round_trip():
+    c = make_char()
+    d = codec.decode(codec.encode(c))
+    assert d.name == c.name
+    assert d._bt_class.name == c._bt_class.name
+    assert (d.level, d.experience) == (c.level, c.experience)
+    assert d.stats == c.stats
+    assert d.inventory.gold == 77
+    assert d.inventory.counts == c.inventory.counts
+    assert list(d.gear) == list(c.gear)
+    assert d.idle_fishing == c.idle_fishing
+
+
+def test_pickled_characters_still_decode():
+    c = make_char()
+    d = codec.decode(pickle.dumps(c))
+    assert d.inventory.counts == c.inventory.counts
+
+
+def test_equipment_is_not_shared_between_characters():
+    weak = codec.decode(codec.encode(make_char("Weak", strength=1)))
+    strong = codec.decode(codec.encode(make_char("Strong", strength=50)))
+    (w,) = [i for i in weak.inventory.counts if isinstance(i, item.Equipment)]
+    (s,) = [i for i in strong.inventory.counts
+            if isinstance(i, item.Equipment)]
+    assert (w.strength, s.strength) == (1, 50)
+    assert w is not s
+    again = codec.decode(codec.encode(make_char("Weak", strength=1)))
+    (w2,) = [i for i in again.inventory.counts
+             if isinstance(i, item.Equipment)]
+    assert w2 == w and w2 is not w
+
+
+def test_fish_are_shared():
+    a = codec.decode(codec.encode(make_char("A")))
+    b = codec.decode(codec.encode(make_char("B")))
+    (fa,) = [i for i in a.inventory.counts if isinstance(i, fish.Fish)]
+    (fb,) = [i for i in b.inventory.counts if isinstance(i, fish.Fish)]
+    assert fa is fb
+
+
+def test_equipped_and_carried_equipment_stay_separate():
+    c = make_char()
+    carried = sword(strength=5)
+    c.inventory.add_item(carried)
+    c.gear.equip(sword(strength=5))
+    d = codec.decode(codec.encode(c))
+    (bagged,) = [i for i in d.inventory.counts if i == carried]
+    assert bagged == d.gear.weapon
+    assert bagged is not d.gear.weapon
+
+
+def test_int64_values_round_trip():
+    c = make_char()
+    c._bt_class.stats.luck = 2**40
+    c.health.cur_hp = 2**33
+    c.gear.equip(sword(strength=2**35))
+    d = codec.decode(codec.encode(c))
+    assert d.stats.luck == 2**40
+    assert d.health.cur_hp == 2**33
+    assert list(d.gear) == list(c.gear)
+
+
+def test_too_large_values_raise_codec_error():
+    c = make_char()
+    c.health.cur_hp = 2**63
+    with pytest.raises(codec.CodecError):
+        codec.encode(c)
+
+
+def test_version_3_still_decodes(monkeypatch):
+    # the int32 layout written before version 4
+    monkeypatch.setattr(codec, 'VERSION', 3)
+    monkeypatch.setattr(codec, '_stats', codec._stats32)
+    monkeypatch.setattr(codec, '_health', codec._health32)
+    monkeypatch.setattr(codec, '_equip', codec._equip32)
+    monkeypatch.setattr(codec, 'EQUIPMENT64', codec.EQUIPMENT)
+    c = make_char()
+    data = codec.encode(c)
+    monkeypatch.undo()
+    d = codec.decode(data)
+    assert d.stats == c.stats
+    assert d.health.cur_hp == c.health.cur_hp
+    assert list(d.gear) == list(c.gear)
+    assert d.inventory.counts == c.inventory.counts
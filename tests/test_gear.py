@@ -0,0 +1,35 @@
+import pickle
+
+import character
+from tests.test_inventory import sword
+
+
+def test_bonus_follows_equip_and_unequip():
+    g = character.Gear()
+    g.equip(sword(strength=3))
+    assert g.bonus.strength == 3
+    g.unequip(character.Gear.WEAPON)
+    assert g.bonus.strength == 0
+
+
+def test_mutate_reequip_unequip():
+    g = character.Gear()
+    s = sword(strength=1)
+    g.equip(s)
+    s.strength = 5
+    # not counted until re-equipped
+    assert g.bonus.strength == 1
+    g.equip(s)
+    assert g.bonus.strength == 5
+    s.strength = 2
+    g.unequip(character.Gear.WEAPON)
+    assert g.bonus.strength == 0
+
+
+def test_pickle_rebuilds_bonus():
+    g = character.Gear()
+    g.equip(sword(strength=4))
+    g2 = pickle.loads(pickle.dumps(g))
+    assert g2.bonus.strength == 4
+    g2.unequip(character.Gear.WEAPON)
+    assert g2.bonus.strength == 0
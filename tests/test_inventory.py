@@ -0,0 +1,44 @@
+import character
+import fish
+import item
+
+
+def sword(strength=1, material=None, name="Iron Sword", item_id=7):
+    if material is None:
+        material = item.Material("iron", 2, "all")
+    return item.Equipment(name=name, item_id=item_id, slot=item.Slot(7),
+                          strength=strength,
+                          agility=0, intellect=0, charisma=0,
+                          constitution=0, luck=0, material=material)
+
+
+def test_same_equipment_is_equal():
+    a, b = sword(), sword()
+    assert a == b and hash(a) == hash(b)
+
+
+def test_equipment_differing_in_bonus_or_material_is_not_equal():
+    base = sword()
+    assert base != sword(strength=50)
+    assert base != sword(material=item.Material("steel", 2, "all"))
+    assert base != sword(material=item.Material("iron", 3, "all"))
+
+
+def test_different_equipment_is_counted_apart():
+    inv = character.Inventory()
+    weak, strong = sword(), sword(strength=50)
+    inv.add_item(weak)
+    inv.add_item(strong)
+    inv.add_item(sword())
+    assert inv.counts[weak] == 2
+    assert inv.counts[strong] == 1
+    inv.del_item(strong)
+    assert strong not in inv.counts
+    assert inv.counts[weak] == 2
+
+
+def test_fish_stack_by_species():
+    inv = character.Inventory()
+    inv.add_many([fish.Fish("Salmon", 4)] * 3 + [fish.Fish("Cod", 1)])
+    assert inv.counts[fish.Fish("Salmon", 4)] == 3
+    assert inv.count_of(fish.Fish) == (4, 13)
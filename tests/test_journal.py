@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+import character
+import config
+import fish
+import journal
+import storage
+
+SALMON = fish.Fish("Salmon", 4)
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(config.data, 'fsync', False)
+    b = storage.PickleStorage()
+    b.init()
+    return b
+
+
+def saved_char(backend, fish_count: int) -> character.Character:
+    c = character.Character(name="Angler", class_choice=character.Rogue())
+    backend.save_char('1', c)
+    for _ in range(fish_count):
+        c.inventory.add_item(SALMON)
+        backend.write('1', c)
+    return c
+
+
+def held(c) -> int:
+    return c.inventory.counts.get(SALMON, 0)
+
+
+def test_journal_replays(backend):
+    saved_char(backend, 3)
+    c = backend.load_char('1', "Angler")
+    assert held(c) == 3
+    assert c._jstate.records == 3
+
+
+@pytest.mark.parametrize('tail', [
+    b'\x40\x00',                    # torn length prefix
+    b'\x40\x00\x00\x00\x01\x01',    # length written, payload cut short
+    b'\x03\x00\x00\x00\x09\xff\xff',  # a complete frame of garbage
+], ids=['torn-length', 'torn-payload', 'garbage-frame'])
+def test_append_after_torn_tail(backend, tail):
+    saved_char(backend, 8)
+    path = backend.journal_path('1', "Angler")
+    with open(path, 'ab') as f:
+        f.write(tail)
+    c = backend.load_char('1', "Angler")
+    assert held(c) == 8
+    c.inventory.add_item(SALMON)
+    backend.write('1', c)
+    assert held(backend.load_char('1', "Angler")) == 9
+    assert os.path.getsize(path) == journal.HEADER_SIZE + c._jstate.size
+
+
+def test_bad_frame_is_not_partly_applied(backend):
+    saved_char(backend, 8)
+    good = journal.encode([('add', SALMON, 5)])[journal._u32.size:]
+    payload = good + bytes((0xff,))
+    with open(backend.journal_path('1', "Angler"), 'ab') as f:
+        f.write(journal._u32.pack(len(payload)) + payload)
+    c = backend.load_char('1', "Angler")
+    assert held(c) == 8
+    assert c._jstate.records == 8
+
+
+def test_synced_saves(backend, monkeypatch):
+    monkeypatch.setitem(config.data, 'fsync', True)
+    synced = []
+    real = os.fsync
+    monkeypatch.setattr(os, 'fsync', lambda fd: synced.append(fd) or real(fd))
+    monkeypatch.setattr(os, 'sync', lambda: pytest.fail("os.sync() called"))
+    c = saved_char(backend, 2)
+    backend.save_many([('1', c), ('2', c)])
+    assert synced
+    assert held(backend.load_char('2', "Angler")) == 2
@@ -0,0 +1,71 @@
+import bisect
+import random
+
+import pytest
+
+import leaderboard
+
+
+def entry(name, level=1, exp=0, gold=0, fish=0) -> dict:
+    return {'name': name, 'class': 'warrior', 'level': level, 'exp': exp,
+            'gold': gold, 'fish': fish}
+
+
+def test_skip_list_matches_a_sorted_list():
+    rng = random.Random(1)
+    ref = sorted(rng.random() for _ in range(500))
+    sl = leaderboard.SkipList(reversed(ref))
+    for _ in range(3000):
+        if ref and rng.random() < .4:
+            k = rng.choice(ref)
+            sl.remove(k)
+            ref.remove(k)
+        else:
+            k = rng.random()
+            sl.insert(k)
+            bisect.insort(ref, k)
+    assert list(sl) == ref
+    for i in range(0, len(ref), 17):
+        assert sl[i] == ref[i]
+        assert sl.rank(ref[i]) == i
+    assert sl.slice(10, 25) == ref[10:25]
+    with pytest.raises(KeyError):
+        sl.rank(2.0)
+
+
+@pytest.fixture
+def board():
+    b = leaderboard.Leaderboard()
+    b.load([('1', [entry('a', 3, 300, gold=5, fish=1)]),
+            ('2', [entry('b', 5, 900, gold=1), entry('c', 1, 0, gold=50)])])
+    return b
+
+
+def test_top_and_rank(board):
+    assert [e['name'] for _, _, e in board.top('level')] == ['b', 'a', 'c']
+    assert board.top('gold', 1) == [(1, '2', entry('c', 1, 0, gold=50))]
+    assert board.rank('gold', 2, 'c') == 1
+    assert board.rank('level', '1', 'a') == 2
+    assert board.rank('level', 1, 'missing') is None
+
+
+def test_updates_move_characters(board):
+    board.update(1, entry('a', 9, 9000, gold=5, fish=1))
+    assert board.rank('level', 1, 'a') == 1
+    board.remove(1, 'a')
+    assert board.rank('level', 1, 'a') is None
+    assert len(board) == 2
+
+
+def test_guild_boards(board):
+    board.set_guild(7, [1, 3])
+    assert board.size(7) == 1
+    board.update(3, entry('d', 9, 9999))
+    assert board.rank('level', 3, 'd', 7) == 1
+    assert board.rank('level', 1, 'a', 7) == 2
+    board.add_member(7, 2)
+    assert board.size(7) == 4
+    board.remove_member(7, 2)
+    assert board.rank('level', 2, 'b', 7) is None
+    with pytest.raises(KeyError):
+        board.top('level', guild_id=8)